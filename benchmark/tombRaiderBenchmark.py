@@ -0,0 +1,391 @@
+#! /usr/bin/env python3
+
+##################
+# IMPORT MODULES #
+##################
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import rich.console
+import rich.markup
+import rich_click as click
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+from function import __version__
+
+TOMBRAIDER_SCRIPT = os.path.join(REPOSITORY_DIRECTORY, 'tombRaider')
+REFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference.json')
+CRITERIA_ORDER = ['taxID', 'seqSim', 'coOccur', 'pseudogene']
+STOP_CODONS = {'TAA', 'TAG', 'TGA'}
+SENSE_CODONS = [''.join(codon) for codon in itertools.product('ACGT', repeat = 3) if ''.join(codon) not in STOP_CODONS]
+BLAST_FORMAT = '6 qaccver saccver ssciname staxid length pident mismatch qcovs evalue bitscore qstart qend sstart send gapopen'
+TAXONOMY_FILES = {'blast': 'blastTaxonomy.txt', 'sintax': 'sintaxTaxonomy.txt', 'idtaxa': 'idtaxaTaxonomy.txt', 'bold': 'boldTaxonomy.txt'}
+MODES = ['alignment', 'global', 'local']
+
+#######################
+# SYNTHETIC DATA SETS #
+#######################
+def datasetName(asvs, samples, seed):
+    '''
+    function to return the name of a synthetic data set, which identifies its files and reference outputs
+    '''
+    return f'asvs{asvs}_samples{samples}_seed{seed}'
+
+def _mutateCodons(codons, rng, codonCount):
+    '''
+    function to replace codonCount random codons with other sense codons, so that the reading frame stays open
+    '''
+    codons = list(codons)
+    for position in rng.choice(len(codons), size = codonCount, replace = False):
+        codons[position] = SENSE_CODONS[rng.integers(len(SENSE_CODONS))]
+    return codons
+
+def syntheticFamilies(asvs, seed, family_size_ = 4, seq_length_ = 312):
+    '''
+    function to generate parent/child families of aligned sequences
+    parents are species within genera (a few % divergence within a genus), children carry 1-3 point errors of their parent,
+    while some children carry a stop codon (pseudogenes) or miss a codon (a gap in the alignment)
+    other children make a single criterion fail, so that every criterion changes the outcome: children assigned to a congeneric species (taxID),
+    children detected in samples without their parent (coOccur), and diverged pseudogenes of their own species detected without their parent (pseudogene)
+    returns a list of families (dictionaries holding the genus, species, aligned sequences of the parent and its children, and the type of every child)
+    '''
+    rng = np.random.default_rng(seed)
+    codonTotal = seq_length_ // 3
+    genusCount = max(1, asvs // (8 * family_size_))
+    genera = [[SENSE_CODONS[codon] for codon in rng.integers(len(SENSE_CODONS), size = codonTotal)] for genus in range(genusCount)]
+    families = []
+    asvTotal = 0
+    while asvTotal < asvs:
+        genus = int(rng.integers(genusCount))
+        parentCodons = _mutateCodons(genera[genus], rng, max(1, int(codonTotal * rng.uniform(0.02, 0.06))))
+        # a minority of species miss a codon compared to the rest of their genus
+        if rng.random() < 0.1:
+            parentCodons[rng.integers(codonTotal)] = '---'
+        parent = ''.join(parentCodons)
+        children = []
+        childTypes = []
+        for child in range(min(rng.poisson(family_size_ - 1), asvs - asvTotal - 1)):
+            childType = rng.random()
+            if childType < 0.08:
+                childTypes.append('diverged pseudogene')
+                childSeq = list(''.join(_mutateCodons(parentCodons, rng, max(1, int(codonTotal * rng.uniform(0.06, 0.1))))))
+            else:
+                childTypes.append('stop codon' if childType < 0.16 else 'gap' if childType < 0.24 else 'taxonomy conflict' if childType < 0.32 else 'missing parent' if childType < 0.4 else 'point errors')
+                childSeq = list(parent)
+            if childTypes[-1] in ['stop codon', 'diverged pseudogene']:
+                stopPosition = 3 * int(rng.integers(codonTotal))
+                childSeq[stopPosition:stopPosition + 3] = list(sorted(STOP_CODONS)[rng.integers(len(STOP_CODONS))])
+            elif childTypes[-1] == 'gap':
+                gapPosition = 3 * int(rng.integers(codonTotal))
+                childSeq[gapPosition:gapPosition + 3] = list('---')
+            for position in rng.choice(len(childSeq), size = int(rng.integers(1, 4)), replace = False):
+                if childSeq[position] != '-':
+                    childSeq[position] = 'ACGT'.replace(childSeq[position], '')[rng.integers(3)]
+            children.append(''.join(childSeq))
+        families.append({'genus': genus, 'species': len(families), 'parent': parent, 'children': children, 'childTypes': childTypes})
+        asvTotal += 1 + len(children)
+    return families
+
+def syntheticCounts(families, samples, seed):
+    '''
+    function to generate a sparse count table for the families
+    parents are detected in a random subset of the samples with log-normal read counts,
+    children occur in samples in which their parent is detected, at a small fraction of the reads of the parent,
+    while children without their parent (missing parent, diverged pseudogene) are detected in one to three samples without their parent as well
+    '''
+    rng = np.random.default_rng(seed + 1)
+    counts = []
+    for family in families:
+        parentCounts = np.where(rng.random(samples) < rng.uniform(0.05, 0.5), np.rint(rng.lognormal(5, 1.5, samples)) + 1, 0).astype(np.int64)
+        if parentCounts.sum() == 0:
+            parentCounts[rng.integers(samples)] = int(rng.lognormal(5, 1.5)) + 1
+        counts.append(parentCounts)
+        for child, childType in zip(family['children'], family['childTypes']):
+            childCounts = rng.binomial(parentCounts, rng.uniform(0.001, 0.05))
+            if childCounts.sum() == 0:
+                childCounts[np.flatnonzero(parentCounts)[0]] = 1
+            parentAbsent = np.flatnonzero(parentCounts == 0)
+            if childType in ['missing parent', 'diverged pseudogene'] and len(parentAbsent) > 0:
+                childCounts[rng.choice(parentAbsent, size = min(len(parentAbsent), int(rng.integers(1, 4))), replace = False)] = rng.integers(1, 20)
+            counts.append(childCounts)
+    return np.array(counts)
+
+def writeSyntheticDataset(outputDir, asvs, samples, seed, family_size_ = 4):
+    '''
+    function to write a synthetic data set: count table, sequences, Nexus alignment, and BLAST, SINTAX, IDTAXA, and BOLD taxonomy files
+    '''
+    families = syntheticFamilies(asvs, seed, family_size_)
+    counts = syntheticCounts(families, samples, seed)
+    rng = np.random.default_rng(seed + 2)
+    records = []
+    for family in families:
+        for alignedSeq, childType in zip([family["parent"]] + family["children"], [None] + family["childTypes"]):
+            errors = sum(base != parentBase for base, parentBase in zip(alignedSeq, family['parent']))
+            records.append((alignedSeq, family, errors, childType))
+    # sequences are stored in random order, as the count table is sorted by tombRaider
+    order = rng.permutation(len(records))
+    asvIDs = {position: f'ASV{rank + 1}' for rank, position in enumerate(order)}
+    os.makedirs(outputDir, exist_ok = True)
+    sampleNames = [f'sample{sample + 1}' for sample in range(samples)]
+    with open(os.path.join(outputDir, 'countTable.txt'), 'w') as countFile:
+        countFile.write('#OTU ID\t' + '\t'.join(sampleNames) + '\n')
+        for position in order:
+            countFile.write(f'{asvIDs[position]}\t' + '\t'.join(str(count) for count in counts[position]) + '\n')
+    with open(os.path.join(outputDir, 'sequences.fasta'), 'w') as seqFile:
+        for position in order:
+            seqFile.write(f'>{asvIDs[position]}\n{records[position][0].replace("-", "")}\n')
+    alignmentLength = len(records[0][0])
+    with open(os.path.join(outputDir, 'alignment.nex'), 'w') as alignmentFile:
+        alignmentFile.write(f'#NEXUS\nBEGIN DATA;\n  DIMENSIONS NTAX={len(records)} NCHAR={alignmentLength};\n  FORMAT DATATYPE=DNA MISSING=? GAP=- INTERLEAVE=NO;\n  MATRIX\n')
+        for position in order:
+            alignmentFile.write(f'    {asvIDs[position]:<12}{records[position][0]}\n')
+        alignmentFile.write('  ;\nEND;\n')
+    taxonomyFiles = {taxonomyFormat: open(os.path.join(outputDir, fileName), 'w') for taxonomyFormat, fileName in TAXONOMY_FILES.items()}
+    taxonomyFiles['bold'].write('Query ID\tBest ID\tSearch DB\n')
+    for position in order:
+        alignedSeq, family, errors, childType = records[position]
+        asvID = asvIDs[position]
+        genusName = f'Genus{family["genus"] + 1}'
+        # children with a taxonomy conflict are assigned to a congeneric species rather than the species of their parent,
+        # while diverged pseudogenes are assigned to a species of their own
+        species, sisterSpecies = family['species'], family['species'] + 1
+        if childType == 'taxonomy conflict':
+            species, sisterSpecies = sisterSpecies, species
+        elif childType == 'diverged pseudogene':
+            species, sisterSpecies = len(families) + position, species
+        speciesName = f'{genusName} species{species + 1}'
+        seqLength = len(alignedSeq.replace('-', ''))
+        pident = 100 * (1 - errors / seqLength)
+        # BLAST hits against the species and a congeneric species, ordered by decreasing identity
+        blastHits = [(f'REF{species + 1}', speciesName, 100000 + species, pident, errors), (f'REF{sisterSpecies + 1}', f'{genusName} species{sisterSpecies + 1}', 100000 + sisterSpecies, pident - rng.uniform(3, 8), errors + int(seqLength * 0.05))]
+        for accession, hitName, taxID, hitPident, mismatches in blastHits:
+            taxonomyFiles['blast'].write(f'{asvID}\t{accession}\t{hitName}\t{taxID}\t{seqLength}\t{hitPident:.3f}\t{mismatches}\t100\t{10 ** -(seqLength / 2):.2e}\t{2 * seqLength - 5 * mismatches}\t1\t{seqLength}\t1\t{seqLength}\t0\n')
+        confidence = rng.uniform(0.6, 1.0)
+        lineage = f'd:Eukaryota(1.00),p:Chordata(1.00),c:Actinopteri(1.00),o:Perciformes(1.00),f:Family{family["genus"] // 5 + 1}(1.00),g:{genusName}(1.00),s:{speciesName.replace(" ", "_")}({confidence:.2f})'
+        taxonomyFiles['sintax'].write(f'{asvID}\t{lineage}\t+\td:Eukaryota,p:Chordata,c:Actinopteri,o:Perciformes,f:Family{family["genus"] // 5 + 1},g:{genusName},s:{speciesName.replace(" ", "_")}\n')
+        taxonomyFiles['idtaxa'].write(f'{asvID}\tRoot (100%); Eukaryota (100%); Chordata (100%); Actinopteri (100%); Perciformes (100%); Family{family["genus"] // 5 + 1} (100%); {genusName} (99.1%); {speciesName.replace(" ", "_")} ({100 * confidence:.1f}%)\n')
+        taxonomyFiles['bold'].write(f'{asvID}\t{speciesName}\tCOI FULL DATABASE (includes records without species designation)\t{pident:.2f}\t{pident - 2:.2f}\n')
+    for taxonomyFile in taxonomyFiles.values():
+        taxonomyFile.close()
+    return {'asvs': len(records), 'samples': samples, 'families': len(families)}
+
+##################
+# BENCHMARK RUNS #
+##################
+def criteriaCombinations(criteria_):
+    '''
+    function to return the criteria combinations to benchmark, all combinations of the four criteria when criteria_ is 'all'
+    '''
+    if criteria_ == 'all':
+        return [combination for size in range(1, len(CRITERIA_ORDER) + 1) for combination in itertools.combinations(CRITERIA_ORDER, size)]
+    return [tuple(criterion for criterion in CRITERIA_ORDER if criterion.lower() in [item.lower() for item in combination.split(';')]) for combination in criteria_.split(',')]
+
+def benchmarkRuns(combinations, modes, taxonomyFormats):
+    '''
+    function to list the benchmark runs (criteria, alignment mode, taxonomy format)
+    the alignment mode only applies to 'seqSim' and the taxonomy format only to 'taxID', other combinations are run once
+    '''
+    runs = []
+    for combination in combinations:
+        for mode in (modes if 'seqSim' in combination else [None]):
+            for taxonomyFormat in (taxonomyFormats if 'taxID' in combination else [None]):
+                runs.append({'criteria': ';'.join(combination), 'mode': mode, 'taxonomy format': taxonomyFormat})
+    return runs
+
+def runArguments(run, datasetDir, outputPrefix, threads_):
+    '''
+    function to build the tombRaider command line arguments of a benchmark run
+    '''
+    criteria = run['criteria'].split(';')
+    arguments = ['--criteria', run['criteria'], '--frequency-input', os.path.join(datasetDir, 'countTable.txt'), '--sequence-input', os.path.join(datasetDir, 'sequences.fasta'), '--sort', 'total read count', '--threads', str(threads_)]
+    if 'taxID' in criteria:
+        arguments += ['--taxonomy-input', os.path.join(datasetDir, TAXONOMY_FILES[run['taxonomy format']])]
+        if run['taxonomy format'] == 'blast':
+            arguments += ['--blast-format', BLAST_FORMAT]
+    if 'seqSim' in criteria:
+        arguments += ['--similarity', '97']
+        if run['mode'] == 'alignment':
+            arguments += ['--alignment-input', os.path.join(datasetDir, 'alignment.nex')]
+        else:
+            arguments += ['--pairwise-alignment', run['mode']]
+            if 'pseudogene' in criteria:
+                arguments += ['--calculate-pairwise']
+    if 'coOccur' in criteria:
+        arguments += ['--occurrence-type', 'abundance', '--occurrence-ratio', 'count;0']
+    if 'pseudogene' in criteria:
+        if '--alignment-input' not in arguments:
+            arguments += ['--alignment-input', os.path.join(datasetDir, 'alignment.nex')]
+        arguments += ['--orf', '1']
+    arguments += ['--frequency-output', f'{outputPrefix}.countTable.txt', '--sequence-output', f'{outputPrefix}.sequences.fasta', '--log', f'{outputPrefix}.log', '--profile']
+    return arguments
+
+def runKey(dataset, run):
+    '''
+    function to return the key of a benchmark run in the reference file
+    '''
+    return f'{dataset}|{run["criteria"]}|{run["mode"] or "-"}|{run["taxonomy format"] or "-"}'
+
+def outputDigest(outputPrefix):
+    '''
+    function to calculate the digest of the artefact outputs (updated count table and sequences) of a benchmark run
+    '''
+    digest = hashlib.sha256()
+    for outputFile in [f'{outputPrefix}.countTable.txt', f'{outputPrefix}.sequences.fasta']:
+        with open(outputFile, 'rb') as infile:
+            digest.update(infile.read())
+    return digest.hexdigest()
+
+def runBenchmark(run, dataset, datasetDir, workDir, threads_):
+    '''
+    function to run tombRaider in a separate process, returning the wall time, stage timings, throughput, peak memory, and output digest
+    '''
+    outputPrefix = os.path.join(workDir, f'{dataset}.{run["criteria"].replace(";", "_")}.{run["mode"] or "-"}.{run["taxonomy format"] or "-"}')
+    arguments = runArguments(run, datasetDir, outputPrefix, threads_)
+    startTime = time.perf_counter()
+    process = subprocess.run([sys.executable, TOMBRAIDER_SCRIPT] + arguments, capture_output = True, text = True, env = {**os.environ, 'PYTHONHASHSEED': '0'})
+    seconds = time.perf_counter() - startTime
+    result = {'dataset': dataset, **run, 'seconds': seconds}
+    if process.returncode != 0 or not os.path.exists(f'{outputPrefix}.profile.json'):
+        result['error'] = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f'exit code {process.returncode}'
+        return result
+    with open(f'{outputPrefix}.profile.json', 'r') as profileFile:
+        profile = json.load(profileFile)
+    identifySeconds = profile['stages'].get('identifying artefacts', {}).get('seconds', 0.0)
+    result.update({
+        'identify seconds': identifySeconds,
+        'stages': {stageName: stage['seconds'] for stageName, stage in profile['stages'].items()},
+        'total seqs': profile['counters']['total seqs'],
+        'candidate pairs': profile['counters']['candidate pairs'],
+        'total combinations': profile['counters']['total combinations'],
+        'artefacts': profile['counters']['artefacts'],
+        'pseudogenes': profile['counters']['pseudogenes'],
+        'pairs per second': profile['counters']['candidate pairs'] / identifySeconds if identifySeconds > 0 else None,
+        'seqs per second': profile['counters']['total seqs'] / seconds,
+        'peak memory (MB)': profile['peak memory (MB)'],
+        'output digest': outputDigest(outputPrefix),
+    })
+    return result
+
+def checkReference(results, reference):
+    '''
+    function to compare the output digest of every run with the stored reference, returns the keys of runs that do not match
+    '''
+    mismatches = []
+    for result in results:
+        key = runKey(result['dataset'], result)
+        if 'output digest' not in result:
+            result['reference'] = 'error'
+            mismatches.append(key)
+        elif key not in reference:
+            result['reference'] = 'missing'
+        elif reference[key] == result['output digest']:
+            result['reference'] = 'match'
+        else:
+            result['reference'] = 'mismatch'
+            mismatches.append(key)
+    return mismatches
+
+###########################
+# COMMAND LINE INTERFACES #
+###########################
+@click.group(context_settings=dict(help_option_names=["-h", "--help"]))
+def benchmark():
+    '''
+    generate synthetic data sets and benchmark tombRaider across criteria combinations
+    '''
+
+@benchmark.command()
+@click.option("--output-dir", "output_dir_", required = True, help = "directory to write the synthetic data set to")
+@click.option("--asvs", "asvs_", type = int, default = 1000, help = "number of ASVs (default: 1000)")
+@click.option("--samples", "samples_", type = int, default = 50, help = "number of samples (default: 50)")
+@click.option("--family-size", "family_size_", type = int, default = 4, help = "average number of ASVs per parent/child family (default: 4)")
+@click.option("--seed", "seed_", type = int, default = 1, help = "seed of the random number generator (default: 1)")
+def generate(output_dir_, asvs_, samples_, family_size_, seed_):
+    '''
+    write a synthetic data set with parent/child families, a sparse count table, taxonomy files, and a Nexus alignment
+    '''
+    console = rich.console.Console(stderr=True, highlight=False)
+    summary = writeSyntheticDataset(output_dir_, asvs_, samples_, seed_, family_size_)
+    console.print(f"[cyan]|   Synthetic Dataset[/] | [bold yellow]{summary['asvs']} ASVs in {summary['families']} families over {summary['samples']} samples written to {output_dir_}[/]")
+
+@benchmark.command()
+@click.option("--asvs", "asvs_", default = '300', help = "comma-separated list of data set sizes in ASVs (default: 300)")
+@click.option("--samples", "samples_", type = int, default = 40, help = "number of samples (default: 40)")
+@click.option("--seed", "seed_", type = int, default = 1, help = "seed of the random number generator (default: 1)")
+@click.option("--criteria", "criteria_", default = 'all', help = "comma-separated list of criteria combinations, e.g., 'taxID;seqSim,coOccur' (default: all combinations)")
+@click.option("--modes", "modes_", default = 'alignment,global', help = "comma-separated list of sequence similarity modes: 'alignment', 'global', 'local' (default: 'alignment,global')")
+@click.option("--taxonomy-formats", "taxonomy_formats_", default = 'blast', help = "comma-separated list of taxonomy files used for taxID: 'blast', 'sintax', 'idtaxa', 'bold' (default: 'blast')")
+@click.option("--threads", "threads_", type = int, default = 1, help = "number of worker processes used by tombRaider (default: 1)")
+@click.option("--results", "results_", default = 'benchmarkResults.json', help = "JSON output file of the benchmark results (default: benchmarkResults.json)")
+@click.option("--work-dir", "work_dir_", help = "directory to keep the data sets and outputs, a temporary directory is used and removed when not specified")
+@click.option("--update-reference", "update_reference_", is_flag = True, help = "store the outputs of this benchmark as the reference")
+def run(asvs_, samples_, seed_, criteria_, modes_, taxonomy_formats_, threads_, results_, work_dir_, update_reference_):
+    '''
+    time tombRaider for every criteria combination and alignment mode on synthetic data sets and compare the outputs to the stored reference
+    '''
+    console = rich.console.Console(stderr=True, highlight=False)
+    modes = modes_.split(',')
+    taxonomyFormats = taxonomy_formats_.split(',')
+    if any(mode not in MODES for mode in modes) or any(taxonomyFormat not in TAXONOMY_FILES for taxonomyFormat in taxonomyFormats):
+        console.print(f"[cyan]|               ERROR[/] | [bold yellow]'--modes' should be one of {', '.join(MODES)} and '--taxonomy-formats' one of {', '.join(TAXONOMY_FILES)}, aborting benchmark...[/]\n")
+        exit()
+    runs = benchmarkRuns(criteriaCombinations(criteria_), modes, taxonomyFormats)
+    workDir = work_dir_ if work_dir_ else tempfile.mkdtemp(prefix = 'tombRaiderBenchmark')
+    os.makedirs(workDir, exist_ok = True)
+    results = []
+    try:
+        for asvs in [int(asvs) for asvs in asvs_.split(',')]:
+            dataset = datasetName(asvs, samples_, seed_)
+            datasetDir = os.path.join(workDir, dataset)
+            summary = writeSyntheticDataset(datasetDir, asvs, samples_, seed_)
+            console.print(f"[cyan]|   Synthetic Dataset[/] | [bold yellow]{dataset} ({summary['asvs']} ASVs in {summary['families']} families)[/]")
+            for benchmarkRun in runs:
+                result = runBenchmark(benchmarkRun, dataset, datasetDir, workDir, threads_)
+                results.append(result)
+                runDetails = ', '.join(detail for detail in [benchmarkRun['mode'], benchmarkRun['taxonomy format']] if detail)
+                description = f"{benchmarkRun['criteria']}{f' ({runDetails})' if runDetails else ''}"
+                if 'error' in result:
+                    console.print(f"[cyan]|       Benchmark Run[/] | [bold yellow]{description}: failed ({rich.markup.escape(result['error'])})[/]")
+                else:
+                    console.print(f"[cyan]|       Benchmark Run[/] | [bold yellow]{description}: {result['seconds']:.2f} s, {result['candidate pairs']} pairs, {result['artefacts']} artefacts, {result['peak memory (MB)']:.0f} MB[/]")
+    finally:
+        if not work_dir_:
+            shutil.rmtree(workDir, ignore_errors = True)
+    reference = {}
+    if os.path.exists(REFERENCE_FILE):
+        with open(REFERENCE_FILE, 'r') as referenceFile:
+            reference = json.load(referenceFile)
+    if update_reference_:
+        reference.update({runKey(result['dataset'], result): result['output digest'] for result in results if 'output digest' in result})
+        with open(REFERENCE_FILE, 'w') as referenceFile:
+            json.dump(dict(sorted(reference.items())), referenceFile, indent = 2)
+            referenceFile.write('\n')
+    mismatches = checkReference(results, reference)
+    with open(results_, 'w') as resultsFile:
+        json.dump({
+            'tombRaider version': __version__,
+            'date-time': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'threads': threads_,
+            'runs': results,
+        }, resultsFile, indent = 2)
+        resultsFile.write('\n')
+    console.print(f"[cyan]|   Benchmark Results[/] | [bold yellow]{len(results)} runs written to {results_}[/]")
+    if mismatches:
+        console.print(f"[cyan]|               ERROR[/] | [bold yellow]outputs differ from the reference ({', '.join(mismatches)})[/]\n")
+        sys.exit(1)
+    console.print(f"[cyan]|           Reference[/] | [bold yellow]{sum(result['reference'] == 'match' for result in results)} runs match, {sum(result['reference'] == 'missing' for result in results)} runs without reference[/]")
+
+if __name__ == "__main__":
+    benchmark()
@@ -3,14 +3,40 @@
 ##################
 # IMPORT MODULES #
 ##################
+import bisect
 import collections
+import concurrent.futures
+import contextlib
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import math
+import multiprocessing
 import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import traceback
 import numpy as np
 import pandas as pd
+try:
+    import resource
+except ImportError:
+    resource = None
 
 ########################
 # tombRaider FUNCTIONS #
 ########################
+class TombRaiderError(Exception):
+    '''
+    error raised when the parameters or input data abort the analysis, the tombRaider command prints its message and exits
+    '''
+
 def checkTaxonomyFiles(taxonomy_input_, blast_input_, bold_input_, sintax_input_, idtaxa_input_):
     taxonomy_file_type_mapping = {
     'taxonomy' : taxonomy_input_,
@@ -29,70 +55,242 @@ def checkTaxonomyFiles(taxonomy_input_, blast_input_, bold_input_, sintax_input_
             taxonomyFileType = 'too-many-tax-files'
     return taxonomyInputFile, taxonomyFileType
 
+def inputCompression(inputFile):
+    '''
+    identify the compression of an input file from its magic bytes, returns 'gzip', 'zstd' or None
+    '''
+    with open(inputFile, 'rb') as rawFile:
+        magicBytes = rawFile.read(4)
+    if magicBytes.startswith(b'\x1f\x8b'):
+        return 'gzip'
+    if magicBytes == b'\x28\xb5\x2f\xfd':
+        return 'zstd'
+    return None
+
+def _importZstd():
+    '''
+    import a zstd implementation, the compression.zstd module of the standard library (Python 3.14+) or the optional zstandard package
+    '''
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError("reading or writing zstd-compressed files requires Python 3.14+ or the 'zstandard' package (pip install zstandard)")
+
+def _decompressingReader(rawFile, compression):
+    '''
+    wrap a binary file handle in a reader decompressing gzip or zstd input, the handle itself is returned for uncompressed input
+    '''
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj = rawFile)
+    if compression == 'zstd':
+        zstd = _importZstd()
+        if zstd.__name__ == 'zstandard':
+            return zstd.ZstdDecompressor().stream_reader(rawFile, read_across_frames = True)
+        return zstd.ZstdFile(rawFile)
+    return rawFile
+
+def inputChunks(inputFile, pbar = None, progress_bar = None, chunk_size_ = 2 ** 22):
+    '''
+    generator reading an uncompressed, gzip- or zstd-compressed input file in chunks of about chunk_size_ bytes that always end on a complete line
+    progress is updated once per chunk with the number of bytes read from disk, so that it matches os.path.getsize() for compressed files as well
+    '''
+    compression = inputCompression(inputFile)
+    with open(inputFile, 'rb') as rawFile:
+        reader = _decompressingReader(rawFile, compression)
+        progressPosition = 0
+        remainder = b''
+        while True:
+            chunk = reader.read(chunk_size_)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            lastNewline = chunk.rfind(b'\n') + 1
+            remainder = chunk[lastNewline:]
+            if progress_bar is not None:
+                progress_bar.update(pbar, advance = rawFile.tell() - progressPosition)
+                progressPosition = rawFile.tell()
+            if lastNewline > 0:
+                yield chunk[:lastNewline]
+        if remainder:
+            yield remainder
+
+def inputLines(inputFile, pbar = None, progress_bar = None, text = False, chunk_size_ = 2 ** 22):
+    '''
+    generator returning the lines of an uncompressed, gzip- or zstd-compressed input file, read through inputChunks
+    text lines are decoded with universal newlines, as open(inputFile, 'r') does, binary lines are returned as they are
+    '''
+    for chunk in inputChunks(inputFile, pbar, progress_bar, chunk_size_):
+        if text:
+            yield from io.StringIO(chunk.decode(), newline = None)
+        else:
+            yield from io.BytesIO(chunk)
+
+def _outputBlocks(pieces, block_size_):
+    '''
+    generator joining an iterable of bytes into blocks of at least block_size_ bytes, so that output is written and compressed in bulk
+    '''
+    block = []
+    blockSize = 0
+    for piece in pieces:
+        block.append(piece)
+        blockSize += len(piece)
+        if blockSize >= block_size_:
+            yield b''.join(block)
+            block = []
+            blockSize = 0
+    if block:
+        yield b''.join(block)
+
+def writeOutputFile(outputFile, pieces, threads_ = 1, block_size_ = 2 ** 22):
+    '''
+    function to write an iterable of bytes to outputFile in blocks of block_size_ bytes
+    output file names ending in '.gz' are written as a series of gzip members (a valid gzip file) compressed on threads_ threads,
+    names ending in '.zst' are compressed with zstd using threads_ threads, all other files are written uncompressed
+    '''
+    blocks = _outputBlocks(pieces, block_size_)
+    with open(outputFile, 'wb') as outfile:
+        if outputFile.endswith('.gz') and threads_ > 1:
+            pendingBlocks = collections.deque()
+            with concurrent.futures.ThreadPoolExecutor(threads_) as executor:
+                for block in blocks:
+                    pendingBlocks.append(executor.submit(gzip.compress, block, 6, mtime = 0))
+                    if len(pendingBlocks) > 2 * threads_:
+                        outfile.write(pendingBlocks.popleft().result())
+                while pendingBlocks:
+                    outfile.write(pendingBlocks.popleft().result())
+        elif outputFile.endswith('.gz'):
+            for block in blocks:
+                outfile.write(gzip.compress(block, 6, mtime = 0))
+        elif outputFile.endswith('.zst'):
+            zstd = _importZstd()
+            if zstd.__name__ == 'zstandard':
+                writer = zstd.ZstdCompressor(threads = threads_ if threads_ > 1 else 0).stream_writer(outfile, closefd = False)
+            else:
+                writer = zstd.ZstdFile(outfile, 'wb', options = {zstd.CompressionParameter.nb_workers: threads_} if threads_ > 1 else None)
+            with writer:
+                for block in blocks:
+                    writer.write(block)
+        else:
+            for block in blocks:
+                outfile.write(block)
+
+def checkOutputCompression(outputFiles, console):
+    '''
+    function to check that zstd compression is available before the analysis starts when any output file name ends in '.zst'
+    '''
+    if any(outputFile is not None and outputFile.endswith('.zst') for outputFile in outputFiles):
+        try:
+            _importZstd()
+        except ImportError as i:
+            raise TombRaiderError(str(i)) from None
+
+def frequencyTableBlocks(frequencyTable, rows_per_block_ = 10000):
+    '''
+    generator returning the tab-separated frequency table as bytes in blocks of rows_per_block_ rows, the header is part of the first block
+    '''
+    for rowStart in range(0, max(len(frequencyTable), 1), rows_per_block_):
+        yield frequencyTable.iloc[rowStart:rowStart + rows_per_block_].to_csv(sep = '\t', header = rowStart == 0).encode()
+
 def freqToMemory(frequency_input_, pbar, progress_bar, console, transpose_, omit_rows_, omit_columns_, sort_):
     '''
-    Function parsing the frequency table input file into a dictionary
+    Function parsing the frequency table input file into a compact DataFrame
+    Integer tables are read in chunks and, after transposing and omitting rows and columns, stored in the narrowest integer type
+    that fits every sample (column) total, as merging artefacts adds read counts within a sample
+    gzip- and zstd-compressed tables are decompressed while reading, progress is updated per chunk
     '''
-    frequencyTable = pd.read_csv(frequency_input_, sep='\t', index_col=0)
-    progress_bar.update(pbar, advance=os.path.getsize(frequency_input_))
+    frequencyChunks = []
+    progressPosition = 0
+    with open(frequency_input_, 'rb') as rawFile:
+        for frequencyChunk in pd.read_csv(_decompressingReader(rawFile, inputCompression(frequency_input_)), sep='\t', index_col=0, chunksize = 10000):
+            if all(pd.api.types.is_integer_dtype(dtype) for dtype in frequencyChunk.dtypes) and frequencyChunk.size > 0:
+                frequencyChunk = frequencyChunk.astype(_narrowestIntegerDtype(frequencyChunk.min().min(), frequencyChunk.max().max()))
+            frequencyChunks.append(frequencyChunk)
+            progress_bar.update(pbar, advance = rawFile.tell() - progressPosition)
+            progressPosition = rawFile.tell()
+    frequencyTable = pd.concat(frequencyChunks)
+    del frequencyChunks
+    progress_bar.update(pbar, advance = os.path.getsize(frequency_input_) - progressPosition)
     if omit_rows_ != None:
         rowList = omit_rows_.split(',')
         try:
             frequencyTable = frequencyTable.drop(rowList)
         except KeyError as k:
-            console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]{k}, aborting analysis...[/]\n")
-            exit()
+            raise TombRaiderError(str(k)) from None
     if omit_columns_ != None:
         colList = omit_columns_.split(',')
         try:
             frequencyTable = frequencyTable.drop(colList, axis = 1)
         except KeyError as k:
-            console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]{k}, aborting analysis...[/]\n")
-            exit()
+            raise TombRaiderError(str(k)) from None
     if transpose_:
         frequencyTable = frequencyTable.transpose()
+    if all(pd.api.types.is_integer_dtype(dtype) for dtype in frequencyTable.dtypes) and frequencyTable.size > 0:
+        columnTotals = frequencyTable.to_numpy().sum(axis = 0, dtype = np.int64)
+        frequencyTable = frequencyTable.astype(_narrowestIntegerDtype(min(frequencyTable.min().min(), columnTotals.min()), columnTotals.max()))
+    frequencyTable = sortFrequencyTable(frequencyTable, sort_, console)
+    return frequencyTable, pbar, progress_bar
+
+def sortFrequencyTable(frequencyTable, sort_, console):
+    '''
+    function to sort the sequences of the frequency table by decreasing abundance, the original order is kept when sort_ is None
+    ties are broken by sequence ID, so that tied sequences keep the same order when sequences are added to the table
+    '''
     sortOptions = {
-        'total read count': frequencyTable.sum(axis = 1),
+        'total read count': frequencyTable.sum(axis = 1).astype(np.int64 if frequencyTable.select_dtypes('float').empty else np.float64),
         'average read count': frequencyTable.mean(axis = 1),
-        'detections': (frequencyTable > 0).sum(axis = 1)
+        'detections': (frequencyTable > 0).sum(axis = 1).astype(np.int64)
     }
     if sort_ in sortOptions:
-        frequencyTable = frequencyTable.loc[sortOptions[sort_].sort_values(ascending = False).index]
-    elif sort_ == None:
-        sort_ = 'None'
-    else:
-        console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]option for '--sort' not identified, aborting analysis...[/]\n")
-        exit()
-    return frequencyTable, pbar, progress_bar
+        sortKeys = pd.DataFrame({'abundance' : sortOptions[sort_].to_numpy(), 'sequenceID' : frequencyTable.index.astype(str)})
+        frequencyTable = frequencyTable.iloc[sortKeys.sort_values(['abundance', 'sequenceID'], ascending = [False, True], kind = 'stable').index.to_numpy()]
+    elif sort_ != None:
+        raise TombRaiderError("option for '--sort' not identified")
+    return frequencyTable
+
+def _narrowestIntegerDtype(minValue, maxValue):
+    '''
+    return the smallest NumPy integer type holding all values between minValue and maxValue
+    '''
+    integerTypes = [np.uint8, np.uint16, np.uint32, np.uint64] if minValue >= 0 else [np.int8, np.int16, np.int32, np.int64]
+    for integerType in integerTypes:
+        if np.iinfo(integerType).min <= minValue and maxValue <= np.iinfo(integerType).max:
+            return integerType
+    return np.int64
 
 def zotuToMemory(sequence_input_, frequencyTable, pbar, progress_bar):
     '''
     Function parsing the ZOTU sequence input file into a dictionary
+    Sequence lines are collected and joined once per record, so that multi-line sequences are parsed in linear time
     '''
     seqInputDict = {}
     count = 0
     seqName = ''
-    sequence = ''
-    with open(sequence_input_, 'r') as seqFile:
-        for line in seqFile:
-            progress_bar.update(pbar, advance=len(line))
-            line = line.rstrip('\n')
-            count += 1
-            if line.startswith('>'):
-                if count > 1:
-                    seqInputDict[seqName] = sequence
-                    seqName = ''
-                    sequence = ''
-                seqName = line.lstrip('>')
-            else:
-                sequence += line
-    seqInputDict[seqName] = sequence
+    sequenceLines = []
+    for line in inputLines(sequence_input_, pbar, progress_bar, text = True):
+        line = line.rstrip('\n')
+        count += 1
+        if line.startswith('>'):
+            if count > 1:
+                seqInputDict[seqName] = ''.join(sequenceLines)
+                seqName = ''
+                sequenceLines = []
+            seqName = line.lstrip('>')
+        else:
+            sequenceLines.append(line)
+    seqInputDict[seqName] = ''.join(sequenceLines)
     return seqInputDict, pbar, progress_bar
 
 def blastToMemory(taxonomyInputFile, blast_format_, use_accession_id_, seqInputDict, pbar, progress_bar, console):
     '''
-    Function parsing the BLAST taxonomy file
+    Function parsing the BLAST taxonomy file in a single pass, reading gzip- and zstd-compressed files directly
     For now it only takes in the specific outfmt "6" structure
+    Raw lines are stored as byte ranges (see taxonomyToOutput) rather than strings
     '''
     taxonomyForMissingSeqs = []
     if use_accession_id_:
@@ -119,41 +317,53 @@ def blastToMemory(taxonomyInputFile, blast_format_, use_accession_id_, seqInputD
         }
     blastFormattingList = blast_format_.split(' ')
     if blastFormattingList[0] != '6':
-        console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]blast format identified as '{blastFormattingList[0]}', only format '6' is supported, aborting analysis...[/]\n")
-        exit()
+        raise TombRaiderError(f"blast format identified as '{blastFormattingList[0]}', only format '6' is supported")
     for item in neededBlastInfo:
         if item in blastFormattingList:
             neededBlastInfo[item] = blastFormattingList.index(item) - 1
         else:
-            console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]'{item}' not found in BLAST input file, aborting analysis...[/]\n")
-            exit()
+            raise TombRaiderError(f"'{item}' not found in BLAST input file")
+    fieldIndex = {item: neededBlastInfo[item] for item in ['qaccver', 'qcovs', 'pident', 'length', 'mismatch', 'gapopen']}
+    fieldIndex['taxid'] = neededBlastInfo['saccver'] if use_accession_id_ else neededBlastInfo['staxid']
     taxIdInputDict = collections.defaultdict(list)
     taxPidentInputDict = collections.defaultdict(list)
     rawTaxDict = collections.defaultdict(list)
-    taxEvalInputDict = collections.defaultdict(list)
-    with open(taxonomyInputFile, 'r') as taxFile:
-        for line in taxFile:
-            progress_bar.update(pbar, advance=len(line))
-            line = line.rstrip('\n')
-            seqName = line.split('\t')[neededBlastInfo['qaccver']]
-            taxQcov = int(line.split('\t')[neededBlastInfo['qcovs']])
+    taxIdSets = collections.defaultdict(set)
+    taxPident = 0.0
+    compressedInput = inputCompression(taxonomyInputFile) is not None
+    rawSource = tempfile.TemporaryFile() if compressedInput else taxonomyInputFile
+    lineStart = 0
+    for chunk in inputChunks(taxonomyInputFile, pbar, progress_bar):
+        if compressedInput:
+            rawSource.write(chunk)
+        for line in io.BytesIO(chunk):
+            lineEnd = lineStart + len(line)
+            fields = line.rstrip(b'\n').split(b'\t')
+            seqName = fields[fieldIndex['qaccver']].decode()
+            taxQcov = int(fields[fieldIndex['qcovs']])
             if taxQcov == 100:
-                taxPident = float(line.split('\t')[neededBlastInfo['pident']])
+                taxPident = float(fields[fieldIndex['pident']])
             else:
                 try:
-                    taxPident = float(100 * ((int(line.split('\t')[neededBlastInfo['length']]) - int(line.split('\t')[neededBlastInfo['mismatch']]) - int(line.split('\t')[neededBlastInfo['gapopen']])) / len(seqInputDict[seqName])))
+                    taxPident = float(100 * ((int(fields[fieldIndex['length']]) - int(fields[fieldIndex['mismatch']]) - int(fields[fieldIndex['gapopen']])) / len(seqInputDict[seqName])))
                 except KeyError:
                     taxonomyForMissingSeqs.append(seqName)
-            if use_accession_id_:
-                taxID = line.split('\t')[neededBlastInfo['saccver']]
+            taxID = fields[fieldIndex['taxid']].decode()
+            # raw lines are kept as byte ranges of the input, merging consecutive lines of the same query
+            rawRanges = rawTaxDict[seqName]
+            if rawRanges and rawRanges[-1][2] == lineStart:
+                rawRanges[-1] = (rawSource, rawRanges[-1][1], lineEnd)
             else:
-                taxID = line.split('\t')[neededBlastInfo['staxid']]
-            evalNumber = float(line.split('\t')[neededBlastInfo['evalue']])
-            rawTaxDict[seqName].append(line)
-            if all(taxPident >= item for item in taxPidentInputDict[seqName]) and taxID not in taxIdInputDict[seqName]:
+                rawRanges.append((rawSource, lineStart, lineEnd))
+            lineStart = lineEnd
+            # taxPidentInputDict values only grow, so comparing against the last value equals comparing against all values
+            taxPidents = taxPidentInputDict[seqName]
+            if (not taxPidents or taxPident >= taxPidents[-1]) and taxID not in taxIdSets[seqName]:
                 taxIdInputDict[seqName].append(taxID)
-                taxPidentInputDict[seqName].append(taxPident)
-                taxEvalInputDict[seqName].append(evalNumber)
+                taxIdSets[seqName].add(taxID)
+                taxPidents.append(taxPident)
+    if compressedInput:
+        rawSource.flush()
     return taxIdInputDict, taxPidentInputDict, rawTaxDict, taxonomyForMissingSeqs, pbar, progress_bar
 
 def boldToMemory(taxonomyInputFile, bold_format_, pbar, progress_bar, console):
@@ -165,38 +375,34 @@ def boldToMemory(taxonomyInputFile, bold_format_, pbar, progress_bar, console):
     taxPidentInputDict = collections.defaultdict(list)
     rawTaxDict = collections.defaultdict(list)
     if bold_format_ == 'summary':
-        with open(taxonomyInputFile, 'r') as taxFile:
-            for line in taxFile:
-                progress_bar.update(pbar, advance = len(line))
-                seqName = line.split('\t')[0]
-                taxID = line.split('\t')[1]
-                try:
-                    taxPident = float(line.split('\t')[3])
-                except IndexError:
-                    taxPident = 0.0
+        for line in inputLines(taxonomyInputFile, pbar, progress_bar, text = True):
+            seqName = line.split('\t')[0]
+            taxID = line.split('\t')[1]
+            try:
+                taxPident = float(line.split('\t')[3])
+            except IndexError:
+                taxPident = 0.0
+            taxIdInputDict[seqName].append(taxID)
+            taxPidentInputDict[seqName].append(taxPident)
+            rawTaxDict[seqName].append(line)
+    elif bold_format_ == 'complete':
+        taxFile = inputLines(taxonomyInputFile, pbar, progress_bar, text = True)
+        next(taxFile)
+        for line in taxFile:
+            if line.split('\t')[0] != '':
+                seqName = line.split('\t')[0].lstrip('>')
+            try:
+                taxPident = float(line.split('\t')[8])
+                taxID = ','.join(line.split('\t')[1:8])
+            except ValueError:
+                taxPident = 0.0
+                taxID = 'not assigned'
+            rawTaxDict[seqName].append(line)
+            if all(taxPident >= item for item in taxPidentInputDict[seqName]) and taxID not in taxIdInputDict[seqName]:
                 taxIdInputDict[seqName].append(taxID)
                 taxPidentInputDict[seqName].append(taxPident)
-                rawTaxDict[seqName].append(line)
-    elif bold_format_ == 'complete':
-        with open(taxonomyInputFile, 'r') as taxFile:
-            next(taxFile)
-            for line in taxFile:
-                progress_bar.update(pbar, advance = len(line))
-                if line.split('\t')[0] != '':
-                    seqName = line.split('\t')[0].lstrip('>')
-                try:
-                    taxPident = float(line.split('\t')[8])
-                    taxID = ','.join(line.split('\t')[1:8])
-                except ValueError:
-                    taxPident = 0.0
-                    taxID = 'not assigned'
-                rawTaxDict[seqName].append(line)
-                if all(taxPident >= item for item in taxPidentInputDict[seqName]) and taxID not in taxIdInputDict[seqName]:
-                    taxIdInputDict[seqName].append(taxID)
-                    taxPidentInputDict[seqName].append(taxPident)
     else:
-        console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]'{bold_format_}' not identified, aborting analysis...[/]\n")
-        exit()
+        raise TombRaiderError(f"'{bold_format_}' not identified")
     return taxIdInputDict, taxPidentInputDict, rawTaxDict, pbar, progress_bar
 
 
@@ -211,15 +417,13 @@ def sintaxToMemory(taxonomyInputFile, sintax_threshold_, pbar, progress_bar):
     thresholdSplit = 1
     if sintax_threshold_:
         thresholdSplit = 3
-    with open(taxonomyInputFile, 'r') as taxFile:
-        for line in taxFile:
-            progress_bar.update(pbar, advance=len(line))
-            seqName = line.split('\t')[0]
-            taxID = line.split('\t')[thresholdSplit].split(',')[-1].split(':')[1].split('(')[0]
-            taxPident = float(line.split('\t')[thresholdSplit].split(',')[-1].split(':')[1].split('(')[1].rstrip(')'))
-            taxIdInputDict[seqName].append(taxID)
-            taxPidentInputDict[seqName].append(taxPident)
-            rawTaxDict[seqName].append(line)
+    for line in inputLines(taxonomyInputFile, pbar, progress_bar, text = True):
+        seqName = line.split('\t')[0]
+        taxID = line.split('\t')[thresholdSplit].split(',')[-1].split(':')[1].split('(')[0]
+        taxPident = float(line.split('\t')[thresholdSplit].split(',')[-1].split(':')[1].split('(')[1].rstrip(')'))
+        taxIdInputDict[seqName].append(taxID)
+        taxPidentInputDict[seqName].append(taxPident)
+        rawTaxDict[seqName].append(line)
     return taxIdInputDict, taxPidentInputDict, rawTaxDict, pbar, progress_bar
 
 def idtaxaToMemory(taxonomyInputFile, pbar, progress_bar):
@@ -229,15 +433,13 @@ def idtaxaToMemory(taxonomyInputFile, pbar, progress_bar):
     taxIdInputDict = collections.defaultdict(list)
     taxPidentInputDict = collections.defaultdict(list)
     rawTaxDict = collections.defaultdict(list)
-    with open(taxonomyInputFile, 'r') as taxFile:
-        for line in taxFile:
-            progress_bar.update(pbar, advance=len(line))
-            seqName = line.split('\t')[0]
-            taxID = line.split('\t')[1].split('; ')[-1].split(' (')[0]
-            taxPident = float(line.split('\t')[1].split('; ')[-1].split(' (')[1].split('%)')[0])
-            taxIdInputDict[seqName].append(taxID)
-            taxPidentInputDict[seqName].append(taxPident)
-            rawTaxDict[seqName].append(line)
+    for line in inputLines(taxonomyInputFile, pbar, progress_bar, text = True):
+        seqName = line.split('\t')[0]
+        taxID = line.split('\t')[1].split('; ')[-1].split(' (')[0]
+        taxPident = float(line.split('\t')[1].split('; ')[-1].split(' (')[1].split('%)')[0])
+        taxIdInputDict[seqName].append(taxID)
+        taxPidentInputDict[seqName].append(taxPident)
+        rawTaxDict[seqName].append(line)
 
     return taxIdInputDict, taxPidentInputDict, rawTaxDict, pbar, progress_bar
 
@@ -246,8 +448,8 @@ def identifyTaxonomyInput(taxonomyInputFile):
     identify the taxonomy file type when "--taxonomy-input" was given as parameter
     '''
     bold_format_ = None
-    with open(taxonomyInputFile, 'r') as infile:
-        firstLine = infile.readline().rstrip('\n')
+    with contextlib.closing(inputLines(taxonomyInputFile, text = True, chunk_size_ = 2 ** 16)) as infile:
+        firstLine = next(infile, '').rstrip('\n')
         if firstLine.startswith('Query ID'):
             taxonomyFileType = 'bold'
             bold_format_ = 'summary'
@@ -277,8 +479,7 @@ def taxonomyToMemory(taxonomyInputFile, taxonomyFileType, blast_format_, use_acc
     elif taxonomyFileType == 'idtaxa':
         taxIdInputDict, taxPidentInputDict, taxTotalDict, pbar, progress_bar = idtaxaToMemory(taxonomyInputFile, pbar, progress_bar)
     else:
-        console.print("[cyan]|               ERROR[/] | [bold yellow]taxonomy input file type not recognised, aborting analysis...[/]\n")
-        exit()
+        raise TombRaiderError("taxonomy input file type not recognised")
 
     return taxIdInputDict, taxPidentInputDict, taxTotalDict, taxonomyFileType, taxonomyForMissingSeqs, pbar, progress_bar
 
@@ -293,31 +494,122 @@ def fillOutTaxonomyFiles(taxIdInputDict, taxPidentInputDict, taxTotalDict, frequ
             taxTotalDict[item].append('not assigned')
     return taxIdInputDict, taxPidentInputDict, taxTotalDict
     
-def alignmentToMemory(alignment_input_, pbar, progress_bar):
+def taxonomyToOutput(taxonomyOutputFile, itemList, taxTotalDict, threads_ = 1):
+    '''
+    function to write the taxonomy lines of all sequences in itemList to the taxonomy output file, compressed when its name ends in '.gz' or '.zst'
+    byte ranges stored by blastToMemory are replayed from the input file (or its decompressed copy)
+    '''
+    writeOutputFile(taxonomyOutputFile, (rawLines for item, rawLines in _taxonomyLines(itemList, taxTotalDict)), threads_)
+
+def _taxonomyLines(itemList, taxTotalDict):
+    '''
+    generator returning (item, taxonomy lines as bytes) for all entries of the sequences in itemList
+    input files are opened and closed here, decompressed copies are kept open, as they are deleted when closed
+    '''
+    sourceHandles = {}
+    try:
+        for item in itemList:
+            for subitem in taxTotalDict[item]:
+                if isinstance(subitem, tuple):
+                    rawSource, lineStart, lineEnd = subitem
+                    if isinstance(rawSource, str):
+                        if rawSource not in sourceHandles:
+                            sourceHandles[rawSource] = open(rawSource, 'rb')
+                        sourceHandle = sourceHandles[rawSource]
+                    else:
+                        sourceHandle = rawSource
+                    sourceHandle.seek(lineStart)
+                    rawLines = sourceHandle.read(lineEnd - lineStart)
+                    yield item, rawLines if rawLines.endswith(b'\n') else rawLines + b'\n'
+                else:
+                    yield item, f'{subitem}\n'.encode()
+    finally:
+        for sourceHandle in sourceHandles.values():
+            sourceHandle.close()
+
+def alignmentToMemory(alignment_input_, frequencyTable, pbar, progress_bar, memmap_threshold_ = 2 ** 28):
     """
-    Parses a Nexus alignment file and returns a dictionary with sequence IDs as keys and sequences as values.
+    Parses a Nexus alignment file (sequential or interleaved) into a uint8 matrix with one row per sequence.
+    Alignments larger than memmap_threshold_ bytes are stored in a memory-mapped temporary file rather than in memory.
+    Rows are kept in file order, scanRows lists the row of every sequence in --frequency-input order (-1 when missing),
+    so that mismatches can be calculated for blocks of consecutive parents.
+    The alignment symbols are collected while filling the rows, so that the (memory-mapped) matrix is not scanned again.
     """
-    sequences = {}
+    segments = {}
     in_matrix = False
-    with open(alignment_input_, 'r') as file:
+    with contextlib.closing(inputLines(alignment_input_, pbar, progress_bar)) as file:
         for line in file:
-            progress_bar.update(pbar, advance=len(line))
             line = line.strip()
-            if line.startswith('MATRIX'):
+            if line.startswith(b'MATRIX'):
                 in_matrix = True
                 continue
             if in_matrix:
-                if line == ';':
+                if line == b';':
                     break
                 parts = line.split()
                 if len(parts) >= 2:
-                    seq_id = parts[0]
-                    seq = ''.join(parts[1:])
-                    if seq_id in sequences:
-                        sequences[seq_id] += seq
+                    seq_id = parts[0].decode()
+                    if seq_id in segments:
+                        segments[seq_id].extend(b''.join(parts[1:]))
                     else:
-                        sequences[seq_id] = seq
-    return sequences, pbar, progress_bar
+                        segments[seq_id] = bytearray(b''.join(parts[1:]))
+    seqIDs = list(segments)
+    lengths = np.array([len(segment) for segment in segments.values()], dtype = np.int64)
+    matrixShape = (len(seqIDs), int(lengths.max()) if len(seqIDs) > 0 else 0)
+    matrixFile = None
+    if matrixShape[0] * matrixShape[1] > memmap_threshold_:
+        matrixFile = tempfile.TemporaryFile()
+        matrix = np.memmap(matrixFile, dtype = np.uint8, mode = 'w+', shape = matrixShape)
+    else:
+        matrix = np.zeros(matrixShape, dtype = np.uint8)
+    # rows shorter than the longest sequence are padded with 0, which does not occur in the alignment
+    symbols = np.zeros(256, dtype = bool)
+    for row, seq_id in enumerate(seqIDs):
+        rowValues = np.frombuffer(segments.pop(seq_id), dtype = np.uint8)
+        matrix[row, :lengths[row]] = rowValues
+        symbols[rowValues] = True
+    return _alignmentStore(seqIDs, lengths, symbols, matrix, matrixFile, frequencyTable), pbar, progress_bar
+
+def alignmentStoreFromSequences(alignedSeqInputDict, frequencyTable):
+    '''
+    function to build the alignment matrix from aligned sequences in memory (sequence ID: aligned sequence), as alignmentToMemory does for a Nexus file
+    '''
+    seqIDs = list(alignedSeqInputDict)
+    segments = [alignedSeqInputDict[seq_id].encode() for seq_id in seqIDs]
+    lengths = np.array([len(segment) for segment in segments], dtype = np.int64)
+    matrix = np.zeros((len(seqIDs), int(lengths.max()) if len(seqIDs) > 0 else 0), dtype = np.uint8)
+    symbols = np.zeros(256, dtype = bool)
+    for row, segment in enumerate(segments):
+        rowValues = np.frombuffer(segment, dtype = np.uint8)
+        matrix[row, :lengths[row]] = rowValues
+        symbols[rowValues] = True
+    return _alignmentStore(seqIDs, lengths, symbols, matrix, None, frequencyTable)
+
+def _alignmentStore(seqIDs, lengths, symbols, matrix, matrixFile, frequencyTable):
+    '''
+    function to collect the alignment matrix and the lookup information used to calculate mismatches between sequences
+    symbols is a boolean array over all byte values marking the characters that occur in the alignment
+    '''
+    rows = {seq_id: row for row, seq_id in enumerate(seqIDs)}
+    symbols = np.flatnonzero(symbols).astype(np.uint8)
+    alignmentStore = {
+        'seqIDs': seqIDs,
+        'rows': rows,
+        'lengths': lengths,
+        'matrix': matrix,
+        'matrixFile': matrixFile,
+        'symbols': symbols[symbols != 0],
+        'scanRows': np.array([rows.get(seq_id, -1) for seq_id in frequencyTable.index], dtype = np.int64),
+        'scanPositions': {seq_id: position for position, seq_id in enumerate(frequencyTable.index)},
+        'blockSize': max(1, min(256, 2 ** 24 // max(1, matrix.shape[0]))),
+        'candidateIndex': None,
+        'blockLimit': None,
+        'blockStart': None,
+        'blockEnd': None,
+        'block': None,
+        'blockChildren': None,
+    }
+    return alignmentStore
 
 def verifySequences(seqInputDict, frequencyTable):
     '''
@@ -329,17 +621,31 @@ def verifySequences(seqInputDict, frequencyTable):
             seqVerification.append(item)
     return seqVerification
 
-def verifyAlignment(alignmentInputDict, seqInputDict):
+def verifyAlignment(alignmentStore, seqInputDict):
     '''
     function to verify if alignment includes:
         1. all sequences that are in --sequence-input
         2. sequences with equal length
         3. sequences without gaps are identical to --sequence-input
+    sequences are compared by concatenating the ungapped alignment rows and the sequences in the same order, in chunks of rows to bound memory
     '''
     alignmentVerification = {}
-    missingSeqs = list(set(seqInputDict.keys()) - set(alignmentInputDict.keys()))
-    equalLength = all(len(v) == len(next(iter(alignmentInputDict.values()))) for v in alignmentInputDict.values())
-    identicalSeqs = all(k in alignmentInputDict and v == alignmentInputDict[k].replace('-', '') for k, v in seqInputDict.items()) and len(seqInputDict) == len(alignmentInputDict)
+    rows = alignmentStore['rows']
+    missingSeqs = list(set(seqInputDict.keys()) - set(rows.keys()))
+    equalLength = bool((alignmentStore['lengths'] == alignmentStore['matrix'].shape[1]).all())
+    identicalSeqs = len(missingSeqs) == 0 and len(seqInputDict) == len(rows)
+    if identicalSeqs:
+        # every row holds a sequence of seqInputDict, hence the rows are in the order of seqOrder
+        matrix = alignmentStore['matrix']
+        seqOrder = sorted(seqInputDict, key = rows.get)
+        chunkSize = max(1, 2 ** 24 // max(1, matrix.shape[1]))
+        for chunkStart in range(0, matrix.shape[0], chunkSize):
+            chunk = np.asarray(matrix[chunkStart:chunkStart + chunkSize])
+            residues = (chunk != ord('-')) & (chunk != 0)
+            chunkSeqs = [seqInputDict[seqID] for seqID in seqOrder[chunkStart:chunkStart + chunkSize]]
+            if not (residues.sum(axis = 1) == np.array([len(seq) for seq in chunkSeqs], dtype = np.int64)).all() or chunk[residues].tobytes() != ''.join(chunkSeqs).encode():
+                identicalSeqs = False
+                break
     if len(missingSeqs) > 0:
         alignmentVerification['not all sequences in alignment'] = missingSeqs
     if equalLength != True:
@@ -348,27 +654,1437 @@ def verifyAlignment(alignmentInputDict, seqInputDict):
         alignmentVerification["sequences not identical to '--sequence-input'"] = identicalSeqs
     return alignmentVerification
 
-def removeNegativeSamples(negative, frequencyTableSubset):
+def alignmentMismatchBlock(alignmentStore, parentStart, parentEnd, children = None):
+    '''
+    function to calculate the number of mismatching alignment positions between the parents parentStart:parentEnd (rows) and the children (columns)
+    parents and children are positions in --frequency-input order, the children default to all sequences from parentStart + 1 onwards
+    matches are counted per character through matrix products of the one-hot encoded alignment, calculated over chunks of children to bound memory
     '''
-    function to remove negative samples before the algorithm
+    matrix = alignmentStore['matrix']
+    scanRows = alignmentStore['scanRows']
+    if children is None:
+        children = np.arange(parentStart + 1, len(scanRows))
+    parentMatrix = np.asarray(matrix[scanRows[parentStart:parentEnd]])
+    parentSymbols = [(symbol, (parentMatrix == symbol).astype(np.float32)) for symbol in alignmentStore['symbols']]
+    matchBlock = np.zeros((len(parentMatrix), len(children)), dtype = np.float32)
+    chunkSize = max(1, 2 ** 24 // max(1, matrix.shape[1]))
+    for chunkStart in range(0, len(children), chunkSize):
+        chunkMatrix = np.asarray(matrix[scanRows[children[chunkStart:chunkStart + chunkSize]]])
+        for symbol, parentSymbol in parentSymbols:
+            matchBlock[:, chunkStart:chunkStart + chunkSize] += parentSymbol @ (chunkMatrix == symbol).astype(np.float32).T
+    return matrix.shape[1] - np.rint(matchBlock).astype(np.int64)
+
+def alignmentMismatches(alignmentStore, parentID, childID):
     '''
+    function to look up the number of mismatching alignment positions between parent and child, calculating the next block of parents when needed
+    blocks do not extend past blockLimit, the end of the parents assigned to a worker process
+    '''
+    parent = alignmentStore['scanPositions'][parentID]
+    blockStart = alignmentStore['blockStart']
+    if blockStart is None or not blockStart <= parent < alignmentStore['blockEnd']:
+        blockStart = parent
+        blockEnd = min(parent + alignmentStore['blockSize'], alignmentStore['blockLimit'] or len(alignmentStore['scanRows']))
+        alignmentStore['blockChildren'] = blockCandidateChildren(alignmentStore['candidateIndex'], blockStart, blockEnd)
+        alignmentStore['block'] = alignmentMismatchBlock(alignmentStore, blockStart, blockEnd, alignmentStore['blockChildren'])
+        alignmentStore['blockStart'] = blockStart
+        alignmentStore['blockEnd'] = blockEnd
+    return int(alignmentStore['block'][parent - blockStart, blockChildRow(alignmentStore, alignmentStore['scanPositions'][childID])])
+
+PREPARED_INPUT_VERSION = 2
+
+def fileChecksum(inputFile):
+    '''
+    function to calculate the BLAKE2b checksum of a file, read in blocks of 1 MB
+    '''
+    checksum = hashlib.blake2b(digest_size = 16)
+    with open(inputFile, 'rb') as file:
+        for block in iter(lambda: file.read(2 ** 20), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+def _preparedSourceInfo(inputFile):
+    '''
+    function to return the absolute path, size, and modification time of an input file
+    '''
+    fileStat = os.stat(inputFile)
+    return {'path': os.path.abspath(inputFile), 'size': fileStat.st_size, 'mtime': fileStat.st_mtime_ns}
+
+def preparedInputManifest(prepare_, inputFiles, parameters):
+    '''
+    function to return the manifest of the prepared input directory when it matches the input files and parsing parameters, None otherwise
+    files with an unchanged size and modification time are accepted without calculating their checksum
+    '''
+    try:
+        with open(os.path.join(prepare_, 'manifest.json'), 'r') as manifestFile:
+            manifest = json.load(manifestFile)
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get('version') != PREPARED_INPUT_VERSION or manifest.get('parameters') != parameters or set(manifest['sources']) != {role for role, inputFile in inputFiles.items() if inputFile is not None}:
+        return None
+    for role, source in manifest['sources'].items():
+        try:
+            sourceInfo = _preparedSourceInfo(inputFiles[role])
+        except FileNotFoundError:
+            return None
+        if sourceInfo['path'] != source['path'] or sourceInfo['size'] != source['size']:
+            return None
+        if sourceInfo['mtime'] != source['mtime'] and fileChecksum(inputFiles[role]) != source['checksum']:
+            return None
+    return manifest
+
+def savePreparedInputs(prepare_, inputFiles, parameters, frequencyTable, seqInputDict, taxIdInputDict, taxPidentInputDict, taxTotalDict, taxonomyFileType, alignmentStore):
+    '''
+    function to store the parsed and verified input files in the prepared input directory
+    matrices are stored as .npy files to be memory-mapped, taxonomy lines are copied into a single file and referenced by byte ranges
+    the manifest is written last (and atomically), so that an interrupted run never leaves a valid but incomplete directory behind
+    '''
+    os.makedirs(prepare_, exist_ok = True)
+    manifestPath = os.path.join(prepare_, 'manifest.json')
+    if os.path.exists(manifestPath):
+        os.remove(manifestPath)
+    manifest = {
+        'version': PREPARED_INPUT_VERSION,
+        'parameters': parameters,
+        'sources': {role: {**_preparedSourceInfo(inputFile), 'checksum': fileChecksum(inputFile)} for role, inputFile in inputFiles.items() if inputFile is not None},
+        'frequency': {
+            'index': frequencyTable.index.tolist(),
+            'indexName': frequencyTable.index.name,
+            'columns': frequencyTable.columns.tolist(),
+            'columnsName': frequencyTable.columns.name,
+            'dtypes': [str(dtype) for dtype in frequencyTable.dtypes],
+        },
+        'taxonomyFileType': taxonomyFileType,
+        'alignment': None,
+    }
+    np.save(os.path.join(prepare_, 'frequency.npy'), frequencyTable.to_numpy())
+    with open(os.path.join(prepare_, 'sequences.json'), 'w') as seqFile:
+        json.dump(seqInputDict, seqFile)
+    if 'taxonomy' in manifest['sources']:
+        taxonomyRanges = collections.defaultdict(list)
+        lineStart = 0
+        with open(os.path.join(prepare_, 'taxonomy.bin'), 'wb') as taxFile:
+            for item, rawLines in _taxonomyLines(list(taxTotalDict), taxTotalDict):
+                taxFile.write(rawLines)
+                if taxonomyRanges[item] and taxonomyRanges[item][-1][1] == lineStart:
+                    taxonomyRanges[item][-1][1] = lineStart + len(rawLines)
+                else:
+                    taxonomyRanges[item].append([lineStart, lineStart + len(rawLines)])
+                lineStart += len(rawLines)
+        with open(os.path.join(prepare_, 'taxonomy.json'), 'w') as taxFile:
+            json.dump({'taxIdInputDict': taxIdInputDict, 'taxPidentInputDict': taxPidentInputDict, 'taxonomyRanges': taxonomyRanges}, taxFile)
+    if alignmentStore is not None:
+        manifest['alignment'] = {'seqIDs': alignmentStore['seqIDs'], 'lengths': alignmentStore['lengths'].tolist(), 'symbols': alignmentStore['symbols'].tolist()}
+        np.save(os.path.join(prepare_, 'alignment.npy'), alignmentStore['matrix'])
+    with open(f'{manifestPath}.tmp', 'w') as manifestFile:
+        json.dump(manifest, manifestFile)
+    os.replace(f'{manifestPath}.tmp', manifestPath)
+
+def loadPreparedInputs(prepare_, manifest):
+    '''
+    function to load the input files from the prepared input directory, memory-mapping the frequency table and alignment
+    '''
+    frequencyInfo = manifest['frequency']
+    frequencyValues = np.load(os.path.join(prepare_, 'frequency.npy'), mmap_mode = 'r')
+    frequencyTable = pd.DataFrame(frequencyValues, index = pd.Index(frequencyInfo['index'], name = frequencyInfo['indexName']), columns = pd.Index(frequencyInfo['columns'], name = frequencyInfo['columnsName']), copy = False)
+    if len(set(frequencyInfo['dtypes'])) > 1:
+        frequencyTable = frequencyTable.astype(dict(zip(frequencyTable.columns, frequencyInfo['dtypes'])))
+    with open(os.path.join(prepare_, 'sequences.json'), 'r') as seqFile:
+        seqInputDict = json.load(seqFile)
+    taxIdInputDict = {}
+    taxPidentInputDict = {}
+    taxTotalDict = {}
+    if 'taxonomy' in manifest['sources']:
+        with open(os.path.join(prepare_, 'taxonomy.json'), 'r') as taxFile:
+            taxonomy = json.load(taxFile)
+        taxIdInputDict = collections.defaultdict(list, taxonomy['taxIdInputDict'])
+        taxPidentInputDict = collections.defaultdict(list, taxonomy['taxPidentInputDict'])
+        rawSource = os.path.join(prepare_, 'taxonomy.bin')
+        taxTotalDict = collections.defaultdict(list, {item: [(rawSource, lineStart, lineEnd) for lineStart, lineEnd in ranges] for item, ranges in taxonomy['taxonomyRanges'].items()})
+    alignmentStore = None
+    if manifest['alignment'] is not None:
+        matrix = np.load(os.path.join(prepare_, 'alignment.npy'), mmap_mode = 'r')
+        symbols = np.zeros(256, dtype = bool)
+        symbols[manifest['alignment']['symbols']] = True
+        alignmentStore = _alignmentStore(manifest['alignment']['seqIDs'], np.array(manifest['alignment']['lengths'], dtype = np.int64), symbols, matrix, None, frequencyTable)
+    return frequencyTable, seqInputDict, taxIdInputDict, taxPidentInputDict, taxTotalDict, manifest['taxonomyFileType'], alignmentStore
+
+def removeNegativeSamples(negative, frequencyTable, console):
+    '''
+    function to determine which samples to exclude before the algorithm
+    returns a boolean mask of the included columns, rather than a copy of the frequency table
+    '''
+    sampleMask = np.ones(len(frequencyTable.columns), dtype = bool)
+    if negative == None:
+        return sampleMask
     negativeList = negative.split('+')
     for item in negativeList:
         if '*' not in item:
-            frequencyTableSubset = frequencyTableSubset.drop(item, axis = 1)
+            if item not in frequencyTable.columns:
+                raise TombRaiderError(f"sample '{item}' in '--exclude' not found in frequency table")
+            droppedColumns = [item]
         elif item.startswith('*') and item.endswith('*'):
             itemMatch = item.rstrip('*').lstrip('*')
-            droppedColumns = frequencyTableSubset.filter(like = itemMatch).columns
-            frequencyTableSubset = frequencyTableSubset.drop(columns = droppedColumns)
+            droppedColumns = frequencyTable.filter(like = itemMatch).columns
         elif item.startswith('*'):
             itemMatch = item.lstrip('*')
-            droppedColumns = frequencyTableSubset.filter(regex = f'{itemMatch}$', axis = 1).columns
-            frequencyTableSubset = frequencyTableSubset.drop(columns = droppedColumns)
+            droppedColumns = frequencyTable.filter(regex = f'{itemMatch}$', axis = 1).columns
         elif item.endswith('*'):
             itemMatch = item.rstrip('*')
-            droppedColumns = frequencyTableSubset.filter(regex = f'^{itemMatch}', axis = 1).columns
-            frequencyTableSubset = frequencyTableSubset.drop(columns = droppedColumns)
-    return frequencyTableSubset
+            droppedColumns = frequencyTable.filter(regex = f'^{itemMatch}', axis = 1).columns
+        sampleMask &= ~frequencyTable.columns.isin(droppedColumns)
+    return sampleMask
+
+def mergeArtefacts(frequencyTable, childParentComboDict, pseudogeneDict, remove_artefacts_):
+    '''
+    function to merge (or discard) all artefacts with their parent in a single step after the analysis and remove pseudogenes
+    childParentComboDict maps every artefact to its root parent (grandparents already resolved), hence one group-sum suffices
+    integer columns keep their dtype unless a merged count no longer fits, in which case they are kept as int64
+    pseudogenes are removed from the frequency table, and hence from the sequence and taxonomy output
+    '''
+    if childParentComboDict and not remove_artefacts_:
+        rootLabels = [childParentComboDict.get(seqID, seqID) for seqID in frequencyTable.index]
+        mergedTable = frequencyTable.groupby(rootLabels, sort = False).sum()
+        mergedDtypes = {}
+        for column, dtype in frequencyTable.dtypes.items():
+            if pd.api.types.is_integer_dtype(dtype) and len(mergedTable) > 0 and (mergedTable[column].max() > np.iinfo(dtype).max or mergedTable[column].min() < np.iinfo(dtype).min):
+                dtype = np.int64
+            mergedDtypes[column] = dtype
+        frequencyTable = mergedTable.astype(mergedDtypes).rename_axis(frequencyTable.index.name)
+    elif childParentComboDict:
+        frequencyTable = frequencyTable.drop(list(childParentComboDict.keys()))
+    if pseudogeneDict:
+        frequencyTable = frequencyTable.drop(list(pseudogeneDict.keys()), errors = 'ignore')
+    return frequencyTable
+
+def startProfile(profile_):
+    '''
+    function to set up the per-stage timings and counters collected with '--profile', returns None when not profiling
+    '''
+    if not profile_:
+        return None
+    return {'stages': {}, 'criteria': {}, 'counters': {}}
+
+def recordStage(profile, stageName, stageStart, calls = 1):
+    '''
+    function to add the wall time since stageStart (time.perf_counter()) to a stage
+    '''
+    if profile is None:
+        return
+    stage = profile['stages'].setdefault(stageName, {'seconds': 0.0, 'calls': 0})
+    stage['seconds'] += time.perf_counter() - stageStart
+    stage['calls'] += calls
+
+def profiledFunction(profile, criterionName, identificationFunction):
+    '''
+    function to wrap a criterion function to record its wall time, number of calls, and pass/fail counts
+    criteria that are not included in the analysis (passingFunction) are not wrapped and do not add overhead
+    '''
+    if profile is None or identificationFunction is passingFunction:
+        return identificationFunction
+    stage = profile['stages'].setdefault(criterionName, {'seconds': 0.0, 'calls': 0})
+    outcome = profile['criteria'].setdefault(criterionName, {'pass': 0, 'fail': 0})
+    def profiledIdentification(*args, **kwargs):
+        stageStart = time.perf_counter()
+        result = identificationFunction(*args, **kwargs)
+        stage['seconds'] += time.perf_counter() - stageStart
+        stage['calls'] += 1
+        if result is True:
+            outcome['pass'] += 1
+        elif result is False:
+            outcome['fail'] += 1
+        return result
+    return profiledIdentification
+
+def peakMemory():
+    '''
+    function to return the peak resident memory of the process in MB, None when not available on the platform
+    '''
+    if resource is None:
+        return None
+    maxResident = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxResident / (1024 * 1024) if sys.platform == 'darwin' else maxResident / 1024
+
+def writeProfile(profile, profileOutputFile, totalSeconds):
+    '''
+    function to write the collected timings and counters to a JSON file
+    '''
+    profile['total seconds'] = totalSeconds
+    profile['peak memory (MB)'] = peakMemory()
+    with open(profileOutputFile, 'w') as profileoutfile:
+        json.dump(profile, profileoutfile, indent = 2)
+        profileoutfile.write('\n')
+
+DECISION_LOG_COLUMNS = ['child', 'parent', 'criterion', 'metric', 'threshold', 'verdict']
+
+def openDecisionLog(log_, resumeSize = None):
+    '''
+    function to open the structured decision log, streamed to a TSV file next to the log output file
+    returns None when '--log' is not specified, whereby criterion functions skip logging altogether
+    when resuming from a checkpoint, records written after the checkpoint are removed and new records are appended
+    '''
+    if not log_:
+        return None
+    decisionLogFile = f'{os.path.splitext(log_)[0]}.decisions.tsv'
+    if resumeSize is not None:
+        os.truncate(decisionLogFile, resumeSize)
+        decisionHandle = open(decisionLogFile, 'a', buffering = 1024 * 1024)
+    else:
+        decisionHandle = open(decisionLogFile, 'w', buffering = 1024 * 1024)
+        decisionHandle.write('\t'.join(DECISION_LOG_COLUMNS) + '\n')
+    return {'file': decisionLogFile, 'handle': decisionHandle, 'childOrder': {}}
+
+def logDecision(decisionLog, childID, parentID, criterion, metric, threshold, verdict):
+    '''
+    function to write a single decision record (child, parent, criterion, metric, threshold, verdict) to the decision log
+    '''
+    decisionLog['childOrder'].setdefault(childID, len(decisionLog['childOrder']))
+    decisionLog['handle'].write(f'{childID}\t{parentID}\t{criterion}\t{metric}\t{threshold}\t{verdict}\n')
+
+def decisionMessage(childID, parentID, criterion, metric, threshold, verdict):
+    '''
+    function to render a decision record as the human-readable message used in the detailed analysis of the log file
+    '''
+    inspection = 'continuing inspection' if verdict == 'pass' else 'aborting inspection...'
+    if criterion == 'taxID':
+        return f'taxonomic IDs are matching between {parentID} and {childID} ({metric}), {inspection}'
+    if criterion == 'taxon quality':
+        return f'taxonomic similarity score {"not higher" if verdict == "pass" else "higher"} for {childID} ({metric}) than {parentID} ({threshold}), {inspection}'
+    if criterion.startswith('coOccur'):
+        ratioName = criterion[len('coOccur ('):-1]
+        if ratioName.upper() == 'COUNT':
+            return f'co-occurrence ratio (method: {ratioName}) {"met" if verdict == "pass" else "not met"}: {childID} found {metric} times without {parentID} (threshold: {threshold}), {inspection}'
+        return f'co-occurrence ratio (method: {ratioName}) {"met" if verdict == "pass" else "not met"}: {childID} observed in {metric}% of samples without a positive detection of {parentID} (threshold: {threshold}), {inspection}'
+    if criterion == 'seqSim':
+        return f'sequence similarity ratio {"met" if verdict == "pass" else "not met"}: {metric}% (threshold: {threshold}), {inspection}'
+    if criterion in ['banded alignment', 'k-mer prefilter']:
+        return f'sequence similarity ratio not met: <= {metric}% (threshold: {threshold}, {"alignment stopped early" if criterion == "banded alignment" else criterion}), {inspection}'
+    if verdict == 'grandparent':
+        return f'grandparent identified ({metric})!'
+    return 'parent identified!'
+
+def renderDecisionLog(decisionLog, logoutfile):
+    '''
+    function to render the detailed analysis ('### analysing: ...') from the decision log
+    records are streamed in scan order, the report groups them per child in the order children were first inspected
+    '''
+    decisionLog['handle'].close()
+    childOrder = decisionLog['childOrder']
+    recordOffsets = []
+    recordChildOrder = []
+    with open(decisionLog['file'], 'rb') as decisionHandle:
+        recordOffset = len(decisionHandle.readline())
+        for record in decisionHandle:
+            recordOffsets.append(recordOffset)
+            recordChildOrder.append(childOrder[record.split(b'\t', 1)[0].decode()])
+            recordOffset += len(record)
+        previousChild = None
+        previousParent = None
+        for recordIndex in np.argsort(np.array(recordChildOrder, dtype = np.int64), kind = 'stable'):
+            decisionHandle.seek(recordOffsets[recordIndex])
+            childID, parentID, criterion, metric, threshold, verdict = decisionHandle.readline().decode().rstrip('\n').split('\t')
+            if childID != previousChild:
+                if previousChild is not None:
+                    logoutfile.write('\n\n')
+                logoutfile.write(f'### analysing: {childID} ###\n')
+                previousParent = None
+            elif parentID != previousParent:
+                logoutfile.write('\n')
+            logoutfile.write(f'{parentID}: {decisionMessage(childID, parentID, criterion, metric, threshold, verdict)}\n')
+            previousChild = childID
+            previousParent = parentID
+        if previousChild is not None:
+            logoutfile.write('\n\n')
+
+def evaluateParentChild(pairState, decisionLog, child, parent, childID, parentID):
+    '''
+    function to assess all included criteria for a parent-child combination, returns False as soon as a criterion is not met
+    the outcome only depends on the input data, not on previously identified artefacts, hence combinations can be assessed in any order
+    '''
+    # 2. check if taxonomic ID is matching between parent and child
+    similarID = pairState['taxidIdentification'](decisionLog, childID, parentID, pairState['taxIdInputDict'])
+    if similarID == False:
+        return False
+    # 3. check if taxonomic ID similarity score is equal or lower for child than parent
+    betterPidentScore = pairState['taxqualIdentification'](decisionLog, childID, parentID, pairState['taxPidentInputDict'])
+    if betterPidentScore == False:
+        return False
+    # 4. check co-occurrence pattern
+    cooccurScore = pairState['cooccurIdentification'](pairState['console'], pairState['cooccurMatrix'], child, parent, decisionLog, childID, parentID)
+    if cooccurScore == False:
+        return False
+    # 5. check sequence similarity, discarding combinations that cannot reach the threshold based on shared k-mers first
+    seqSimArguments = (pairState['seqInputDict'][parentID], pairState['seqInputDict'][childID], pairState['alignmentStore'], childID, parentID, pairState['calculate_pairwise_'], pairState['pairwise_alignment_'], pairState['similarity_'], decisionLog, pairState['similarityCache'])
+    kmerScore = pairState['kmerPrefilterIdentification'](pairState['console'], pairState['kmerPrefilter'], *seqSimArguments)
+    if kmerScore == False:
+        return False
+    seqSimScore = pairState['seqsimIdentification'](pairState['console'], *seqSimArguments)
+    if seqSimScore == False:
+        return False
+    return True
+
+def recordArtefact(childParentComboDict, combinedDict, decisionLog, childID, parentID):
+    '''
+    function to record an identified artefact, merging or removing happens in one step after the analysis
+    '''
+    # 6.1.1 assign child to parent when parent is not identified as a child previously
+    if parentID not in childParentComboDict:
+        childParentComboDict[childID] = parentID
+        combinedDict[parentID].append(childID)
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, 'artefact', '', '', 'parent')
+    # 6.1.2 assign child to grandparent when parent is already identified as a child previously
+    else:
+        combinedDict[childParentComboDict[parentID]].append(childID)
+        childParentComboDict[childID] = childParentComboDict[parentID]
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, 'artefact', childParentComboDict[parentID], '', 'grandparent')
+
+def pairCounters(pairState):
+    '''
+    function to return the k-mer prefilter, similarity cache, and incremental mode counters, used to attribute counts to individual combinations
+    '''
+    kmerPrefilter = pairState['kmerPrefilter']
+    similarityCache = pairState['similarityCache']
+    incrementalState = pairState['incrementalState']
+    return (kmerPrefilter['checkedCount'] if kmerPrefilter else 0, kmerPrefilter['prunedCount'] if kmerPrefilter else 0, similarityCache['hits'] if similarityCache else 0, similarityCache['misses'] if similarityCache else 0, incrementalState['reusedCount'] if incrementalState else 0)
+
+def incrementalPairEvaluation(pairState, decisionLog, child, parent, childID, parentID):
+    '''
+    function to assess a parent-child combination in incremental mode, reusing the outcome of the previous run when the input data of both sequences is unchanged
+    the outcome is stored for the next run, as are the decision records when they are written to '--log'
+    '''
+    incrementalState = pairState['incrementalState']
+    pairKey = f'{parentID}\t{childID}'
+    childPassed = None
+    if childID not in incrementalState['changedIDs'] and parentID not in incrementalState['changedIDs']:
+        childPassed = incrementalState['previousOutcomes'].get(pairKey)
+    if childPassed is None:
+        captureLog = {'handle': io.StringIO(), 'childOrder': {}} if incrementalState['records'] is not None else None
+        childPassed = evaluateParentChild(pairState, captureLog, child, parent, childID, parentID)
+        decisionRecords = captureLog['handle'].getvalue() if captureLog is not None else ''
+    else:
+        incrementalState['reusedCount'] += 1
+        decisionRecords = incrementalState['previousRecords'].get(pairKey, '')
+    incrementalState['outcomes'][pairKey] = childPassed
+    if incrementalState['records'] is not None and decisionRecords:
+        incrementalState['records'][pairKey] = decisionRecords
+    if decisionLog is not None and decisionRecords:
+        decisionLog['childOrder'].setdefault(childID, len(decisionLog['childOrder']))
+        decisionLog['handle'].write(decisionRecords)
+    return childPassed
+
+_pairWorkerState = None
+
+def _initPairWorker(pairState):
+    '''
+    initialise a worker process, the (read-only) input data is inherited from the main process when forking
+    SQLite connections cannot be shared between processes, hence every worker opens its own connection to the similarity cache
+    '''
+    global _pairWorkerState
+    _pairWorkerState = dict(pairState)
+    if pairState['similarityCache'] is not None:
+        _pairWorkerState['similarityCache'] = openSimilarityCache(pairState['similarityCache']['file'], pairState['similarityCache']['maxEntries'], pairState['console'])
+    if pairState['kmerPrefilter'] is not None:
+        _pairWorkerState['kmerPrefilter'] = dict(pairState['kmerPrefilter'])
+    if pairState['incrementalState'] is not None:
+        _pairWorkerState['incrementalState'] = {**pairState['incrementalState'], 'outcomes': {}, 'records': {} if pairState['incrementalState']['records'] is not None else None}
+
+def _evaluateParentBlock(parentStart, parentEnd, assignedChildren, logDecisions):
+    '''
+    worker function assessing all candidate combinations of a block of parents
+    children already identified as artefacts by the main process, or by an earlier parent in this block, are not assessed
+    returns per parent the number of candidates and, per assessed child, its outcome, decision records, and counter increments
+    a TombRaiderError raised by a criterion is passed on to the main process by the pool
+    '''
+    pairState = _pairWorkerState
+    seqIDs = pairState['seqIDs']
+    decisionLog = {'handle': io.StringIO(), 'childOrder': {}} if logDecisions else None
+    # limit the blocks of co-occurrence and alignment lookups to the parents of this task, as other tasks assess the next parents
+    for blockLookup in (pairState['cooccurMatrix'], pairState['alignmentStore']):
+        if blockLookup is not None:
+            blockLookup['blockLimit'] = parentEnd
+    blockAssigned = set()
+    blockResults = []
+    for parent in range(parentStart, parentEnd):
+        parentID = seqIDs[parent]
+        childCandidates = pairState['childCandidates'](pairState['candidateIndex'], parent)
+        childResults = []
+        for child in childCandidates:
+            if assignedChildren[child] or child in blockAssigned:
+                continue
+            countersBefore = pairCounters(pairState)
+            childPassed = pairState['evaluatePair'](pairState, decisionLog, child, parent, seqIDs[child], parentID)
+            decisionRecords = ''
+            if decisionLog is not None:
+                decisionRecords = decisionLog['handle'].getvalue()
+                decisionLog['handle'].seek(0)
+                decisionLog['handle'].truncate()
+            childResults.append((child, childPassed, decisionRecords, tuple(after - before for after, before in zip(pairCounters(pairState), countersBefore))))
+            if childPassed:
+                blockAssigned.add(child)
+        blockResults.append((parent, len(childCandidates), childResults))
+    # outcomes are stored by the main process for the combinations it keeps
+    if pairState['incrementalState'] is not None:
+        pairState['incrementalState']['outcomes'].clear()
+        if pairState['incrementalState']['records'] is not None:
+            pairState['incrementalState']['records'].clear()
+    similarityCache = pairState['similarityCache']
+    cacheUpdates = ([], [])
+    if similarityCache is not None:
+        cacheUpdates = (similarityCache['pending'], similarityCache['used'])
+        similarityCache['pending'] = []
+        similarityCache['used'] = []
+    return blockResults, cacheUpdates
+
+def candidateParentBlocks(pairState, startParent, pairs_per_block_, parents_per_block_ = None):
+    '''
+    function to split the parents from startParent onwards into blocks of consecutive parents holding about pairs_per_block_ candidate combinations
+    and at most parents_per_block_ parents, returned as (first parent, last parent + 1)
+    '''
+    candidateIndex = pairState['candidateIndex']
+    parentBlocks = []
+    blockStart = startParent
+    blockPairs = 0
+    for parent in range(startParent, candidateIndex['size']):
+        blockPairs += candidateIndex['childCounts'][parent]
+        if blockPairs >= pairs_per_block_ or parent + 1 - blockStart == parents_per_block_ or parent == candidateIndex['size'] - 1:
+            parentBlocks.append((blockStart, parent + 1))
+            blockStart = parent + 1
+            blockPairs = 0
+    return parentBlocks
+
+def parallelPairEvaluation(pairState, childParentComboDict, decisionLog, threads_, startParent = 0, pairs_per_block_ = 5000):
+    '''
+    function to assess parent-child combinations over a pool of worker processes, sharded into blocks of consecutive parents
+    yields (parent, number of candidates, child results) in parent order, so that the main process assigns artefacts to the first
+    (most abundant) accepting parent exactly like the serial analysis, starting at startParent when resuming from a checkpoint
+    '''
+    candidateIndex = pairState['candidateIndex']
+    seqIDs = pairState['seqIDs']
+    parentBlocks = candidateParentBlocks(pairState, startParent, pairs_per_block_)
+    # artefacts restored from a checkpoint, artefacts identified during the analysis are added as their results are consumed
+    assignedChildren = np.zeros(candidateIndex['size'], dtype = bool)
+    assignedChildren[[position for position, seqID in enumerate(seqIDs) if seqID in childParentComboDict]] = True
+    pendingBlocks = collections.deque()
+    with multiprocessing.get_context('fork').Pool(threads_, initializer = _initPairWorker, initargs = (pairState,)) as pool:
+        nextBlock = 0
+        while nextBlock < len(parentBlocks) or pendingBlocks:
+            # keep a bounded number of blocks in flight, each receiving the artefacts identified so far
+            while nextBlock < len(parentBlocks) and len(pendingBlocks) < 2 * threads_:
+                pendingBlocks.append(pool.apply_async(_evaluateParentBlock, (*parentBlocks[nextBlock], assignedChildren, decisionLog is not None)))
+                nextBlock += 1
+            blockResults, cacheUpdates = pendingBlocks.popleft().get()
+            if pairState['similarityCache'] is not None:
+                addSimilarityCacheUpdates(pairState['similarityCache'], cacheUpdates)
+            for blockResult in blockResults:
+                yield blockResult
+                # the main process assigned the passing children of this parent, unless assigned to a more abundant parent already
+                for child, childPassed, _, _ in blockResult[2]:
+                    if childPassed:
+                        assignedChildren[child] = True
+
+def replayPairResult(pairState, decisionLog, childID, parentID, childPassed, decisionRecords, counterIncrements):
+    '''
+    function to add the decision records and counters of a combination assessed by a worker process to the main analysis
+    '''
+    if pairState['incrementalState'] is not None:
+        pairState['incrementalState']['outcomes'][f'{parentID}\t{childID}'] = childPassed
+        if pairState['incrementalState']['records'] is not None and decisionRecords:
+            pairState['incrementalState']['records'][f'{parentID}\t{childID}'] = decisionRecords
+        pairState['incrementalState']['reusedCount'] += counterIncrements[4]
+    if decisionLog is not None and decisionRecords:
+        decisionLog['childOrder'].setdefault(childID, len(decisionLog['childOrder']))
+        decisionLog['handle'].write(decisionRecords)
+    addPairCounters(pairState, counterIncrements)
+
+def addPairCounters(pairState, counterIncrements):
+    '''
+    function to add the k-mer prefilter and similarity cache counter increments of a worker process (see pairCounters) to the main analysis
+    '''
+    if pairState['kmerPrefilter'] is not None:
+        pairState['kmerPrefilter']['checkedCount'] += counterIncrements[0]
+        pairState['kmerPrefilter']['prunedCount'] += counterIncrements[1]
+    if pairState['similarityCache'] is not None:
+        pairState['similarityCache']['hits'] += counterIncrements[2]
+        pairState['similarityCache']['misses'] += counterIncrements[3]
+
+INCREMENTAL_STATE_VERSION = 2
+
+def incrementalDigests(frequencyTable, sampleMask, detection_threshold_, seqInputDict, taxIdInputDict, taxPidentInputDict, alignmentStore):
+    '''
+    function to calculate a digest of the input data of every sequence: sequence, taxonomy, aligned sequence, and read counts in the included samples
+    read counts are identified by sample name and samples without reads are left out (unless zero counts are detections),
+    so that adding samples only changes the digest of sequences detected in the new samples
+    '''
+    includedColumns = frequencyTable.columns[sampleMask]
+    counts = frequencyTable.to_numpy()[:, sampleMask]
+    columnNames = [f'{column}\t'.encode() for column in includedColumns]
+    digests = {}
+    for position, seqID in enumerate(frequencyTable.index):
+        digest = hashlib.blake2b(digest_size = 16)
+        digest.update(json.dumps([seqInputDict.get(seqID), (taxIdInputDict or {}).get(seqID), (taxPidentInputDict or {}).get(seqID)]).encode())
+        if alignmentStore is not None:
+            row = alignmentStore['rows'][seqID]
+            digest.update(alignmentStore['matrix'][row, :alignmentStore['lengths'][row]].tobytes())
+        countColumns = np.arange(len(includedColumns)) if detection_threshold_ <= 0 else np.flatnonzero(counts[position])
+        digest.update(b''.join(columnNames[column] for column in countColumns))
+        digest.update(counts[position, countColumns].astype(np.float64).tobytes())
+        digests[seqID] = digest.hexdigest()
+    return digests
+
+def loadIncrementalState(incremental_, fingerprint, seqIDs, digests, logDecisions):
+    '''
+    function to read the state of the previous run and determine which sequences have changed input data
+    outcomes are not reused when the parameters changed, or when the order of previously analysed sequences changed, as the parent of a combination could become its child
+    decision records are only kept when logDecisions is set, in which case outcomes are not reused when the previous run did not keep them
+    '''
+    incrementalState = {'previousOutcomes': {}, 'previousRecords': {}, 'changedIDs': set(seqIDs), 'outcomes': {}, 'records': {} if logDecisions else None, 'reusedCount': 0, 'status': 'new'}
+    try:
+        with gzip.open(incremental_, 'rt') as stateFile:
+            previousState = json.load(stateFile)
+    except FileNotFoundError:
+        return incrementalState
+    except (OSError, ValueError):
+        incrementalState['status'] = 'unreadable'
+        return incrementalState
+    if previousState.get('version') != INCREMENTAL_STATE_VERSION or previousState['fingerprint'] != fingerprint:
+        incrementalState['status'] = 'parameters'
+        return incrementalState
+    previousDigests = previousState['digests']
+    previousOrder = [seqID for seqID in previousState['order'] if seqID in digests]
+    if previousOrder != [seqID for seqID in seqIDs if seqID in previousDigests]:
+        incrementalState['status'] = 'precedence'
+        return incrementalState
+    if logDecisions and previousState['records'] is None:
+        incrementalState['status'] = 'records'
+        return incrementalState
+    incrementalState['previousOutcomes'] = previousState['outcomes']
+    incrementalState['previousRecords'] = previousState['records'] or {}
+    incrementalState['changedIDs'] = {seqID for seqID in seqIDs if previousDigests.get(seqID) != digests[seqID]}
+    incrementalState['status'] = 'reused'
+    return incrementalState
+
+def saveIncrementalState(incremental_, incrementalState, fingerprint, seqIDs, digests, childParentComboDict):
+    '''
+    function to write the state of this run (parameters, sequence order and digests, outcome of every assessed combination, decision records when
+    written to '--log', and artefacts) for the next run
+    the state is written to a temporary file first, so that an interrupted run does not leave an incomplete state behind
+    '''
+    state = {
+        'version': INCREMENTAL_STATE_VERSION,
+        'fingerprint': fingerprint,
+        'order': seqIDs,
+        'digests': digests,
+        'childParentComboDict': childParentComboDict,
+        'outcomes': incrementalState['outcomes'],
+        'records': incrementalState['records'],
+    }
+    with gzip.open(f'{incremental_}.tmp', 'wt') as stateFile:
+        json.dump(state, stateFile)
+    os.replace(f'{incremental_}.tmp', incremental_)
+
+CHECKPOINT_VERSION = 2
+
+def checkpointFingerprint(parameters, seqIDs, digests):
+    '''
+    function to summarise the parameters, the order of the sequences, and the input data of every sequence in a single digest,
+    identifying the analysis a checkpoint belongs to
+    '''
+    fingerprint = hashlib.blake2b(digest_size = 16)
+    fingerprint.update(json.dumps([parameters, seqIDs, [digests[seqID] for seqID in seqIDs]]).encode())
+    return fingerprint.hexdigest()
+
+def saveCheckpoint(checkpoint_, fingerprint, nextParent, pairsDone, childParentComboDict, combinedDict, pseudogeneDict, decisionLog, pairState, loopCounters):
+    '''
+    function to write the state of the analysis after the last finished parent (artefacts, pseudogenes, decision log position, and counters)
+    the checkpoint is written to a temporary file and synced to disk before it replaces the previous checkpoint,
+    so that a run killed while writing always leaves a complete checkpoint behind
+    '''
+    decisionLogState = None
+    if decisionLog is not None:
+        decisionLog['handle'].flush()
+        os.fsync(decisionLog['handle'].fileno())
+        decisionLogState = {'file': decisionLog['file'], 'size': os.fstat(decisionLog['handle'].fileno()).st_size, 'childOrder': decisionLog['childOrder']}
+    state = {
+        'version': CHECKPOINT_VERSION,
+        'fingerprint': fingerprint,
+        'nextParent': nextParent,
+        'pairsDone': pairsDone,
+        'childParentComboDict': childParentComboDict,
+        'combinedDict': combinedDict,
+        'pseudogeneDict': pseudogeneDict,
+        'decisionLog': decisionLogState,
+        'counters': [after - before for after, before in zip(pairCounters(pairState), loopCounters)],
+        'incrementalOutcomes': pairState['incrementalState']['outcomes'] if pairState['incrementalState'] is not None else None,
+        'incrementalRecords': pairState['incrementalState']['records'] if pairState['incrementalState'] is not None else None,
+    }
+    with open(f'{checkpoint_}.tmp', 'wb') as rawFile:
+        with gzip.GzipFile(fileobj = rawFile, mode = 'wb', compresslevel = 1, mtime = 0) as checkpointFile:
+            checkpointFile.write(json.dumps(state).encode())
+        rawFile.flush()
+        os.fsync(rawFile.fileno())
+    os.replace(f'{checkpoint_}.tmp', checkpoint_)
+
+def loadCheckpoint(checkpoint_, fingerprint):
+    '''
+    function to read the checkpoint of an interrupted analysis, returns (state, 'resumed') or (None, reason) when the checkpoint cannot be used
+    '''
+    try:
+        with gzip.open(checkpoint_, 'rt') as checkpointFile:
+            state = json.load(checkpointFile)
+    except FileNotFoundError:
+        return None, 'missing'
+    except (OSError, ValueError):
+        return None, 'unreadable'
+    if state.get('version') != CHECKPOINT_VERSION or state['fingerprint'] != fingerprint:
+        return None, 'parameters'
+    decisionLogState = state['decisionLog']
+    if decisionLogState is not None and (not os.path.exists(decisionLogState['file']) or os.path.getsize(decisionLogState['file']) < decisionLogState['size']):
+        return None, 'decision log'
+    return state, 'resumed'
+
+def restoreCheckpoint(state, childParentComboDict, combinedDict, decisionLog, pairState):
+    '''
+    function to restore the artefacts, decision log, and counters of the finished parents from a checkpoint, returns the stored pseudogenes
+    '''
+    childParentComboDict.update(state['childParentComboDict'])
+    combinedDict.update(state['combinedDict'])
+    if decisionLog is not None:
+        decisionLog['childOrder'].update(state['decisionLog']['childOrder'])
+    counters = state['counters']
+    if pairState['kmerPrefilter'] is not None:
+        pairState['kmerPrefilter']['checkedCount'] += counters[0]
+        pairState['kmerPrefilter']['prunedCount'] += counters[1]
+    if pairState['similarityCache'] is not None:
+        pairState['similarityCache']['hits'] += counters[2]
+        pairState['similarityCache']['misses'] += counters[3]
+    if pairState['incrementalState'] is not None:
+        pairState['incrementalState']['reusedCount'] += counters[4]
+        pairState['incrementalState']['outcomes'].update(state['incrementalOutcomes'])
+        if pairState['incrementalState']['records'] is not None:
+            pairState['incrementalState']['records'].update(state['incrementalRecords'] or {})
+    return state['pseudogeneDict']
+
+def parameterSweepGrid(console, sweep_similarity_, sweep_occurrence_ratio_, sweep_detection_threshold_, similarity_, occurrence_ratio_, detection_threshold_):
+    '''
+    function to split the comma-separated '--sweep-*' values into lists, the regular parameter is used when no values are provided
+    '''
+    try:
+        similarities = sweep_similarity_.split(',') if sweep_similarity_ else [similarity_]
+        for similarity in similarities:
+            if similarity is not None:
+                int(similarity)
+        detectionThresholds = [int(detectionThreshold) for detectionThreshold in sweep_detection_threshold_.split(',')] if sweep_detection_threshold_ else [detection_threshold_]
+    except ValueError:
+        raise TombRaiderError("'--sweep-similarity' and '--sweep-detection-threshold' should be comma-separated integers")
+    occurrenceRatios = sweep_occurrence_ratio_.split(',') if sweep_occurrence_ratio_ else [occurrence_ratio_]
+    for occurrenceRatio in occurrenceRatios:
+        if occurrenceRatio is not None:
+            parseOccurrenceRatio(occurrenceRatio, console)
+    return similarities, occurrenceRatios, detectionThresholds
+
+def cooccurPasses(cooccurMatrix, occurrence_ratio_, parents, missingCounts, console):
+    '''
+    function to determine which parent-child combinations meet --occurrence-ratio, identical to cooccurIdentificationFunction for single combinations
+    '''
+    ratioMethod, ratioValue, ratioThreshold = parseOccurrenceRatio(occurrence_ratio_, console)
+    if ratioMethod == 'COUNT':
+        return missingCounts <= ratioThreshold
+    if ratioMethod == 'GLOBAL':
+        cooccurRatio = 1 - (missingCounts / cooccurMatrix['totalCount'])
+    else:
+        localCounts = cooccurMatrix['detectionCounts'][parents] + missingCounts
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            cooccurRatio = np.where(localCounts > 0, 1 - (missingCounts / localCounts), np.nan)
+    return ~(cooccurRatio < ratioThreshold)
+
+def sweepIdentity(pairState, parent, child, similarityFloor):
+    '''
+    function to calculate the sequence similarity of a parent-child combination for '--sweep-*', NaN when it cannot exceed similarityFloor
+    '''
+    seqIDs = pairState['seqIDs']
+    parentID = seqIDs[parent]
+    childID = seqIDs[child]
+    seqParent = pairState['seqInputDict'][parentID]
+    seqChild = pairState['seqInputDict'][childID]
+    kmerPrefilter = pairState['kmerPrefilter']
+    if kmerPrefilter is None or kmerIdentityUpperBound(kmerPrefilter, seqParent, seqChild, parentID, childID) > similarityFloor:
+        identity, _ = sequenceIdentity(pairState['console'], seqParent, seqChild, pairState['alignmentStore'], childID, parentID, pairState['calculate_pairwise_'], pairState['pairwise_alignment_'], similarityFloor, pairState['similarityCache'])
+        if identity is not None:
+            return identity
+    return np.nan
+
+def sweepParentBlock(pairState, sweepState, parentStart, parentEnd):
+    '''
+    function to find the first passing parent in parentStart:parentEnd of every child, for every combination of '--sweep-*' parameters
+    the taxonomic ID is shared by construction of the candidates and taxon quality does not depend on the parameters
+    the sequence similarity is only calculated for combinations that meet the co-occurrence pattern for at least one combination of parameters
+    returns per combination of parameters the passing children and their first passing parent in the block
+    '''
+    console = pairState['console']
+    parents, children = [], []
+    for parent in range(parentStart, parentEnd):
+        childCandidates = pairState['childCandidates'](pairState['candidateIndex'], parent)
+        parents.append(np.full(len(childCandidates), parent, dtype = np.int64))
+        children.append(np.asarray(childCandidates, dtype = np.int64))
+    parents = np.concatenate(parents)
+    children = np.concatenate(children)
+    taxonQuality = np.ones(len(parents), dtype = bool)
+    if sweepState['taxPidents'] is not None:
+        taxonQuality = ~(sweepState['taxPidents'][children] > sweepState['taxPidents'][parents])
+    needsIdentity = taxonQuality.copy()
+    cooccur = {}
+    if sweepState['cooccurMatrices']:
+        blockChildren = np.unique(children)
+        anyCooccur = np.zeros(len(parents), dtype = bool)
+        for detectionThreshold, cooccurMatrix in sweepState['cooccurMatrices'].items():
+            missingCounts = cooccurMissingCountBlock(cooccurMatrix, parentStart, parentEnd, blockChildren)[np.searchsorted(blockChildren, children), parents - parentStart]
+            for occurrenceRatio in sweepState['occurrenceRatios']:
+                cooccur[(occurrenceRatio, detectionThreshold)] = cooccurPasses(cooccurMatrix, occurrenceRatio, parents, missingCounts, console)
+                anyCooccur |= cooccur[(occurrenceRatio, detectionThreshold)]
+        needsIdentity &= anyCooccur
+    if sweepState['similarities'][0] is not None:
+        # combinations that cannot exceed the lowest similarity threshold fail for all thresholds and keep NaN
+        similarityFloor = min(int(similarity) for similarity in sweepState['similarities'])
+        identities = np.full(len(parents), np.nan)
+        for pair in np.flatnonzero(needsIdentity).tolist():
+            identities[pair] = sweepIdentity(pairState, parents[pair], children[pair], similarityFloor)
+    firstParents = {}
+    for similarity, occurrenceRatio, detectionThreshold in itertools.product(sweepState['similarities'], sweepState['occurrenceRatios'], sweepState['detectionThresholds']):
+        passMask = taxonQuality.copy()
+        if occurrenceRatio is not None:
+            passMask &= cooccur[(occurrenceRatio, detectionThreshold)]
+        if similarity is not None:
+            passMask &= identities > int(similarity)
+        passingPairs = np.flatnonzero(passMask)
+        passingChildren, firstPairs = np.unique(children[passingPairs], return_index = True)
+        firstParents[(similarity, occurrenceRatio, detectionThreshold)] = (passingChildren, parents[passingPairs[firstPairs]])
+    return firstParents
+
+_sweepWorkerState = None
+
+def _initSweepWorker(pairState, sweepState):
+    '''
+    initialise a worker process for '--sweep-*', the input data and co-occurrence arrays are inherited from the main process when forking
+    '''
+    global _sweepWorkerState
+    _initPairWorker(pairState)
+    _sweepWorkerState = sweepState
+
+def _sweepParentBlock(parentBlock):
+    '''
+    worker function running sweepParentBlock for a block of parents
+    returns the first passing parents, the similarity cache updates, and the counter increments
+    '''
+    pairState = _pairWorkerState
+    countersBefore = pairCounters(pairState)
+    firstParents = sweepParentBlock(pairState, _sweepWorkerState, *parentBlock)
+    similarityCache = pairState['similarityCache']
+    cacheUpdates = ([], [])
+    if similarityCache is not None:
+        cacheUpdates = (similarityCache['pending'], similarityCache['used'])
+        similarityCache['pending'] = []
+        similarityCache['used'] = []
+    return firstParents, cacheUpdates, tuple(after - before for after, before in zip(pairCounters(pairState), countersBefore))
+
+def sweepPairMetrics(pairState, frequencyTable, sampleMask, occurrence_type_, similarities, occurrenceRatios, detectionThresholds, taxon_quality_, progress_bar, pbar, threads_ = 1, pairs_per_block_ = 2 ** 20):
+    '''
+    function to identify the first (most abundant) passing parent of every child once for all combinations of '--sweep-*' parameters
+    parents are assessed in blocks, over threads_ worker processes when threads_ > 1, so that only the first passing parents are kept in memory
+    '''
+    console = pairState['console']
+    seqIDs = pairState['seqIDs']
+    sweepState = {
+        'similarities': similarities,
+        'occurrenceRatios': occurrenceRatios,
+        'detectionThresholds': detectionThresholds,
+        'taxPidents': np.array([pairState['taxPidentInputDict'][seqID][0] for seqID in seqIDs], dtype = np.float64) if taxon_quality_ else None,
+        'cooccurMatrices': {detectionThreshold: cooccurToMatrix(frequencyTable, sampleMask, detectionThreshold, occurrence_type_, occurrenceRatios[0], console) for detectionThreshold in detectionThresholds} if occurrenceRatios[0] is not None else {},
+    }
+    # blocks do not exceed the block size of the co-occurrence calculation, so that missingCount is calculated once per block
+    parentBlocks = candidateParentBlocks(pairState, 0, pairs_per_block_, 256)
+    firstParents = {parameters: np.full(len(seqIDs), -1, dtype = np.int64) for parameters in itertools.product(similarities, occurrenceRatios, detectionThresholds)}
+    progress_bar.update(pbar, total = len(parentBlocks))
+    with contextlib.ExitStack() as stack:
+        if threads_ > 1 and len(parentBlocks) > 1:
+            pool = stack.enter_context(multiprocessing.get_context('fork').Pool(threads_, initializer = _initSweepWorker, initargs = (pairState, sweepState)))
+            blockOutcomes = pool.imap(_sweepParentBlock, parentBlocks)
+        else:
+            blockOutcomes = ((sweepParentBlock(pairState, sweepState, *parentBlock), None, None) for parentBlock in parentBlocks)
+        for position, (blockFirstParents, cacheUpdates, counterIncrements) in enumerate(blockOutcomes, start = 1):
+            if counterIncrements is not None:
+                addPairCounters(pairState, counterIncrements)
+                if pairState['similarityCache'] is not None:
+                    addSimilarityCacheUpdates(pairState['similarityCache'], cacheUpdates)
+            # blocks are in parent order, hence children keep the first passing parent of the earliest block
+            for parameters, (passingChildren, passingParents) in blockFirstParents.items():
+                unassigned = firstParents[parameters][passingChildren] < 0
+                firstParents[parameters][passingChildren[unassigned]] = passingParents[unassigned]
+            progress_bar.update(pbar, completed = position)
+    # write the calculated similarities, so that the analysis of the selected parameters (including worker processes) can reuse them
+    if pairState['similarityCache'] is not None:
+        flushSimilarityCache(pairState['similarityCache'])
+    return {'firstParents': firstParents}
+
+def sweepAssignments(metrics, seqCount, similarity_, occurrence_ratio_, detection_threshold_):
+    '''
+    function to replay the assignment of artefacts for one combination of parameters from the first passing parents of sweepPairMetrics
+    children follow their parents, so the first passing parent of a child is replaced by the grandparent when that parent is identified
+    as a child itself, as in recordArtefact
+    returns the root parent position of every sequence (-1 when not an artefact)
+    '''
+    firstParents = metrics['firstParents'][(similarity_, occurrence_ratio_, detection_threshold_)]
+    rootParents = np.full(seqCount, -1, dtype = np.int64)
+    for child in np.flatnonzero(firstParents >= 0).tolist():
+        parent = firstParents[child]
+        rootParents[child] = rootParents[parent] if rootParents[parent] >= 0 else parent
+    return rootParents
+
+def writeParameterSweep(sweep_output_, metrics, seqCount, similarities, occurrenceRatios, detectionThresholds, pseudogeneDict, seqIDs):
+    '''
+    function to write the number of artefacts, parents, and remaining sequences for every combination of parameters as a tab-separated table
+    '''
+    pseudogenes = np.zeros(seqCount, dtype = bool)
+    pseudogenes[[position for position, seqID in enumerate(seqIDs) if seqID in pseudogeneDict]] = True
+    with open(sweep_output_, 'w') as sweepoutfile:
+        sweepoutfile.write('similarity\toccurrence ratio\tdetection threshold\tartefacts\tartefacts (%)\tparents\tremaining seqs\n')
+        for similarity, occurrenceRatio, detectionThreshold in itertools.product(similarities, occurrenceRatios, detectionThresholds):
+            rootParents = sweepAssignments(metrics, seqCount, similarity, occurrenceRatio, detectionThreshold)
+            artefacts = rootParents >= 0
+            artefactCount = int(artefacts.sum())
+            parentCount = len(np.unique(rootParents[artefacts]))
+            remainingCount = int((~artefacts & ~pseudogenes).sum())
+            sweepoutfile.write(f'{similarity}\t{occurrenceRatio}\t{detectionThreshold}\t{artefactCount}\t{float("{:.2f}".format(artefactCount / seqCount * 100)) if seqCount else 0.0}\t{parentCount}\t{remainingCount}\n')
+
+# input files used to estimate the size of a dataset in a batch
+BATCH_INPUT_OPTIONS = ('frequency-input', 'sequence-input', 'taxonomy-input', 'alignment-input', 'blast-input', 'bold-input', 'sintax-input', 'idtaxa-input')
+
+def readBatchManifest(batch_, console):
+    '''
+    function to read the datasets of a batch and their options from a tab-separated manifest (header of option names, one dataset per line)
+    or a YAML manifest (a list of datasets, or datasets by name), returns a list of (name, options) in manifest order
+    '''
+    try:
+        if batch_.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise TombRaiderError("a YAML '--batch' manifest requires PyYAML ('pip install pyyaml')") from None
+            with open(batch_) as manifestFile:
+                manifest = yaml.safe_load(manifestFile)
+            if isinstance(manifest, dict) and 'datasets' in manifest:
+                manifest = manifest['datasets']
+            if isinstance(manifest, dict):
+                manifest = [{'name': name, **(options or {})} for name, options in manifest.items()]
+        else:
+            with open(batch_) as manifestFile:
+                manifestLines = [line.rstrip('\r\n').split('\t') for line in manifestFile if line.strip() and not line.startswith('#')]
+            manifest = [{key: value for key, value in zip(manifestLines[0], line) if value != ''} for line in manifestLines[1:]] if manifestLines else []
+    except TombRaiderError:
+        raise
+    except Exception as e:
+        raise TombRaiderError(f"'--batch' manifest {batch_} could not be read ({e})")
+    if not isinstance(manifest, list) or not manifest or not all(isinstance(dataset, dict) for dataset in manifest):
+        raise TombRaiderError(f"'--batch' manifest {batch_} does not list any datasets")
+    batch = []
+    for position, dataset in enumerate(manifest, start = 1):
+        name = str(dataset.get('name', f'dataset{position}'))
+        batch.append((name, {str(key).lstrip('-'): value for key, value in dataset.items() if key != 'name'}))
+    duplicateNames = [name for name, count in collections.Counter(name for name, _ in batch).items() if count > 1]
+    if duplicateNames:
+        raise TombRaiderError(f"'--batch' manifest {batch_} lists dataset names more than once ({', '.join(duplicateNames)})")
+    return batch
+
+def batchArguments(command, name, options, console):
+    '''
+    function to convert the options of a dataset into command line arguments, flags are included when set to 'true', 'yes', or 1
+    '''
+    flags = {option: getattr(param, 'is_flag', False) for param in command.params for option in param.opts if option.startswith('--')}
+    arguments = []
+    for key, value in options.items():
+        option = f'--{key}'
+        if option not in flags or option in ['--batch', '--help']:
+            raise TombRaiderError(f"'{key}' of dataset {name} is not a tombRaider option")
+        if not flags[option]:
+            arguments.extend([option, str(value)])
+        elif str(value).lower() in ['true', 'yes', '1']:
+            arguments.append(option)
+        elif str(value).lower() not in ['false', 'no', '0']:
+            raise TombRaiderError(f"'{key}' of dataset {name} should be 'true' or 'false'")
+    return arguments
+
+def batchDatasetSize(options):
+    '''
+    function to estimate the size of a dataset from the size of its input files, used to start the largest datasets first
+    '''
+    return sum(os.path.getsize(str(options[key])) for key in BATCH_INPUT_OPTIONS if key in options and os.path.isfile(str(options[key])))
+
+def runBatchDataset(command, name, arguments, consoleOutputFile):
+    '''
+    function to run tombRaider for a single dataset of a batch, writing the terminal output of the dataset to consoleOutputFile
+    a failing dataset (error message and exit, or an exception) does not stop the batch
+    the arguments of the dataset are passed on as the context object, so that its log file records the dataset's own command
+    returns the name, status, summary statistics (None when failed), and wall time of the dataset
+    '''
+    startTime = time.perf_counter()
+    summary = None
+    with open(consoleOutputFile, 'w') as consoleFile, contextlib.redirect_stderr(consoleFile), contextlib.redirect_stdout(consoleFile):
+        try:
+            summary = command.main(args = arguments, prog_name = 'tombRaider', standalone_mode = False, obj = {'arguments': arguments})
+        except SystemExit:
+            pass
+        except Exception:
+            traceback.print_exc()
+    status = 'completed' if isinstance(summary, dict) else 'failed'
+    return name, status, summary if status == 'completed' else None, time.perf_counter() - startTime
+
+_batchWorkerCommand = None
+
+def _initBatchWorker(command):
+    '''
+    initialise a batch worker process, the imported modules and command are inherited from the main process when forking
+    '''
+    global _batchWorkerCommand
+    _batchWorkerCommand = command
+
+def _runBatchJob(job):
+    '''
+    worker function running a single dataset of a batch, returns its position in the manifest with the outcome
+    '''
+    position, name, arguments, consoleOutputFile = job
+    return position, runBatchDataset(_batchWorkerCommand, name, arguments, consoleOutputFile)
+
+def batchJobs(command, batch, batch_, threads_, console):
+    '''
+    function to convert all datasets of a batch into jobs (position in the manifest, name, arguments, terminal output file), largest datasets first
+    every worker process runs a single dataset on a single thread when running more than one dataset at a time
+    '''
+    manifestStem = os.path.splitext(batch_)[0]
+    jobs = []
+    for position, (name, options) in enumerate(batch):
+        arguments = batchArguments(command, name, options, console)
+        if threads_ > 1:
+            arguments.extend(['--threads', '1'])
+        jobs.append((position, name, arguments, f'{manifestStem}.{name}.console'))
+    jobs.sort(key = lambda job: -batchDatasetSize(batch[job[0]][1]))
+    return jobs
+
+def runBatch(command, jobs, threads_):
+    '''
+    generator running the jobs of a batch in this process, or over threads_ worker processes in the order of the jobs
+    a worker process is replaced after every dataset, so that the memory of a dataset is released when it completes
+    yields the position in the manifest and outcome of runBatchDataset for every dataset as it completes
+    '''
+    if threads_ == 1:
+        for position, name, arguments, consoleOutputFile in jobs:
+            yield position, runBatchDataset(command, name, arguments, consoleOutputFile)
+        return
+    with multiprocessing.get_context('fork').Pool(threads_, initializer = _initBatchWorker, initargs = (command,), maxtasksperchild = 1) as pool:
+        for position, outcome in pool.imap_unordered(_runBatchJob, jobs, chunksize = 1):
+            yield position, outcome
+
+def writeBatchSummary(batchSummaryFile, batchOutcomes):
+    '''
+    function to write the status, number of sequences, artefacts, pseudogenes, and wall time of every dataset of a batch as a tab-separated table
+    '''
+    with open(batchSummaryFile, 'w') as summaryoutfile:
+        summaryoutfile.write('dataset\tstatus\ttotal seqs\tartefacts\tpseudogenes\tseconds\n')
+        for name, status, summary, seconds in batchOutcomes:
+            summary = summary or {}
+            summaryoutfile.write(f'{name}\t{status}\t{summary.get("total seqs", "")}\t{summary.get("artefacts", "")}\t{summary.get("pseudogenes", "")}\t{seconds:.2f}\n')
+
+class _RecordingConsole:
+    '''
+    console used by identifyArtefacts when no console is provided, messages are kept rather than printed
+    '''
+    def __init__(self):
+        self.messages = []
+
+    def print(self, message = '', *args, **kwargs):
+        self.messages.append(plainMessage(message))
+
+class _SilentProgress:
+    '''
+    progress bar used by identifyArtefacts when no console is provided
+    '''
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def add_task(self, *args, **kwargs):
+        return None
+
+    def update(self, *args, **kwargs):
+        pass
+
+def plainMessage(message):
+    '''
+    function to remove the console markup and alignment from a message, e.g., '|   WARNING | message' becomes 'WARNING: message'
+    '''
+    message = ' '.join(re.sub(r'\[/?(?:cyan|bold yellow|yellow|bold)?\]', '', str(message)).split())
+    label, separator, text = message.lstrip('|').partition(' | ')
+    return f'{label.strip()}: {text}' if separator else message
+
+def progressBar(console):
+    '''
+    function to return a progress bar showing on the console, rich is only imported when a console is used
+    '''
+    if console is None or isinstance(console, _RecordingConsole):
+        return _SilentProgress()
+    import rich.progress
+    return rich.progress.Progress(*rich.progress.Progress.get_default_columns(), rich.progress.TimeElapsedColumn())
+
+CRITERIA = {
+    'TAXID' : 'taxID',
+    'SEQSIM' : 'seqSim',
+    'COOCCUR' : 'coOccur',
+    'PSEUDOGENE' : 'pseudogene',
+}
+
+def parseCriteria(criteria_, console):
+    '''
+    function to split --criteria into the included criteria, returns a dictionary of the included criteria (upper case) as provided
+    '''
+    providedCriteria = {}
+    unidentifiedCriteria = []
+    try:
+        for crit in criteria_.rstrip(';').split(';'):
+            if crit.upper() not in CRITERIA:
+                if crit != '':
+                    unidentifiedCriteria.append(crit)
+            else:
+                providedCriteria[crit.upper()] = crit
+    except AttributeError:
+        raise TombRaiderError("parameter '--criteria' not provided")
+    if len(unidentifiedCriteria) != 0:
+        raise TombRaiderError(f"unidentified criteria found ({', '.join(unidentifiedCriteria)})")
+    if len(providedCriteria) == 0:
+        raise TombRaiderError("0 provided criteria identified")
+    return providedCriteria
+
+def identifyArtefacts(frequencyTable, seqInputDict = None, taxIdInputDict = None, taxPidentInputDict = None, alignmentStore = None, criteria_ = 'taxID;seqSim;coOccur', similarity_ = None, occurrence_type_ = None, occurrence_ratio_ = None, detection_threshold_ = 1, exclude_ = None, taxon_quality_ = False, orf_ = None, genetic_code_ = 1, gap_aware_ = False, all_frames_ = False, calculate_pairwise_ = False, pairwise_alignment_ = 'global', remove_artefacts_ = False, kmer_prefilter_ = False, kmer_size_ = 6, verify_prefilter_ = False, similarity_cache_ = None, similarity_cache_size_ = 10000000, threads_ = 1, incremental_ = None, checkpoint_ = None, checkpoint_interval_ = 600, resume_ = False, sweep_output_ = None, sweep_similarity_ = None, sweep_occurrence_ratio_ = None, sweep_detection_threshold_ = None, log_ = None, profile = None, console = None):
+    '''
+    function to identify artefacts and pseudogenes from input data in memory, the parameters are the tombRaider options
+    frequencyTable is a DataFrame with sequences as rows in order of decreasing abundance (see sortFrequencyTable), seqInputDict maps sequence IDs to sequences,
+    taxIdInputDict and taxPidentInputDict map sequence IDs to lists of taxonomic IDs and scores, and alignmentStore is built by alignmentToMemory or alignmentStoreFromSequences
+    returns a dictionary with the artefacts (childParentComboDict: child to parent, combinedDict: parent to children), pseudogenes (pseudogeneDict),
+    the merged frequency table (frequencyTable), and the counts reported by tombRaider
+    without a console, nothing is printed, warnings are returned ('messages') and errors are raised as TombRaiderError rather than exiting
+    '''
+    if console is not None:
+        return _identifyArtefacts(**locals())
+    console = _RecordingConsole()
+    results = _identifyArtefacts(**{**locals(), 'console': console})
+    results['messages'] = console.messages
+    # the decision log is only rendered by the command line, the streamed records are complete once the handle is closed
+    if results['decisionLog'] is not None:
+        results['decisionLog']['handle'].close()
+    return results
+
+def _identifyArtefacts(frequencyTable, seqInputDict, taxIdInputDict, taxPidentInputDict, alignmentStore, criteria_, similarity_, occurrence_type_, occurrence_ratio_, detection_threshold_, exclude_, taxon_quality_, orf_, genetic_code_, gap_aware_, all_frames_, calculate_pairwise_, pairwise_alignment_, remove_artefacts_, kmer_prefilter_, kmer_size_, verify_prefilter_, similarity_cache_, similarity_cache_size_, threads_, incremental_, checkpoint_, checkpoint_interval_, resume_, sweep_output_, sweep_similarity_, sweep_occurrence_ratio_, sweep_detection_threshold_, log_, profile, console):
+    '''
+    function identifying artefacts and pseudogenes for identifyArtefacts, printing to console and exiting on errors
+    '''
+    providedCriteria = parseCriteria(criteria_, console)
+    neededInputForCriteria = {
+        'TAXID' : {'taxIdInputDict' : taxIdInputDict},
+        'SEQSIM' : {'seqInputDict' : seqInputDict, 'similarity_' : similarity_},
+        'COOCCUR' : {'occurrence_type_' : occurrence_type_, 'occurrence_ratio_' : occurrence_ratio_},
+        'PSEUDOGENE' : {'alignmentStore' : alignmentStore, 'orf_' : orf_ or all_frames_},
+    }
+    missingInput = [name for criteria in providedCriteria for name, value in neededInputForCriteria[criteria].items() if value is None or value is False]
+    if len(missingInput) > 0:
+        raise TombRaiderError(f"{', '.join(missingInput)} not provided")
+    if taxon_quality_ and 'TAXID' in providedCriteria and taxPidentInputDict is None:
+        raise TombRaiderError("taxPidentInputDict not provided")
+    seqInputDict = seqInputDict if seqInputDict is not None else {}
+
+    # get list of samples and exclude if exclude_ != None, as a column mask rather than a copy of the frequency table
+    sampleMask = removeNegativeSamples(exclude_, frequencyTable, console)
+
+    # identify pseudogenes for all sequences at once before assessing parent-child combinations
+    pseudogeneDict = {}
+    if 'PSEUDOGENE' in providedCriteria:
+        if genetic_code_ not in GENETIC_CODE_STOP_CODONS:
+            raise TombRaiderError(f"'--genetic-code' should be one of {', '.join(str(code) for code in GENETIC_CODE_STOP_CODONS)}")
+        stageStart = time.perf_counter()
+        pseudogeneDict = pseudogeneIdentificationFunction(alignmentStore, orf_, genetic_code_, gap_aware_, all_frames_)
+        recordStage(profile, 'identifying pseudogenes', stageStart)
+
+    # set all functions before the for loop so that there is no need to check if-statements multiple times
+    stageStart = time.perf_counter()
+    # only generate parent-child candidates sharing a taxonomic ID when 'taxID' is included in the criteria
+    # calculate number of unique combinations for progress bar (x = ((n * n) - n) / 2)
+    uniqueCombinations = allCandidateIndex(frequencyTable)['candidateCount']
+    if 'TAXID' in providedCriteria:
+        taxidIdentification = taxidIdentificationFunction
+        candidateIndex = taxidCandidateIndex(taxIdInputDict, frequencyTable)
+        childCandidates = taxidChildCandidates
+    else:
+        candidateIndex = allCandidateIndex(frequencyTable)
+        childCandidates = allChildCandidates
+        taxidIdentification = passingFunction
+        taxon_quality_ = None
+    if taxon_quality_:
+        taxqualIdentification = taxqualIdentificationFunction
+    else:
+        taxqualIdentification = passingFunction
+    cooccurMatrix = None
+    if 'COOCCUR' in providedCriteria:
+        cooccurIdentification = cooccurIdentificationFunction
+        cooccurMatrix = cooccurToMatrix(frequencyTable, sampleMask, detection_threshold_, occurrence_type_, occurrence_ratio_, console)
+    else:
+        cooccurIdentification = passingFunction
+    if 'SEQSIM' in providedCriteria:
+        seqsimIdentification = seqSimIdentificationFunction
+    else:
+        seqsimIdentification = passingFunction
+    similarityCache = None
+    if similarity_cache_ and 'SEQSIM' in providedCriteria and (alignmentStore is None or calculate_pairwise_):
+        similarityCache = openSimilarityCache(similarity_cache_, similarity_cache_size_, console)
+    # the parameter sweep aligns all combinations, a temporary cache passes the sequence similarity on to the analysis of the selected parameters
+    sweepCacheFile = None
+    if sweep_output_ and similarityCache is None and 'SEQSIM' in providedCriteria and (alignmentStore is None or calculate_pairwise_):
+        sweepCacheHandle, sweepCacheFile = tempfile.mkstemp(suffix = '.sqlite')
+        os.close(sweepCacheHandle)
+        similarityCache = openSimilarityCache(sweepCacheFile, similarity_cache_size_, console)
+    kmerPrefilter = None
+    kmerPrefilterIdentification = passingFunction
+    if kmer_prefilter_ and 'SEQSIM' in providedCriteria:
+        if kmer_size_ < 1 or kmer_size_ > 8:
+            raise TombRaiderError("'--kmer-size' should be between 1 and 8")
+        if pairwise_alignment_ in ['local', 'local-legacy'] and (alignmentStore is None or calculate_pairwise_):
+            console.print(f"[cyan]|             WARNING[/] | [bold yellow]--kmer-prefilter does not apply to local alignments, not using k-mer prefilter...[/]")
+        else:
+            kmerPrefilter = kmerPrefilterProfiles(seqInputDict, kmer_size_, verify_prefilter_)
+            kmerPrefilterIdentification = kmerPrefilterFunction
+    # blocks of co-occurrence and alignment lookups only hold the candidate children of their parents when candidates share a taxonomic ID
+    for blockLookup in (cooccurMatrix, alignmentStore):
+        if blockLookup is not None:
+            blockLookup.update({'candidateIndex': candidateIndex if 'TAXID' in providedCriteria else None, 'blockStart': None, 'blockEnd': None, 'block': None, 'blockChildren': None})
+    recordStage(profile, 'preparing criteria', stageStart)
+
+    # check number of worker processes, forking is required to share the input data with the worker processes
+    if threads_ < 1:
+        raise TombRaiderError("'--threads' should be 1 or higher")
+    if threads_ > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        console.print(f"[cyan]|             WARNING[/] | [bold yellow]--threads requires the 'fork' start method, which is not available on this platform, running on a single thread...[/]")
+        threads_ = 1
+    if threads_ > 1 and profile is not None:
+        console.print(f"[cyan]|             WARNING[/] | [bold yellow]--profile only records per-criterion counts on a single thread, omitting taxID, taxon quality, coOccur, and seqSim from the profile...[/]")
+
+    # record timings and pass/fail counts per criterion when profiling, criteria assessed in worker processes are not recorded
+    if threads_ == 1:
+        taxidIdentification = profiledFunction(profile, 'taxID', taxidIdentification)
+        taxqualIdentification = profiledFunction(profile, 'taxon quality', taxqualIdentification)
+        cooccurIdentification = profiledFunction(profile, 'coOccur', cooccurIdentification)
+        kmerPrefilterIdentification = profiledFunction(profile, 'k-mer prefilter', kmerPrefilterIdentification)
+        seqsimIdentification = profiledFunction(profile, 'seqSim', seqsimIdentification)
+
+    # collect the criteria and their input data, so that parent-child combinations can be assessed in worker processes
+    pairState = {
+        'console': console,
+        'seqIDs': frequencyTable.index.tolist(),
+        'candidateIndex': candidateIndex,
+        'childCandidates': childCandidates,
+        'taxidIdentification': taxidIdentification,
+        'taxqualIdentification': taxqualIdentification,
+        'cooccurIdentification': cooccurIdentification,
+        'kmerPrefilterIdentification': kmerPrefilterIdentification,
+        'seqsimIdentification': seqsimIdentification,
+        'taxIdInputDict': taxIdInputDict,
+        'taxPidentInputDict': taxPidentInputDict,
+        'cooccurMatrix': cooccurMatrix,
+        'kmerPrefilter': kmerPrefilter,
+        'seqInputDict': seqInputDict,
+        'alignmentStore': alignmentStore,
+        'calculate_pairwise_': calculate_pairwise_,
+        'pairwise_alignment_': pairwise_alignment_,
+        'similarity_': similarity_,
+        'similarityCache': similarityCache,
+        'incrementalState': None,
+        'evaluatePair': evaluateParentChild,
+    }
+
+    # in incremental mode, reuse the outcome of combinations for which the input data of both sequences is unchanged since the previous run
+    # the parameters and input data also identify the analysis a checkpoint belongs to
+    if resume_ and not checkpoint_:
+        raise TombRaiderError("'--resume' requires '--checkpoint'")
+    if incremental_ or checkpoint_:
+        stageStart = time.perf_counter()
+        incrementalFingerprint = {
+            'criteria': sorted(providedCriteria),
+            'similarity': similarity_,
+            'pairwise alignment': pairwise_alignment_,
+            'alignment input': alignmentStore is not None and not calculate_pairwise_,
+            'occurrence type': occurrence_type_,
+            'occurrence ratio': occurrence_ratio_,
+            'detection threshold': detection_threshold_,
+            'taxon quality': bool(taxon_quality_),
+            'k-mer prefilter': kmer_size_ if kmerPrefilter else None,
+            # the global co-occurrence ratio depends on the total number of sequences
+            'total seqs': len(frequencyTable) if occurrence_ratio_ and occurrence_ratio_.split(';')[0].upper() == 'GLOBAL' else None,
+        }
+        incrementalDigest = incrementalDigests(frequencyTable, sampleMask, detection_threshold_, seqInputDict, taxIdInputDict, taxPidentInputDict, alignmentStore)
+        recordStage(profile, 'calculating input digests', stageStart)
+    if incremental_:
+        stageStart = time.perf_counter()
+        incrementalState = loadIncrementalState(incremental_, incrementalFingerprint, pairState['seqIDs'], incrementalDigest, log_ is not None)
+        incrementalWarnings = {
+            'unreadable': f'--incremental {incremental_} could not be read',
+            'parameters': 'parameters changed since the previous run',
+            'precedence': 'sorting changed the order of previously analysed sequences',
+            'records': "the previous run did not write '--log'",
+        }
+        if incrementalState['status'] in incrementalWarnings:
+            console.print(f"[cyan]|             WARNING[/] | [bold yellow]{incrementalWarnings[incrementalState['status']]}, assessing all combinations...[/]")
+        pairState['incrementalState'] = incrementalState
+        pairState['evaluatePair'] = incrementalPairEvaluation
+        recordStage(profile, 'loading incremental state', stageStart)
+
+    # calculate the metrics of all combinations once and replay the identification of artefacts for every combination of '--sweep-*' parameters
+    if sweep_output_:
+        stageStart = time.perf_counter()
+        # values for criteria that are not included do not affect the analysis and are not swept
+        sweepGrid = parameterSweepGrid(console, sweep_similarity_ if 'SEQSIM' in providedCriteria else None, sweep_occurrence_ratio_ if 'COOCCUR' in providedCriteria else None, sweep_detection_threshold_ if 'COOCCUR' in providedCriteria else None, similarity_ if 'SEQSIM' in providedCriteria else None, occurrence_ratio_ if 'COOCCUR' in providedCriteria else None, detection_threshold_)
+        with progressBar(console) as progress_bar:
+            pbar = progress_bar.add_task(console = console, description = "[cyan]|     Parameter sweep[/] |", total = None)
+            try:
+                sweepMetrics = sweepPairMetrics(pairState, frequencyTable, sampleMask, occurrence_type_, *sweepGrid, taxon_quality_, progress_bar, pbar, threads_)
+            except KeyError as k:
+                raise TombRaiderError(str(k)) from None
+        writeParameterSweep(sweep_output_, sweepMetrics, len(frequencyTable), *sweepGrid, pseudogeneDict, pairState['seqIDs'])
+        console.print(f"[cyan]|     Parameter Sweep[/] | [bold yellow]{len(sweepGrid[0]) * len(sweepGrid[1]) * len(sweepGrid[2])} combinations written to {sweep_output_}[/]")
+        recordStage(profile, 'parameter sweep', stageStart)
+
+    # read the checkpoint of an interrupted analysis with identical parameters and input data
+    checkpointState = None
+    if checkpoint_:
+        checkpointParameters = {
+            **incrementalFingerprint,
+            'included samples': frequencyTable.columns[sampleMask].tolist(),
+            'pseudogene': [orf_, genetic_code_, gap_aware_, all_frames_] if 'PSEUDOGENE' in providedCriteria else None,
+            'log': os.path.abspath(log_) if log_ else None,
+            'incremental': os.path.abspath(incremental_) if incremental_ else None,
+        }
+        checkpointDigest = checkpointFingerprint(checkpointParameters, pairState['seqIDs'], incrementalDigest)
+        if resume_:
+            checkpointState, checkpointStatus = loadCheckpoint(checkpoint_, checkpointDigest)
+            checkpointWarnings = {
+                'missing': f'--checkpoint {checkpoint_} not found',
+                'unreadable': f'--checkpoint {checkpoint_} could not be read',
+                'parameters': 'input files or parameters changed since the checkpoint was written',
+                'decision log': 'the decision log is shorter than recorded in the checkpoint',
+            }
+            if checkpointStatus in checkpointWarnings:
+                console.print(f"[cyan]|             WARNING[/] | [bold yellow]{checkpointWarnings[checkpointStatus]}, starting from the first parent...[/]")
+
+    # determine parent and child sequences
+    childParentComboDict = {}
+    combinedDict = collections.defaultdict(list)
+    decisionLog = openDecisionLog(log_, checkpointState['decisionLog']['size'] if checkpointState is not None and checkpointState['decisionLog'] is not None else None)
+    console.print(f"[cyan]|     Candidate Pairs[/] | [bold yellow]{candidateIndex['candidateCount']} of {uniqueCombinations} combinations[/]")
+    # counters before the analysis, so that checkpoints only store the counts of the analysed parents
+    loopCounters = pairCounters(pairState)
+    startParent = 0
+    pairsDone = 0
+    if checkpointState is not None:
+        pseudogeneDict = restoreCheckpoint(checkpointState, childParentComboDict, combinedDict, decisionLog, pairState)
+        startParent = checkpointState['nextParent']
+        pairsDone = checkpointState['pairsDone']
+        console.print(f"[cyan]|    Resumed Analysis[/] | [bold yellow]{startParent} of {len(frequencyTable)} parents restored from {checkpoint_}[/]")
+    # progress is only updated every progressInterval pairs to keep the overhead out of the inner loop
+    progressInterval = 10000
+    pairsSinceUpdate = 0
+    lastCheckpoint = time.perf_counter()
+    stageStart = time.perf_counter()
+    with progressBar(console) as progress_bar:
+        pbar = progress_bar.add_task(console = console, description = "[cyan]|  Identify artefacts[/] |", total=candidateIndex['candidateCount'])
+        progress_bar.update(pbar, advance=pairsDone)
+        # worker processes assess blocks of parents ahead of the main process, results are consumed in parent order
+        pairResults = None
+        if threads_ > 1:
+            pairResults = parallelPairEvaluation(pairState, childParentComboDict, decisionLog, threads_, startParent)
+        for parent in range(startParent, len(frequencyTable)):
+            parentID = frequencyTable.index[parent]
+            # checkpoint the analysis of all previous parents every checkpoint_interval_ seconds
+            if checkpoint_ and time.perf_counter() - lastCheckpoint >= checkpoint_interval_:
+                saveCheckpoint(checkpoint_, checkpointDigest, parent, pairsDone + pairsSinceUpdate, childParentComboDict, combinedDict, pseudogeneDict, decisionLog, pairState, loopCounters)
+                lastCheckpoint = time.perf_counter()
+            if pairResults is not None:
+                try:
+                    _, candidateCount, childResults = next(pairResults)
+                except KeyError as k:
+                    raise TombRaiderError(str(k)) from None
+                pairsSinceUpdate += candidateCount
+                if pairsSinceUpdate >= progressInterval:
+                    progress_bar.update(pbar, advance=pairsSinceUpdate)
+                    pairsDone += pairsSinceUpdate
+                    pairsSinceUpdate = 0
+                for child, childPassed, decisionRecords, counterIncrements in childResults:
+                    childID = frequencyTable.index[child]
+                    # 1. skip children identified for a more abundant sequence after the block was sent to the worker
+                    if childID in childParentComboDict:
+                        continue
+                    replayPairResult(pairState, decisionLog, childID, parentID, childPassed, decisionRecords, counterIncrements)
+                    if childPassed:
+                        recordArtefact(childParentComboDict, combinedDict, decisionLog, childID, parentID)
+                continue
+            for child in childCandidates(candidateIndex, parent):
+                childID = frequencyTable.index[child]
+                pairsSinceUpdate += 1
+                if pairsSinceUpdate == progressInterval:
+                    progress_bar.update(pbar, advance=pairsSinceUpdate)
+                    pairsDone += pairsSinceUpdate
+                    pairsSinceUpdate = 0
+                try:
+                    # 1. check if child already identified as child for a more abundant sequence, skip if yes
+                    if childID in childParentComboDict:
+                        continue
+                    # 2-5. check taxonomic ID, taxon quality, co-occurrence pattern, and sequence similarity
+                    if pairState['evaluatePair'](pairState, decisionLog, child, parent, childID, parentID) == False:
+                        continue
+                    # 6. record artefacts, merging or removing happens in one step after the analysis
+                    recordArtefact(childParentComboDict, combinedDict, decisionLog, childID, parentID)
+                except KeyError as k:
+                    raise TombRaiderError(str(k)) from None
+        progress_bar.update(pbar, advance=pairsSinceUpdate)
+        pairsDone += pairsSinceUpdate
+    recordStage(profile, 'identifying artefacts', stageStart)
+    # a final checkpoint allows later stages to be resumed without assessing any combination
+    if checkpoint_:
+        stageStart = time.perf_counter()
+        saveCheckpoint(checkpoint_, checkpointDigest, len(frequencyTable), pairsDone, childParentComboDict, combinedDict, pseudogeneDict, decisionLog, pairState, loopCounters)
+        recordStage(profile, 'saving checkpoint', stageStart)
+
+    closeSimilarityCache(similarityCache)
+    if sweepCacheFile:
+        os.remove(sweepCacheFile)
+    if incremental_:
+        stageStart = time.perf_counter()
+        saveIncrementalState(incremental_, pairState['incrementalState'], incrementalFingerprint, pairState['seqIDs'], incrementalDigest, childParentComboDict)
+        recordStage(profile, 'saving incremental state', stageStart)
+
+    # merge or discard artefacts and remove any pseudogenes that are in the data
+    stageStart = time.perf_counter()
+    frequencyTable = mergeArtefacts(frequencyTable, childParentComboDict, pseudogeneDict, remove_artefacts_)
+    recordStage(profile, 'merging artefacts', stageStart)
+    return {
+        'frequencyTable': frequencyTable,
+        'childParentComboDict': childParentComboDict,
+        'combinedDict': combinedDict,
+        'pseudogeneDict': pseudogeneDict,
+        'providedCriteria': providedCriteria,
+        'sampleMask': sampleMask,
+        'candidateCount': candidateIndex['candidateCount'],
+        'uniqueCombinations': uniqueCombinations,
+        'decisionLog': decisionLog,
+        'similarityCache': similarityCache,
+        'kmerPrefilter': kmerPrefilter,
+        'incrementalState': pairState['incrementalState'],
+    }
 
 def passingFunction(*args, **kwargs):
     '''
@@ -376,94 +2092,507 @@ def passingFunction(*args, **kwargs):
     '''
     pass
 
-def pseudogeneIdentificationFunction(alignmentInputDict, orf_, parentID, pseudogeneDict):
+def allCandidateIndex(frequencyTable):
+    '''
+    function to set up candidate generation over all parent-child combinations, with the number of child candidates of every parent
+    '''
+    totalCount = len(frequencyTable)
+    return {'size': totalCount, 'candidateCount': int(((totalCount * totalCount) - totalCount) / 2), 'childCounts': np.arange(totalCount - 1, -1, -1, dtype = np.int64)}
+
+def allChildCandidates(candidateIndex, parent):
+    '''
+    function to return all less abundant sequences as child candidates for a parent
+    '''
+    return range(parent + 1, candidateIndex['size'])
+
+def taxidCandidateIndex(taxIdInputDict, frequencyTable):
+    '''
+    function to build an inverted index from taxonomic ID to the sorted positions of the sequences in the frequency table
+    only sequences sharing a taxonomic ID with the parent need to be visited when 'taxID' is included in the criteria
+    the number of child candidates of every parent is counted once, to report the candidate combinations and plan blocks of parents
+    '''
+    taxidBuckets = collections.defaultdict(list)
+    parentTaxids = []
+    for position, seqID in enumerate(frequencyTable.index):
+        seqTaxids = list(dict.fromkeys(taxIdInputDict[seqID]))
+        parentTaxids.append(seqTaxids)
+        for taxID in seqTaxids:
+            taxidBuckets[taxID].append(position)
+    candidateIndex = {'size': len(frequencyTable), 'taxidBuckets': taxidBuckets, 'parentTaxids': parentTaxids}
+    candidateIndex['childCounts'] = np.array([taxidChildCount(candidateIndex, parent) for parent in range(candidateIndex['size'])], dtype = np.int64)
+    candidateIndex['candidateCount'] = int(candidateIndex['childCounts'].sum())
+    return candidateIndex
+
+def taxidChildCount(candidateIndex, parent):
     '''
-    function to read in a sequence and identify a stop codon based on the starting position
+    function to count the child candidates of a parent, only parents with multiple taxonomic IDs require merging their buckets
     '''
-    stop_codons = {"TAA", "TAG", "TGA"}
-    for i in range(orf_ - 1, len(alignmentInputDict[parentID]), 3):
-        codon = alignmentInputDict[parentID][i:i+3]
-        if codon in stop_codons:
-            pseudogeneDict[parentID] = 1
-            return pseudogeneDict
-    return pseudogeneDict
+    parentTaxids = candidateIndex['parentTaxids'][parent]
+    if len(parentTaxids) == 1:
+        bucket = candidateIndex['taxidBuckets'][parentTaxids[0]]
+        return len(bucket) - bisect.bisect_right(bucket, parent)
+    return len(taxidChildCandidates(candidateIndex, parent))
 
-def taxidIdentificationFunction(logDict, childID, parentID, taxIdInputDict):
+def taxidChildCandidates(candidateIndex, parent):
+    '''
+    function to return the less abundant sequences sharing at least one taxonomic ID with a parent, in abundance order
+    '''
+    parentTaxids = candidateIndex['parentTaxids'][parent]
+    taxidBuckets = candidateIndex['taxidBuckets']
+    if len(parentTaxids) == 1:
+        bucket = taxidBuckets[parentTaxids[0]]
+        return bucket[bisect.bisect_right(bucket, parent):]
+    bucketTails = [taxidBuckets[taxID][bisect.bisect_right(taxidBuckets[taxID], parent):] for taxID in parentTaxids]
+    return [child for child, _ in itertools.groupby(heapq.merge(*bucketTails))]
+
+# stop codons of the NCBI genetic codes (https://www.ncbi.nlm.nih.gov/Taxonomy/Utils/wprintgc.cgi), codes with context-dependent stop codons are not included
+GENETIC_CODE_STOP_CODONS = {
+    1: ('TAA', 'TAG', 'TGA'),
+    2: ('TAA', 'TAG', 'AGA', 'AGG'),
+    3: ('TAA', 'TAG'),
+    4: ('TAA', 'TAG'),
+    5: ('TAA', 'TAG'),
+    6: ('TGA',),
+    9: ('TAA', 'TAG'),
+    10: ('TAA', 'TAG'),
+    11: ('TAA', 'TAG', 'TGA'),
+    12: ('TAA', 'TAG', 'TGA'),
+    13: ('TAA', 'TAG'),
+    14: ('TAG',),
+    16: ('TAA', 'TGA'),
+    21: ('TAA', 'TAG'),
+    22: ('TCA', 'TAA', 'TGA'),
+    23: ('TTA', 'TAA', 'TAG', 'TGA'),
+    24: ('TAA', 'TAG'),
+    25: ('TAA', 'TAG'),
+    26: ('TAA', 'TAG', 'TGA'),
+    29: ('TGA',),
+    30: ('TGA',),
+    33: ('TAG',),
+}
+
+def _codonLookupTables(genetic_code_):
+    '''
+    function to generate the lookup tables translating alignment characters to nucleotide codes (A = 0, C = 1, G = 2, T/U = 3, other = 4)
+    and codon indices (16 * first + 4 * second + third, 64 for codons including other characters) to stop codons
+    '''
+    nucleotideCodes = np.full(256, 4, dtype = np.uint8)
+    for code, nucleotides in enumerate(['Aa', 'Cc', 'Gg', 'TtUu']):
+        for nucleotide in nucleotides:
+            nucleotideCodes[ord(nucleotide)] = code
+    stopCodons = np.zeros(65, dtype = bool)
+    for codon in GENETIC_CODE_STOP_CODONS[genetic_code_]:
+        stopCodons[sum(4 ** (2 - position) * 'ACGT'.index(nucleotide) for position, nucleotide in enumerate(codon))] = True
+    return nucleotideCodes, stopCodons
+
+def _frameStopCodons(codes, stopCodons):
+    '''
+    function to determine for every row of nucleotide codes (starting at the first codon position) whether it includes a stop codon
+    incomplete codons at the end of a row are not assessed
+    '''
+    codonCount = codes.shape[1] // 3
+    codons = codes[:, :codonCount * 3].reshape(len(codes), codonCount, 3).astype(np.int64)
+    codonIndex = np.where((codons == 4).any(axis = 2), 64, codons[:, :, 0] * 16 + codons[:, :, 1] * 4 + codons[:, :, 2])
+    return stopCodons[codonIndex].any(axis = 1)
+
+def _gapAwareCodes(alignmentRows, nucleotideCodes, frameStart):
+    '''
+    function to remove gaps from the alignment rows starting at frameStart, so that codons span gaps
+    residues before the first codon position of a row (based on the alignment column of its first residue) are skipped,
+    hence leading gaps do not shift the reading frame, while indels within a sequence that are not a multiple of three do
+    '''
+    residues = (alignmentRows[:, frameStart:] != ord('-')) & (alignmentRows[:, frameStart:] != ord('.'))
+    # stable sorting moves the residues to the front of every row while keeping their order
+    residueOrder = np.argsort(~residues, axis = 1, kind = 'stable')
+    codes = np.take_along_axis(nucleotideCodes[alignmentRows[:, frameStart:]], residueOrder, axis = 1)
+    residueCounts = residues.sum(axis = 1)
+    skippedResidues = (3 - residues.argmax(axis = 1) % 3) % 3
+    positions = skippedResidues[:, None] + np.arange(codes.shape[1])
+    shiftedCodes = np.take_along_axis(codes, np.minimum(positions, codes.shape[1] - 1), axis = 1)
+    shiftedCodes[positions >= residueCounts[:, None]] = 4
+    return shiftedCodes
+
+def pseudogeneIdentificationFunction(alignmentStore, orf_, genetic_code_, gap_aware_, all_frames_):
+    '''
+    function to identify pseudogenes as sequences including a stop codon for the selected genetic code, calculated for all sequences at once
+    the reading frame starts at alignment column orf_, or sequences need to include a stop codon in all three reading frames when all_frames_ is set
+    returns a dictionary of pseudogenes in --frequency-input order
+    '''
+    nucleotideCodes, stopCodons = _codonLookupTables(genetic_code_)
+    matrix = alignmentStore['matrix']
+    scanRows = alignmentStore['scanRows']
+    # a row of -1 (sequence not in the alignment) or an out-of-range reading frame would index from the end of the alignment
+    if not all_frames_ and not (isinstance(orf_, (int, np.integer)) and 1 <= orf_ <= matrix.shape[1]):
+        raise TombRaiderError(f"'--orf' should be an alignment position between 1 and {matrix.shape[1]}")
+    if len(scanRows) > 0 and (scanRows.min() < 0 or scanRows.max() >= matrix.shape[0]):
+        seqIDs = list(alignmentStore['scanPositions'])
+        raise TombRaiderError(f"sequences not found in the alignment ({', '.join(seqIDs[position] for position in np.flatnonzero((scanRows < 0) | (scanRows >= matrix.shape[0])))})")
+    frameStarts = [0, 1, 2] if all_frames_ else [orf_ - 1]
+    pseudogenes = np.zeros(len(scanRows), dtype = bool)
+    chunkSize = max(1, 2 ** 22 // max(1, matrix.shape[1]))
+    for chunkStart in range(0, len(scanRows), chunkSize):
+        alignmentRows = np.asarray(matrix[scanRows[chunkStart:chunkStart + chunkSize]])
+        frameStops = np.ones(len(alignmentRows), dtype = bool)
+        for frameStart in frameStarts:
+            if gap_aware_:
+                codes = _gapAwareCodes(alignmentRows, nucleotideCodes, frameStart)
+            else:
+                codes = nucleotideCodes[alignmentRows[:, frameStart:]]
+            frameStops &= _frameStopCodons(codes, stopCodons)
+        pseudogenes[chunkStart:chunkStart + chunkSize] = frameStops
+    seqIDs = list(alignmentStore['scanPositions'])
+    return {seqIDs[position]: 1 for position in np.flatnonzero(pseudogenes)}
+
+def taxidIdentificationFunction(decisionLog, childID, parentID, taxIdInputDict):
     '''
     '''
     taxIDparent = taxIdInputDict[parentID]
     taxIDchild = taxIdInputDict[childID]
     if set(taxIDparent) & set(taxIDchild):
-        logDict[childID][parentID].append(f'taxonomic IDs are matching between {parentID} and {childID} ({list(set(taxIdInputDict[parentID]) & set(taxIdInputDict[childID]))[0]}), continuing inspection')
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, 'taxID', next(taxID for taxID in taxIDparent if taxID in taxIDchild), '', 'pass')
         return True
     return False
 
-def taxqualIdentificationFunction(logDict, childID, parentID, taxPidentInputDict):
+def taxqualIdentificationFunction(decisionLog, childID, parentID, taxPidentInputDict):
     '''
     '''
     taxPidentChild = taxPidentInputDict[childID][0]
     taxPidentParent = taxPidentInputDict[parentID][0]
     if taxPidentChild > taxPidentParent:
-        logDict[childID][parentID].append(f'taxonomic similarity score higher for {childID} ({taxPidentInputDict[childID][0]}) than {parentID} ({taxPidentInputDict[parentID][0]}), aborting inspection...')
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, 'taxon quality', taxPidentChild, taxPidentParent, 'fail')
         return False
-    logDict[childID][parentID].append(f'taxonomic similarity score not higher for {childID} ({taxPidentInputDict[childID][0]}) than {parentID} ({taxPidentInputDict[parentID][0]}), continuing inspection')
+    if decisionLog is not None:
+        logDecision(decisionLog, childID, parentID, 'taxon quality', taxPidentChild, taxPidentParent, 'pass')
     return True
 
-def cooccurIdentificationFunction(console, frequencyTableSubset, child, detection_threshold_, parent, occurrence_type_, occurrence_ratio_, logDict, childID, parentID):
+def parseOccurrenceRatio(occurrence_ratio_, console):
     '''
+    function to split --occurrence-ratio into the ratio method, value (as provided), and threshold
     '''
-    positiveDetectionsChild = frequencyTableSubset.iloc[child][frequencyTableSubset.iloc[child] >= detection_threshold_].index.tolist()
-    positiveDetectionsParent = frequencyTableSubset.iloc[parent][frequencyTableSubset.iloc[parent] >= detection_threshold_].index.tolist()
-    if occurrence_type_ == 'presence-absence':
-        missingCount = len(set(positiveDetectionsChild) - set(positiveDetectionsParent))
-    elif occurrence_type_ == 'abundance':
-        missingCount = ((frequencyTableSubset.iloc[child] >= detection_threshold_) & (frequencyTableSubset.iloc[child] > frequencyTableSubset.iloc[parent])).sum()
-    else:
-        console.print(f"[cyan]\n|               ERROR[/] | [bold yellow]'--occurrence-type' not specified as 'presence-absence' or 'abundance', aborting analysis...[/]\n")
-        exit()
-    if occurrence_ratio_.split(';')[0].upper() == 'COUNT':
-        if int(occurrence_ratio_.split(';')[1]) < missingCount:
-            logDict[childID][parentID].append(f'co-occurrence ratio (method: {occurrence_ratio_.split(";")[0]}) not met: {childID} found {missingCount} times without {parentID} (threshold: {int(occurrence_ratio_.split(";")[1])}), aborting inspection...')
-            return False
-        logDict[childID][parentID].append(f'co-occurrence ratio (method: {occurrence_ratio_.split(";")[0]}) met: {childID} found {missingCount} times without {parentID} (threshold: {int(occurrence_ratio_.split(";")[1])}), continuing inspection')
-        return True
-    elif occurrence_ratio_.split(';')[0].upper() == 'GLOBAL':
-        if 1 - (missingCount / len(frequencyTableSubset.index.tolist())) < float(occurrence_ratio_.split(';')[1]):
-            logDict[childID][parentID].append(f'co-occurrence ratio (method: {occurrence_ratio_.split(";")[0]}) not met: {childID} observed in {float("{:.2f}".format(1 - (missingCount / len(frequencyTableSubset.index.tolist()))))}% of samples without a positive detection of {parentID} (threshold: {int(occurrence_ratio_.split(";")[1])}), aborting inspection...')
-            return False
-        logDict[childID][parentID].append(f'co-occurrence ratio (method: {occurrence_ratio_.split(";")[0]}) met: {childID} observed in {float("{:.2f}".format(1 - (missingCount / len(frequencyTableSubset.index.tolist()))))}% of samples without a positive detection of {parentID} (threshold: {int(occurrence_ratio_.split(";")[1])}), continuing inspection')
-        return True
-    elif occurrence_ratio_.split(';')[0].upper() == 'LOCAL':
-        if 1 - (missingCount / (len(positiveDetectionsParent) + missingCount)) < float(occurrence_ratio_.split(';')[1]):
-            logDict[childID][parentID].append(f'co-occurrence ratio (method: {occurrence_ratio_.split(";")[0]}) not met: {childID} observed in {float("{:.2f}".format(1 - (missingCount / len(frequencyTableSubset.index.tolist()))))}% of samples without a positive detection of {parentID} (threshold: {int(occurrence_ratio_.split(";")[1])}), aborting inspection...')
+    try:
+        ratioMethod, ratioValue = occurrence_ratio_.split(';')[0:2]
+        ratioMethod = ratioMethod.upper()
+        ratioThreshold = int(ratioValue) if ratioMethod == 'COUNT' else float(ratioValue)
+    except ValueError:
+        ratioMethod = None
+    if ratioMethod not in ['COUNT', 'GLOBAL', 'LOCAL']:
+        raise TombRaiderError("--occurrence-ratio parameter not identified")
+    return ratioMethod, ratioValue, ratioThreshold
+
+def cooccurToMatrix(frequencyTable, sampleMask, detection_threshold_, occurrence_type_, occurrence_ratio_, console, block_size_ = 256):
+    '''
+    function to convert the included samples of the frequency table into NumPy detection arrays once, so that co-occurrence can be calculated
+    for all parent-child combinations in blocks of parents rather than through pandas row slicing for every pair
+    the counts are not copied (artefacts are merged after the analysis), excluded samples are left out of the detections instead
+    '''
+    if occurrence_type_ not in ['presence-absence', 'abundance']:
+        raise TombRaiderError("'--occurrence-type' not specified as 'presence-absence' or 'abundance'")
+    ratioMethod, ratioValue, ratioThreshold = parseOccurrenceRatio(occurrence_ratio_, console)
+    counts = frequencyTable.to_numpy()
+    detections = (counts >= detection_threshold_) & sampleMask
+    cooccurMatrix = {
+        'counts': counts,
+        'detections': detections,
+        'detectionCounts': detections.sum(axis = 1),
+        'occurrenceType': occurrence_type_,
+        'ratioMethod': ratioMethod,
+        'ratioName': occurrence_ratio_.split(';')[0],
+        'ratioValue': ratioValue,
+        'ratioThreshold': ratioThreshold,
+        'totalCount': len(frequencyTable.index),
+        'blockSize': max(1, block_size_),
+        'candidateIndex': None,
+        'blockLimit': None,
+        'blockStart': None,
+        'blockEnd': None,
+        'block': None,
+        'blockChildren': None,
+    }
+    return cooccurMatrix
+
+def cooccurMissingCountBlock(cooccurMatrix, parentStart, parentEnd, children = None):
+    '''
+    function to calculate the number of samples a child is detected in without its parent (missingCount)
+    for the children (rows, sorted positions, default all sequences from parentStart + 1 onwards) against the parents parentStart:parentEnd (columns)
+    presence-absence is calculated through matrix products, abundance through block comparisons, both over chunks of children to bound memory
+    '''
+    counts = cooccurMatrix['counts']
+    detections = cooccurMatrix['detections']
+    if children is None:
+        children = np.arange(parentStart + 1, len(counts))
+    missingCountBlock = np.zeros((len(children), parentEnd - parentStart), dtype = np.int64)
+    chunkSize = max(1, 2 ** 24 // max(1, counts.shape[1]))
+    if cooccurMatrix['occurrenceType'] == 'presence-absence':
+        parentDetections = detections[parentStart:parentEnd].T.astype(np.float32)
+        for chunkStart in range(0, len(children), chunkSize):
+            chunkChildren = children[chunkStart:chunkStart + chunkSize]
+            sharedDetections = detections[chunkChildren].astype(np.float32) @ parentDetections
+            missingCountBlock[chunkStart:chunkStart + chunkSize] = cooccurMatrix['detectionCounts'][chunkChildren, None] - sharedDetections.astype(np.int64)
+        return missingCountBlock
+    for column, parent in enumerate(range(parentStart, parentEnd)):
+        # children more abundant than the parent are never looked up
+        for chunkStart in range(int(np.searchsorted(children, parent, side = 'right')), len(children), chunkSize):
+            chunkChildren = children[chunkStart:chunkStart + chunkSize]
+            missingCountBlock[chunkStart:chunkStart + chunkSize, column] = (detections[chunkChildren] & (counts[chunkChildren] > counts[parent])).sum(axis = 1)
+    return missingCountBlock
+
+def cooccurMissingCount(cooccurMatrix, child, parent):
+    '''
+    function to look up missingCount for a parent-child combination, calculating the next block of parents when needed
+    blocks do not extend past blockLimit, the end of the parents assigned to a worker process
+    '''
+    blockStart = cooccurMatrix['blockStart']
+    if blockStart is None or not blockStart <= parent < cooccurMatrix['blockEnd']:
+        blockStart = parent
+        blockEnd = min(parent + cooccurMatrix['blockSize'], cooccurMatrix['blockLimit'] or len(cooccurMatrix['counts']))
+        cooccurMatrix['blockChildren'] = blockCandidateChildren(cooccurMatrix['candidateIndex'], blockStart, blockEnd)
+        cooccurMatrix['block'] = cooccurMissingCountBlock(cooccurMatrix, blockStart, blockEnd, cooccurMatrix['blockChildren'])
+        cooccurMatrix['blockStart'] = blockStart
+        cooccurMatrix['blockEnd'] = blockEnd
+    return int(cooccurMatrix['block'][blockChildRow(cooccurMatrix, child), parent - blockStart])
+
+def blockCandidateChildren(candidateIndex, parentStart, parentEnd):
+    '''
+    function to return the sorted positions of the child candidates of the parents parentStart:parentEnd in the taxonomic ID index,
+    so that blocks of co-occurrence and alignment lookups leave out the combinations the index prunes, returns None without an index (all less abundant sequences)
+    '''
+    if candidateIndex is None:
+        return None
+    return np.unique(np.fromiter(itertools.chain.from_iterable(taxidChildCandidates(candidateIndex, parent) for parent in range(parentStart, parentEnd)), dtype = np.int64))
+
+def blockChildRow(blockLookup, child):
+    '''
+    function to return the row (co-occurrence) or column (alignment) of a child in the block of a lookup
+    '''
+    if blockLookup['blockChildren'] is None:
+        return child - blockLookup['blockStart'] - 1
+    return int(np.searchsorted(blockLookup['blockChildren'], child))
+
+def cooccurIdentificationFunction(console, cooccurMatrix, child, parent, decisionLog, childID, parentID):
+    '''
+    '''
+    missingCount = cooccurMissingCount(cooccurMatrix, child, parent)
+    ratioMethod = cooccurMatrix['ratioMethod']
+    ratioName = cooccurMatrix['ratioName']
+    ratioValue = cooccurMatrix['ratioValue']
+    if ratioMethod == 'COUNT':
+        if cooccurMatrix['ratioThreshold'] < missingCount:
+            if decisionLog is not None:
+                logDecision(decisionLog, childID, parentID, f'coOccur ({ratioName})', missingCount, cooccurMatrix['ratioThreshold'], 'fail')
             return False
-        logDict[childID][parentID].append(f'co-occurrence ratio (method: {occurrence_ratio_.split(";")[0]}) met: {childID} observed in {float("{:.2f}".format(1 - (missingCount / len(frequencyTableSubset.index.tolist()))))}% of samples without a positive detection of {parentID} (threshold: {int(occurrence_ratio_.split(";")[1])}), continuing inspection')
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, f'coOccur ({ratioName})', missingCount, cooccurMatrix['ratioThreshold'], 'pass')
         return True
+    elif ratioMethod == 'GLOBAL':
+        cooccurRatio = 1 - (missingCount / cooccurMatrix['totalCount'])
     else:
-        console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]--occurrence-ratio parameter not identified, aborting analysis...[/]\n")
-        exit()
+        localCount = int(cooccurMatrix['detectionCounts'][parent]) + missingCount
+        cooccurRatio = 1 - (missingCount / localCount) if localCount > 0 else float('nan')
+    if cooccurRatio < cooccurMatrix['ratioThreshold']:
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, f'coOccur ({ratioName})', float("{:.2f}".format(cooccurRatio)), ratioValue, 'fail')
+        return False
+    if decisionLog is not None:
+        logDecision(decisionLog, childID, parentID, f'coOccur ({ratioName})', float("{:.2f}".format(cooccurRatio)), ratioValue, 'pass')
+    return True
     
-def seqSimIdentificationFunction(console, seqParent, seqChild, alignmentInputDict, childID, parentID, calculate_pairwise_, pairwise_alignment_, similarity_, logDict):
+def seqSimIdentificationFunction(console, seqParent, seqChild, alignmentStore, childID, parentID, calculate_pairwise_, pairwise_alignment_, similarity_, decisionLog, similarityCache = None):
     '''
     '''
-    if len(alignmentInputDict) == 0 or calculate_pairwise_:
-        if pairwise_alignment_ == 'global':
-            alignmentSeq1, alignmentSeq2 = needleman_wunsch(seqParent, seqChild)
-        elif pairwise_alignment_ == 'local':
-            alignmentSeq1, alignmentSeq2, max_score = smith_waterman(seqParent, seqChild)
-        else:
-            console.print(f"\n[cyan]|               ERROR[/] | [bold yellow]--occurrence-ratio parameter not identified, aborting analysis...[/]\n")
-            exit()
-    else:
-        alignmentSeq1 = alignmentInputDict[parentID]
-        alignmentSeq2 = alignmentInputDict[childID]
-    distanceCalculation = sum(1 for a, b in zip(alignmentSeq1, alignmentSeq2) if a != b)
-    if 100 - (distanceCalculation/ max(len(seqParent), len(seqChild)) * 100) <= int(similarity_):
-        logDict[childID][parentID].append(f'sequence similarity ratio not met: {float("{:.2f}".format(100 - (distanceCalculation/ max(len(seqParent), len(seqChild)) * 100)))}% (threshold: {similarity_}), aborting inspection...')
+    seqSimScore, identityBound = sequenceIdentity(console, seqParent, seqChild, alignmentStore, childID, parentID, calculate_pairwise_, pairwise_alignment_, similarity_, similarityCache)
+    if seqSimScore is None:
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, 'banded alignment', float("{:.2f}".format(identityBound)), similarity_, 'fail')
+        return False
+    if seqSimScore <= int(similarity_):
+        if decisionLog is not None:
+            logDecision(decisionLog, childID, parentID, 'seqSim', float("{:.2f}".format(seqSimScore)), similarity_, 'fail')
         return False
-    logDict[childID][parentID].append(f'sequence similarity ratio met: {float("{:.2f}".format(100 - (distanceCalculation/ max(len(seqParent), len(seqChild)) * 100)))}% (threshold: {similarity_}), continuing inspection')
+    if decisionLog is not None:
+        logDecision(decisionLog, childID, parentID, 'seqSim', float("{:.2f}".format(seqSimScore)), similarity_, 'pass')
     return True
 
+def sequenceIdentity(console, seqParent, seqChild, alignmentStore, childID, parentID, calculate_pairwise_, pairwise_alignment_, similarity_, similarityCache = None):
+    '''
+    function to calculate the sequence similarity between parent and child from --alignment-input or a pairwise alignment
+    returns (similarity, None), or (None, upper bound) when the banded alignment stopped as the similarity cannot exceed similarity_
+    '''
+    if alignmentStore is not None and not calculate_pairwise_:
+        return 100 - (alignmentMismatches(alignmentStore, parentID, childID) / max(len(seqParent), len(seqChild)) * 100), None
+    seqSimScore = similarityCacheLookup(similarityCache, seqParent, seqChild, pairwise_alignment_)
+    if seqSimScore is not None:
+        return seqSimScore, None
+    if pairwise_alignment_ == 'global':
+        alignmentSeq1, alignmentSeq2 = needleman_wunsch_vectorized(seqParent, seqChild)
+    elif pairwise_alignment_ == 'local':
+        alignmentSeq1, alignmentSeq2, max_score = smith_waterman_vectorized(seqParent, seqChild)
+    elif pairwise_alignment_ == 'banded':
+        alignmentSeq1, alignmentSeq2 = needleman_wunsch_vectorized(seqParent, seqChild, similarity_threshold = int(similarity_))
+        if alignmentSeq1 is None:
+            return None, alignmentSeq2
+    elif pairwise_alignment_ == 'global-legacy':
+        alignmentSeq1, alignmentSeq2 = needleman_wunsch(seqParent, seqChild)
+    elif pairwise_alignment_ == 'local-legacy':
+        alignmentSeq1, alignmentSeq2, max_score = smith_waterman(seqParent, seqChild)
+    else:
+        raise TombRaiderError("--pairwise-alignment parameter not identified")
+    seqSimScore = alignmentIdentity(alignmentSeq1, alignmentSeq2, seqParent, seqChild)
+    similarityCacheStore(similarityCache, seqParent, seqChild, pairwise_alignment_, seqSimScore)
+    return seqSimScore, None
+
+def alignmentIdentity(alignmentSeq1, alignmentSeq2, seqParent, seqChild):
+    '''
+    function to calculate the sequence similarity from two aligned sequences: 100 - (# of differences / sequence length * 100)
+    '''
+    distanceCalculation = sum(1 for a, b in zip(alignmentSeq1, alignmentSeq2) if a != b)
+    return 100 - (distanceCalculation/ max(len(seqParent), len(seqChild)) * 100)
+
+# alignments that are guaranteed to be identical share cache entries, the scoring parameters are part of the key
+SIMILARITY_CACHE_MODES = {
+    'global': 'global;match=2;mismatch=-1;gap=-1',
+    'banded': 'global;match=2;mismatch=-1;gap=-1',
+    'global-legacy': 'global;match=2;mismatch=-1;gap=-1',
+    'local': 'local;match=2;mismatch=-5;gap=-5',
+    'local-legacy': 'local;match=2;mismatch=-5;gap=-5',
+}
+# number of cache entries or usage records kept in memory before they are written to the cache file
+SIMILARITY_CACHE_BATCH = 10000
+
+def openSimilarityCache(similarity_cache_, similarity_cache_size_, console):
+    '''
+    function to open (or create) the SQLite file storing pairwise sequence similarity across runs
+    '''
+    try:
+        connection = sqlite3.connect(similarity_cache_)
+        connection.execute('CREATE TABLE IF NOT EXISTS similarity (key BLOB PRIMARY KEY, identity REAL NOT NULL, generation INTEGER NOT NULL) WITHOUT ROWID')
+        connection.execute('CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        generation = connection.execute("SELECT value FROM metadata WHERE name = 'generation'").fetchone()
+    except sqlite3.DatabaseError as e:
+        raise TombRaiderError(f"'--similarity-cache' {similarity_cache_} could not be opened ({e})")
+    similarityCache = {
+        'file': similarity_cache_,
+        'connection': connection,
+        'generation': 1 if generation is None else generation[0] + 1,
+        'maxEntries': similarity_cache_size_,
+        'pending': [],
+        'used': [],
+        'hits': 0,
+        'misses': 0,
+    }
+    return similarityCache
+
+def similarityCacheKey(seqParent, seqChild, pairwise_alignment_):
+    '''
+    function to generate the cache key from both sequences and the alignment mode
+    '''
+    return hashlib.blake2b(f'{SIMILARITY_CACHE_MODES.get(pairwise_alignment_, pairwise_alignment_)}\t{seqParent}\t{seqChild}'.encode(), digest_size = 16).digest()
+
+def similarityCacheLookup(similarityCache, seqParent, seqChild, pairwise_alignment_):
+    '''
+    function to retrieve a previously calculated sequence similarity, returns None when not cached
+    '''
+    if similarityCache is None:
+        return None
+    key = similarityCacheKey(seqParent, seqChild, pairwise_alignment_)
+    row = similarityCache['connection'].execute('SELECT identity FROM similarity WHERE key = ?', (key,)).fetchone()
+    if row is None:
+        similarityCache['misses'] += 1
+        return None
+    similarityCache['hits'] += 1
+    similarityCache['used'].append((similarityCache['generation'], key))
+    if len(similarityCache['used']) >= SIMILARITY_CACHE_BATCH:
+        flushSimilarityCache(similarityCache)
+    return row[0]
+
+def similarityCacheStore(similarityCache, seqParent, seqChild, pairwise_alignment_, seqSimScore):
+    '''
+    function to add a newly calculated sequence similarity to the cache, written in batches
+    '''
+    if similarityCache is None:
+        return
+    similarityCache['pending'].append((similarityCacheKey(seqParent, seqChild, pairwise_alignment_), seqSimScore, similarityCache['generation']))
+    if len(similarityCache['pending']) >= SIMILARITY_CACHE_BATCH:
+        flushSimilarityCache(similarityCache)
+
+def addSimilarityCacheUpdates(similarityCache, cacheUpdates):
+    '''
+    function to add the cache entries and usage information returned by a worker process, written in batches rather than only when closing the cache
+    '''
+    similarityCache['pending'].extend(cacheUpdates[0])
+    similarityCache['used'].extend(cacheUpdates[1])
+    if len(similarityCache['pending']) >= SIMILARITY_CACHE_BATCH or len(similarityCache['used']) >= SIMILARITY_CACHE_BATCH:
+        flushSimilarityCache(similarityCache)
+
+def flushSimilarityCache(similarityCache):
+    '''
+    function to write pending entries and usage information to the cache file
+    '''
+    with similarityCache['connection'] as connection:
+        connection.executemany('INSERT OR REPLACE INTO similarity (key, identity, generation) VALUES (?, ?, ?)', similarityCache['pending'])
+        connection.executemany('UPDATE similarity SET generation = ? WHERE key = ?', similarityCache['used'])
+    similarityCache['pending'] = []
+    similarityCache['used'] = []
+
+def closeSimilarityCache(similarityCache):
+    '''
+    function to write the remaining entries, evict the least recently used entries above the size limit, and close the cache file
+    '''
+    if similarityCache is None:
+        return
+    flushSimilarityCache(similarityCache)
+    with similarityCache['connection'] as connection:
+        connection.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('generation', ?)", (similarityCache['generation'],))
+        excessEntries = connection.execute('SELECT COUNT(*) FROM similarity').fetchone()[0] - similarityCache['maxEntries']
+        if excessEntries > 0:
+            connection.execute('DELETE FROM similarity WHERE key IN (SELECT key FROM similarity ORDER BY generation LIMIT ?)', (excessEntries,))
+    similarityCache['connection'].close()
+
+def kmerPrefilterProfiles(seqInputDict, kmer_size_, verify_prefilter_):
+    '''
+    function to calculate the k-mer profile (unique k-mers and their counts) for every sequence once
+    '''
+    kmerWeights = np.array([256 ** i for i in range(kmer_size_)], dtype = np.uint64)
+    kmerPrefilter = {'kmerSize': kmer_size_, 'verify': verify_prefilter_, 'profiles': {}, 'prunedCount': 0, 'checkedCount': 0}
+    for seqID, seq in seqInputDict.items():
+        encodedSeq = _encodeSequence(seq).astype(np.uint64)
+        if len(encodedSeq) < kmer_size_:
+            kmerCodes = np.empty(0, dtype = np.uint64)
+        else:
+            kmerCodes = np.lib.stride_tricks.sliding_window_view(encodedSeq, kmer_size_) @ kmerWeights
+        kmerPrefilter['profiles'][seqID] = np.unique(kmerCodes, return_counts = True)
+    return kmerPrefilter
+
+def kmerIdentityUpperBound(kmerPrefilter, seqParent, seqChild, parentID, childID):
+    '''
+    upper bound on the sequence similarity of parent and child based on the q-gram lemma:
+    every difference in an alignment destroys at most k of the shared k-mers, i.e., shared >= max(len) - k + 1 - k * differences
+    '''
+    kmerSize = kmerPrefilter['kmerSize']
+    parentKmers, parentCounts = kmerPrefilter['profiles'][parentID]
+    childKmers, childCounts = kmerPrefilter['profiles'][childID]
+    _, parentIndex, childIndex = np.intersect1d(parentKmers, childKmers, assume_unique = True, return_indices = True)
+    sharedKmers = int(np.minimum(parentCounts[parentIndex], childCounts[childIndex]).sum())
+    maxLength = max(len(seqParent), len(seqChild))
+    minDistance = max(math.ceil((maxLength - kmerSize + 1 - sharedKmers) / kmerSize), abs(len(seqParent) - len(seqChild)), 0)
+    return 100 - (minDistance / maxLength * 100)
+
+def kmerPrefilterFunction(console, kmerPrefilter, seqParent, seqChild, alignmentStore, childID, parentID, calculate_pairwise_, pairwise_alignment_, similarity_, decisionLog, similarityCache = None):
+    '''
+    function to discard parent-child combinations that provably cannot reach the sequence similarity threshold before aligning them
+    '''
+    kmerPrefilter['checkedCount'] += 1
+    identityBound = kmerIdentityUpperBound(kmerPrefilter, seqParent, seqChild, parentID, childID)
+    if identityBound > int(similarity_):
+        return True
+    if kmerPrefilter['verify'] and seqSimIdentificationFunction(console, seqParent, seqChild, alignmentStore, childID, parentID, calculate_pairwise_, pairwise_alignment_, similarity_, None, similarityCache):
+        raise TombRaiderError(f"k-mer prefilter discarded {childID} and {parentID}, which meet the sequence similarity threshold")
+    kmerPrefilter['prunedCount'] += 1
+    if decisionLog is not None:
+        logDecision(decisionLog, childID, parentID, 'k-mer prefilter', float("{:.2f}".format(identityBound)), similarity_, 'fail')
+    return False
+
 def smith_waterman(seq1, seq2, match_score=2, mismatch_penalty=-5, gap_penalty=-5):
     '''
     local alignment function in base python (except Numpy) based on the Smith-Waterman algorithm
@@ -532,4 +2661,107 @@ def needleman_wunsch(seq1, seq2, gap_penalty=-1, match_score=2, mismatch_penalty
             align1 = '-' + align1
             align2 = seq2[j-1] + align2
             j -= 1
-    return align1, align2
\ No newline at end of file
+    return align1, align2
+
+def _encodeSequence(seq):
+    '''
+    encode a sequence string as a uint8 numpy array for vectorized comparisons
+    '''
+    return np.frombuffer(seq.encode('ascii'), dtype = np.uint8)
+
+def _fillScoreRow(previousRow, substitutionRow, gap_penalty, gapOffsets, firstCell, floor = None):
+    '''
+    fill one row of a linear-gap DP matrix without a Python loop over the columns
+    the horizontal dependency F[i, j] = max(T[j], F[i, j-1] + gap) is resolved as a running maximum:
+    F[i, j] = j * gap + max_{k <= j} (T[k] - k * gap)
+    '''
+    rowCandidates = np.empty_like(previousRow)
+    rowCandidates[0] = firstCell
+    np.maximum(previousRow[:-1] + substitutionRow, previousRow[1:] + gap_penalty, out = rowCandidates[1:])
+    if floor is not None:
+        np.maximum(rowCandidates, floor, out = rowCandidates)
+    return np.maximum.accumulate(rowCandidates - gapOffsets) + gapOffsets
+
+def _identityUpperBound(scoreUpperBound, len_seq1, len_seq2, gap_penalty, match_score, mismatch_penalty):
+    '''
+    upper bound on the identity (as calculated in seqSimIdentificationFunction) of a global alignment with a score <= scoreUpperBound
+    every alignment column is a match (M), mismatch (X), or gap (G), with len_seq1 + len_seq2 = 2M + 2X + G, hence
+    score = match * (len_seq1 + len_seq2) / 2 - (match - mismatch) * X - (match / 2 - gap) * G, which bounds the distance X + G from below
+    '''
+    costPerDifference = max(match_score - mismatch_penalty, match_score / 2 - gap_penalty)
+    minDistance = max(math.ceil((match_score * (len_seq1 + len_seq2) / 2 - scoreUpperBound) / costPerDifference), abs(len_seq1 - len_seq2), 0)
+    return 100 - (minDistance / max(len_seq1, len_seq2) * 100)
+
+def needleman_wunsch_vectorized(seq1, seq2, gap_penalty=-1, match_score=2, mismatch_penalty=-1, similarity_threshold=None):
+    '''
+    global alignment function based on the Needleman-Wunsch algorithm, filling the DP table one vectorized row at a time
+    produces the same table and traceback as needleman_wunsch
+    when similarity_threshold is provided, the fill stops as soon as the alignment can no longer exceed the threshold,
+    in which case (None, identity upper bound) is returned
+    '''
+    m, n = len(seq1), len(seq2)
+    if similarity_threshold is not None:
+        identityBound = _identityUpperBound(match_score * min(m, n) + gap_penalty * abs(m - n), m, n, gap_penalty, match_score, mismatch_penalty)
+        if identityBound <= similarity_threshold:
+            return None, identityBound
+        remainingColumns = np.arange(n, -1, -1)
+    substitution = np.where(_encodeSequence(seq1)[:, None] == _encodeSequence(seq2)[None, :], match_score, mismatch_penalty).astype(np.int32)
+    gapOffsets = gap_penalty * np.arange(n + 1, dtype = np.int32)
+    F = np.empty((m + 1, n + 1), dtype=np.int32)
+    F[:, 0] = gap_penalty * np.arange(m + 1)
+    F[0, :] = gapOffsets
+    for i in range(1, m + 1):
+        F[i] = _fillScoreRow(F[i - 1], substitution[i - 1], gap_penalty, gapOffsets, F[i, 0])
+        if similarity_threshold is not None:
+            remainingRows = m - i
+            scoreBound = int(np.max(F[i] + match_score * np.minimum(remainingRows, remainingColumns) + gap_penalty * np.abs(remainingRows - remainingColumns)))
+            identityBound = _identityUpperBound(scoreBound, m, n, gap_penalty, match_score, mismatch_penalty)
+            if identityBound <= similarity_threshold:
+                return None, identityBound
+    align1, align2 = [], []
+    i, j = m, n
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and F[i, j] == F[i-1, j-1] + substitution[i-1, j-1]:
+            align1.append(seq1[i-1])
+            align2.append(seq2[j-1])
+            i -= 1
+            j -= 1
+        elif i > 0 and F[i, j] == F[i-1, j] + gap_penalty:
+            align1.append(seq1[i-1])
+            align2.append('-')
+            i -= 1
+        else:
+            align1.append('-')
+            align2.append(seq2[j-1])
+            j -= 1
+    return ''.join(reversed(align1)), ''.join(reversed(align2))
+
+def smith_waterman_vectorized(seq1, seq2, match_score=2, mismatch_penalty=-5, gap_penalty=-5):
+    '''
+    local alignment function based on the Smith-Waterman algorithm, filling the DP table one vectorized row at a time
+    produces the same table and traceback as smith_waterman
+    '''
+    len_seq1, len_seq2 = len(seq1), len(seq2)
+    substitution = np.where(_encodeSequence(seq1)[:, None] == _encodeSequence(seq2)[None, :], match_score, mismatch_penalty)
+    gapOffsets = gap_penalty * np.arange(len_seq2 + 1)
+    score_matrix = np.zeros((len_seq1 + 1, len_seq2 + 1), dtype=int)
+    for i in range(1, len_seq1 + 1):
+        score_matrix[i] = _fillScoreRow(score_matrix[i - 1], substitution[i - 1], gap_penalty, gapOffsets, 0, floor = 0)
+    max_i, max_j = np.unravel_index(score_matrix.argmax(), score_matrix.shape)
+    max_score = score_matrix[max_i, max_j]
+    alignment_seq1, alignment_seq2 = [], []
+    while score_matrix[max_i, max_j] != 0:
+        if max_i > 0 and max_j > 0 and score_matrix[max_i, max_j] == score_matrix[max_i - 1, max_j - 1] + substitution[max_i - 1, max_j - 1]:
+            alignment_seq1.append(seq1[max_i - 1])
+            alignment_seq2.append(seq2[max_j - 1])
+            max_i -= 1
+            max_j -= 1
+        elif max_i > 0 and score_matrix[max_i, max_j] == score_matrix[max_i - 1, max_j] + gap_penalty:
+            alignment_seq1.append(seq1[max_i - 1])
+            alignment_seq2.append('-')
+            max_i -= 1
+        elif max_j > 0 and score_matrix[max_i, max_j] == score_matrix[max_i, max_j - 1] + gap_penalty:
+            alignment_seq1.append('-')
+            alignment_seq2.append(seq2[max_j - 1])
+            max_j -= 1
+    return ''.join(reversed(alignment_seq1)), ''.join(reversed(alignment_seq2)), max_score
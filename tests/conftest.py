@@ -0,0 +1,58 @@
+import os, subprocess, sys
+import pandas as pd
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = os.path.join(REPO, 'exampleFiles')
+BLAST_FORMAT = '6 qaccver saccver ssciname staxid length pident mismatch qcovs evalue bitscore qstart qend sstart send gapopen'
+
+sys.path.insert(0, REPO)
+
+
+@pytest.fixture
+def tombRaider(tmp_path):
+    '''
+    run the tombRaider command line in tmp_path, a fixed hash seed keeps set-ordered log lines identical between runs
+    '''
+    def run(*arguments, check = True):
+        result = subprocess.run([sys.executable, os.path.join(REPO, 'tombRaider'), *[str(argument) for argument in arguments]], capture_output = True, text = True, cwd = str(tmp_path), env = {**os.environ, 'PYTHONHASHSEED': '0'})
+        if check:
+            assert result.returncode == 0, result.stderr
+        return result
+    return run
+
+
+def logBody(logFile):
+    '''
+    log file without the lines that differ between identical runs (time and command)
+    '''
+    with open(logFile) as log:
+        return [line for line in log if not line.startswith(('date-time:', 'code:'))]
+
+
+def exampleData():
+    '''
+    count table and sequences of the example files, in the order of the count table
+    '''
+    frequencyTable = pd.read_csv(f'{EXAMPLES}/zotutabweb.txt', sep = '\t', index_col = 0)
+    sequences = {}
+    with open(f'{EXAMPLES}/zotus.fasta') as fastaFile:
+        for line in fastaFile:
+            if line.startswith('>'):
+                seqID = line[1:].strip()
+                sequences[seqID] = ''
+            else:
+                sequences[seqID] += line.strip()
+    return frequencyTable, sequences
+
+
+@pytest.fixture(scope = 'session')
+def syntheticDataset(tmp_path_factory):
+    '''
+    synthetic data set of the benchmark, large enough to be split over several blocks of parents
+    '''
+    sys.path.insert(0, os.path.join(REPO, 'benchmark'))
+    from tombRaiderBenchmark import writeSyntheticDataset
+    outputDir = tmp_path_factory.mktemp('synthetic')
+    writeSyntheticDataset(str(outputDir), 400, 30, 1)
+    return outputDir
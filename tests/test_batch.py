@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from conftest import BLAST_FORMAT, EXAMPLES, logBody
+
+DATASETS = {
+    'seqsim': {'criteria': 'seqSim;coOccur', 'frequency-input': f'{EXAMPLES}/zotutabweb.txt', 'sequence-input': f'{EXAMPLES}/zotus.fasta', 'similarity': '90', 'occurrence-type': 'abundance', 'occurrence-ratio': 'count;0', 'sort': 'total read count'},
+    'taxid': {'criteria': 'taxID;seqSim;coOccur', 'frequency-input': f'{EXAMPLES}/zotutabweb.txt', 'sequence-input': f'{EXAMPLES}/zotus.fasta', 'taxonomy-input': f'{EXAMPLES}/blastTaxonomy.txt', 'blast-format': BLAST_FORMAT, 'similarity': '95', 'occurrence-type': 'presence-absence', 'occurrence-ratio': 'global;0.8', 'sort': 'detections', 'taxon-quality': 'true'},
+    'broken': {'criteria': 'seqSim', 'frequency-input': 'missing.txt', 'sequence-input': f'{EXAMPLES}/zotus.fasta', 'similarity': '90'},
+}
+OUTPUTS = ('frequency-output', 'sequence-output', 'log')
+
+
+def commandLine(options):
+    '''
+    command line arguments of the options of a dataset, flags are included when set to true
+    '''
+    arguments = []
+    for option, value in options.items():
+        arguments += [f'--{option}'] if value == 'true' else [f'--{option}', value]
+    return arguments
+
+
+@pytest.mark.parametrize('threads', [1, 2])
+def test_batch_writes_dataset_outputs_and_summary(tombRaider, tmp_path, threads):
+    columns = sorted({option for options in DATASETS.values() for option in options}) + list(OUTPUTS)
+    with open(tmp_path / 'manifest.tsv', 'w') as manifestFile:
+        manifestFile.write('\t'.join(['name'] + columns) + '\n')
+        for name, options in DATASETS.items():
+            outputs = {'frequency-output': f'{name}.table.txt', 'sequence-output': f'{name}.fasta', 'log': f'{name}.log'}
+            manifestFile.write('\t'.join([name] + [{**options, **outputs}.get(column, '') for column in columns]) + '\n')
+    tombRaider('--batch', 'manifest.tsv', '--threads', threads)
+    summary = pd.read_csv(tmp_path / 'manifest.summary.tsv', sep = '\t', index_col = 0)
+    assert list(summary.index) == list(DATASETS)
+    assert list(summary['status']) == ['completed', 'completed', 'failed']
+    assert 'missing.txt' in (tmp_path / 'manifest.broken.console').read_text()
+    for name in ['seqsim', 'taxid']:
+        assert (tmp_path / f'manifest.{name}.console').exists()
+        tombRaider(*commandLine(DATASETS[name]), '--frequency-output', f'single.{name}.table.txt', '--sequence-output', f'single.{name}.fasta', '--log', f'single.{name}.log')
+        assert (tmp_path / f'{name}.table.txt').read_text() == (tmp_path / f'single.{name}.table.txt').read_text()
+        assert (tmp_path / f'{name}.fasta').read_text() == (tmp_path / f'single.{name}.fasta').read_text()
+        assert logBody(tmp_path / f'{name}.log') == logBody(tmp_path / f'single.{name}.log')
+        assert any(line.startswith(f"--total artefacts: {int(summary.loc[name, 'artefacts'])} (") for line in logBody(tmp_path / f'{name}.log'))
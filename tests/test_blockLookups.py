@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from function import tombRaiderFunctions
+from function.tombRaiderFunctions import alignmentMismatchBlock, alignmentStoreFromSequences, cooccurMissingCountBlock, cooccurToMatrix, identifyArtefacts
+
+
+def randomTable(seed, sequences = 60, samples = 12):
+    '''
+    frequency table of random counts with many zeros, sorted by decreasing total read count
+    '''
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 20, size = (sequences, samples)) * (rng.random((sequences, samples)) < 0.6)
+    frequencyTable = pd.DataFrame(counts, index = [f'seq{position}' for position in range(sequences)], columns = [f'sample{column}' for column in range(samples)])
+    return frequencyTable.iloc[np.argsort(-frequencyTable.sum(axis = 1).to_numpy(), kind = 'stable')]
+
+
+@pytest.mark.parametrize('occurrenceType', ['presence-absence', 'abundance'])
+def test_cooccur_block_of_candidate_children_matches_all_children(occurrenceType):
+    frequencyTable = randomTable(1)
+    cooccurMatrix = cooccurToMatrix(frequencyTable, np.ones(frequencyTable.shape[1], dtype = bool), 2, occurrenceType, 'count;0', None)
+    allChildren = cooccurMissingCountBlock(cooccurMatrix, 10, 20)
+    children = np.array([11, 14, 15, 30, 42, 59])
+    assert (cooccurMissingCountBlock(cooccurMatrix, 10, 20, children)[:, 4:] == allChildren[children - 11, 4:]).all()
+
+
+@pytest.mark.parametrize('occurrenceType', ['presence-absence', 'abundance'])
+def test_taxid_candidate_blocks_match_blocks_of_all_children(monkeypatch, occurrenceType):
+    frequencyTable = randomTable(2)
+    sequences = {seqID: 'ACGT' * 10 for seqID in frequencyTable.index}
+    taxonomicIDs = {seqID: [position % 3] for position, seqID in enumerate(frequencyTable.index)}
+    parameters = {'criteria_': 'taxID;coOccur', 'occurrence_type_': occurrenceType, 'occurrence_ratio_': 'count;1', 'detection_threshold_': 2}
+    results = identifyArtefacts(frequencyTable, sequences, taxonomicIDs, **parameters)
+    monkeypatch.setattr(tombRaiderFunctions, 'blockCandidateChildren', lambda *arguments: None)
+    assert results['childParentComboDict'] == identifyArtefacts(frequencyTable, sequences, taxonomicIDs, **parameters)['childParentComboDict']
+    assert results['childParentComboDict']
+
+
+def test_alignment_block_of_candidate_children_matches_all_children():
+    rng = np.random.default_rng(3)
+    frequencyTable = randomTable(3, sequences = 40)
+    alignedSequences = {seqID: ''.join(rng.choice(list('ACGT-'), size = 30)) for seqID in frequencyTable.index[::-1]}
+    alignmentStore = alignmentStoreFromSequences(alignedSequences, frequencyTable)
+    allChildren = alignmentMismatchBlock(alignmentStore, 5, 15)
+    children = np.array([6, 9, 16, 25, 39])
+    assert (alignmentMismatchBlock(alignmentStore, 5, 15, children) == allChildren[:, children - 6]).all()
+    parentSeq, childSeq = alignedSequences[frequencyTable.index[5]], alignedSequences[frequencyTable.index[9]]
+    assert allChildren[0, 9 - 6] == sum(parentBase != childBase for parentBase, childBase in zip(parentSeq, childSeq))
@@ -0,0 +1,50 @@
+import pytest
+from conftest import exampleData
+from function import tombRaiderFunctions
+from function.tombRaiderFunctions import identifyArtefacts, sortFrequencyTable
+
+PARAMETERS = {'criteria_': 'seqSim;coOccur', 'similarity_': 90, 'occurrence_type_': 'abundance', 'occurrence_ratio_': 'count;0'}
+
+
+def interruptAfter(monkeypatch, checkpoints):
+    '''
+    let saveCheckpoint write the given number of checkpoints before interrupting the analysis
+    '''
+    saveCheckpoint = tombRaiderFunctions.saveCheckpoint
+    written = []
+    def interruptedSave(*arguments, **kwargs):
+        saveCheckpoint(*arguments, **kwargs)
+        written.append(arguments[2])
+        if len(written) == checkpoints:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(tombRaiderFunctions, 'saveCheckpoint', interruptedSave)
+    return written
+
+
+@pytest.mark.parametrize('threads', [1, 2])
+def test_resumed_analysis_matches_uninterrupted_run(tmp_path, monkeypatch, threads):
+    frequencyTable, sequences = exampleData()
+    frequencyTable = sortFrequencyTable(frequencyTable, 'total read count', None)
+    expected = identifyArtefacts(frequencyTable, sequences, threads_ = threads, log_ = str(tmp_path / 'expected.log'), **PARAMETERS)
+    written = interruptAfter(monkeypatch, 10)
+    with pytest.raises(KeyboardInterrupt):
+        identifyArtefacts(frequencyTable, sequences, threads_ = threads, checkpoint_ = str(tmp_path / 'state.gz'), checkpoint_interval_ = 0, log_ = str(tmp_path / 'resumed.log'), **PARAMETERS)
+    monkeypatch.undo()
+    assert 0 < written[-1] < len(frequencyTable)
+    results = identifyArtefacts(frequencyTable, sequences, threads_ = threads, checkpoint_ = str(tmp_path / 'state.gz'), resume_ = True, log_ = str(tmp_path / 'resumed.log'), **PARAMETERS)
+    assert f'Resumed Analysis: {written[-1]} of {len(frequencyTable)} parents restored from {tmp_path / "state.gz"}' in results['messages']
+    assert results['childParentComboDict'] == expected['childParentComboDict']
+    assert results['frequencyTable'].equals(expected['frequencyTable'])
+    assert (tmp_path / 'resumed.decisions.tsv').read_text() == (tmp_path / 'expected.decisions.tsv').read_text()
+
+
+def test_changed_parameters_start_from_first_parent(tmp_path, monkeypatch):
+    frequencyTable, sequences = exampleData()
+    frequencyTable = sortFrequencyTable(frequencyTable, 'total read count', None)
+    interruptAfter(monkeypatch, 10)
+    with pytest.raises(KeyboardInterrupt):
+        identifyArtefacts(frequencyTable, sequences, checkpoint_ = str(tmp_path / 'state.gz'), checkpoint_interval_ = 0, **PARAMETERS)
+    monkeypatch.undo()
+    results = identifyArtefacts(frequencyTable, sequences, checkpoint_ = str(tmp_path / 'state.gz'), resume_ = True, **{**PARAMETERS, 'similarity_': 95})
+    assert 'WARNING: input files or parameters changed since the checkpoint was written, starting from the first parent...' in results['messages']
+    assert results['childParentComboDict'] == identifyArtefacts(frequencyTable, sequences, **{**PARAMETERS, 'similarity_': 95})['childParentComboDict']
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from conftest import EXAMPLES, exampleData
+from function.tombRaiderFunctions import TombRaiderError, alignmentStoreFromSequences, identifyArtefacts
+
+
+@pytest.mark.parametrize('parameters, message', [
+    ({'criteria_': 'seqSim;bogus'}, 'unidentified criteria found (bogus)'),
+    ({'criteria_': 'seqSim', 'threads_': 0}, "'--threads' should be 1 or higher"),
+    ({'criteria_': 'seqSim;coOccur', 'occurrence_type_': 'abundance', 'occurrence_ratio_': 'count;0', 'exclude_': 'missing'}, "sample 'missing' in '--exclude' not found in frequency table"),
+])
+def test_library_raises_error(parameters, message):
+    frequencyTable, sequences = exampleData()
+    with pytest.raises(TombRaiderError) as error:
+        identifyArtefacts(frequencyTable, sequences, similarity_ = 90, **parameters)
+    assert str(error.value) == message
+
+
+@pytest.mark.parametrize('threads', [1, 2])
+def test_library_raises_error_from_pair_evaluation(threads):
+    frequencyTable, sequences = exampleData()
+    with pytest.raises(TombRaiderError, match = 'pairwise-alignment parameter not identified'):
+        identifyArtefacts(frequencyTable, sequences, criteria_ = 'seqSim', similarity_ = 90, pairwise_alignment_ = 'bogus', threads_ = threads)
+
+
+def test_command_line_prints_error(tombRaider):
+    result = tombRaider('--criteria', 'seqSim', '--frequency-input', f'{EXAMPLES}/zotutabweb.txt', '--sequence-input', f'{EXAMPLES}/zotus.fasta', '--similarity', '90', '--pairwise-alignment', 'bogus', '--threads', '2', check = False)
+    assert 'ERROR | --pairwise-alignment parameter not identified, aborting analysis...' in ' '.join(result.stderr.split())
+    assert 'Traceback' not in result.stderr
+
+
+@pytest.mark.parametrize('orf', [-1, 41])
+def test_pseudogene_reading_frame_out_of_range(orf):
+    frequencyTable = pd.DataFrame({'S1': [5, 3]}, index = ['seq1', 'seq2'])
+    alignmentStore = alignmentStoreFromSequences({'seq1': 'ATG' * 13 + 'A', 'seq2': 'ATG' * 13 + 'A'}, frequencyTable)
+    with pytest.raises(TombRaiderError) as error:
+        identifyArtefacts(frequencyTable, alignmentStore = alignmentStore, criteria_ = 'pseudogene', orf_ = orf)
+    assert str(error.value) == "'--orf' should be an alignment position between 1 and 40"
+
+
+def test_pseudogene_sequence_missing_from_alignment():
+    frequencyTable = pd.DataFrame({'S1': [5, 3]}, index = ['seq1', 'seq2'])
+    alignmentStore = alignmentStoreFromSequences({'seq1': 'ATG' * 13 + 'A'}, frequencyTable)
+    with pytest.raises(TombRaiderError, match = r'sequences not found in the alignment \(seq2\)'):
+        identifyArtefacts(frequencyTable, alignmentStore = alignmentStore, criteria_ = 'pseudogene', orf_ = 1)
@@ -0,0 +1,70 @@
+import os, subprocess, sys
+import numpy as np
+import pandas as pd
+from function.tombRaiderFunctions import freqToMemory, mergeArtefacts, sortFrequencyTable, _SilentProgress
+
+from conftest import REPO
+
+
+def writeTransposedTable(tmp_path):
+    tablePath = tmp_path / 'table.txt'
+    tablePath.write_text('#S\tA1\tA2\nS1\t200\t200\nS2\t0\t0\n')
+    return tablePath
+
+
+def test_dtype_fits_sample_totals_after_transpose(tmp_path):
+    tablePath = writeTransposedTable(tmp_path)
+    frequencyTable, _, _ = freqToMemory(str(tablePath), None, _SilentProgress(), None, True, None, None, 'total read count')
+    assert list(frequencyTable.index) == ['A1', 'A2']
+    assert np.iinfo(frequencyTable['S1'].dtype).max >= 400
+    merged = mergeArtefacts(frequencyTable, {'A2' : 'A1'}, {}, False)
+    assert merged.loc['A1', 'S1'] == 400
+    assert merged.loc['A1', 'S2'] == 0
+
+
+def test_merge_widens_narrow_integer_columns():
+    frequencyTable = pd.DataFrame({'S1' : [200, 200], 'S2' : [1, 0]}, index = pd.Index(['A1', 'A2'], name = '#OTU ID'), dtype = np.uint8)
+    merged = mergeArtefacts(frequencyTable, {'A2' : 'A1'}, {}, False)
+    assert merged.loc['A1', 'S1'] == 400
+    assert merged['S2'].dtype == np.uint8
+    assert merged.index.name == '#OTU ID'
+
+
+def test_transposed_merge_from_command_line(tmp_path):
+    tablePath = writeTransposedTable(tmp_path)
+    sequencePath = tmp_path / 'sequences.fasta'
+    sequencePath.write_text('>A1\nACGTACGTACGTACGTACGTACGTACGTACGTACGTACGT\n>A2\nACGTACGTACGTACGTACGTACGTACGTACGTACGTACGA\n')
+    outputPath = tmp_path / 'table_new.txt'
+    subprocess.run([sys.executable, os.path.join(REPO, 'tombRaider'), '--criteria', 'seqSim', '--frequency-input', str(tablePath), '--sequence-input', str(sequencePath), '--transpose', '--similarity', '80', '--frequency-output', str(outputPath), '--sequence-output', str(tmp_path / 'sequences_new.fasta'), '--log', str(tmp_path / 'log.txt')], check = True, capture_output = True, cwd = str(tmp_path))
+    merged = pd.read_csv(outputPath, sep = '\t', index_col = 0)
+    assert merged.loc['A1', 'S1'] == 400
+
+
+def test_sort_breaks_ties_by_sequence_id():
+    frequencyTable = pd.DataFrame({'S1' : [5, 3, 5, 3], 'S2' : [0, 2, 0, 2]}, index = ['Zotu4', 'Zotu3', 'Zotu2', 'Zotu1'])
+    sortedTable = sortFrequencyTable(frequencyTable, 'total read count', None)
+    assert list(sortedTable.index) == ['Zotu1', 'Zotu2', 'Zotu3', 'Zotu4']
+    extendedTable = pd.concat([frequencyTable, pd.DataFrame({'S1' : [4, 1], 'S2' : [1, 4]}, index = ['Zotu5', 'Zotu0'])])
+    extendedOrder = list(sortFrequencyTable(extendedTable, 'total read count', None).index)
+    assert [sequenceID for sequenceID in extendedOrder if sequenceID in frequencyTable.index] == list(sortedTable.index)
+
+
+def test_merge_and_discard_remove_pseudogenes():
+    frequencyTable = pd.DataFrame({'S1' : [10, 2, 1, 4], 'S2' : [5, 0, 3, 1]}, index = pd.Index(['A1', 'A2', 'A3', 'A4'], name = '#OTU ID'))
+    merged = mergeArtefacts(frequencyTable, {'A2' : 'A1', 'A3' : 'A1'}, {'A4' : 'A1'}, False)
+    assert list(merged.index) == ['A1']
+    assert merged.loc['A1'].tolist() == [13, 8]
+    discarded = mergeArtefacts(frequencyTable, {'A2' : 'A1'}, {'A4' : 'A1'}, True)
+    assert list(discarded.index) == ['A1', 'A3']
+    assert discarded.loc['A1'].tolist() == [10, 5]
+
+
+def test_sort_keeps_fractional_totals_when_only_later_columns_are_float():
+    frequencyTable = pd.DataFrame({'S1' : [1, 1], 'S2' : [0.2, 0.7]}, index = ['Zotu1', 'Zotu2'])
+    assert list(sortFrequencyTable(frequencyTable, 'total read count', None).index) == ['Zotu2', 'Zotu1']
+
+
+def test_reading_frequency_table_without_warnings(tmp_path, recwarn):
+    frequencyTable, _, _ = freqToMemory(str(writeTransposedTable(tmp_path)), None, _SilentProgress(), None, False, None, None, 'total read count')
+    assert frequencyTable.loc['S1', 'A1'] == 200
+    assert not [warning for warning in recwarn if 'pandas' in warning.filename or 'tombRaider' in warning.filename]
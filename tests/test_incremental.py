@@ -0,0 +1,54 @@
+import pytest
+from conftest import exampleData
+from function.tombRaiderFunctions import identifyArtefacts, sortFrequencyTable
+
+PARAMETERS = {'criteria_': 'seqSim;coOccur', 'similarity_': 90, 'occurrence_type_': 'abundance', 'occurrence_ratio_': 'count;0'}
+
+
+@pytest.fixture
+def frequencyTable():
+    frequencyTable, _ = exampleData()
+    return sortFrequencyTable(frequencyTable, 'total read count', None)
+
+
+def withSample(frequencyTable, counts):
+    '''
+    frequency table with an appended sample holding counts for the given sequence IDs
+    '''
+    frequencyTable = frequencyTable.copy()
+    frequencyTable['newSample'] = [counts.get(seqID, 0) for seqID in frequencyTable.index]
+    return frequencyTable
+
+
+def test_unchanged_data_reuses_all_combinations(tmp_path, frequencyTable):
+    _, sequences = exampleData()
+    first = identifyArtefacts(frequencyTable, sequences, incremental_ = str(tmp_path / 'state.gz'), **PARAMETERS)
+    second = identifyArtefacts(frequencyTable, sequences, incremental_ = str(tmp_path / 'state.gz'), **PARAMETERS)
+    assert first['incrementalState']['reusedCount'] == 0
+    assert second['incrementalState']['reusedCount'] == len(first['incrementalState']['outcomes'])
+    assert second['childParentComboDict'] == first['childParentComboDict']
+    assert second['childParentComboDict']
+
+
+def test_added_sample_only_reassesses_detected_sequences(tmp_path, frequencyTable):
+    _, sequences = exampleData()
+    identifyArtefacts(frequencyTable, sequences, incremental_ = str(tmp_path / 'state.gz'), **PARAMETERS)
+    changedIDs = set(frequencyTable.index[[3, 20]])
+    extendedTable = withSample(frequencyTable, {seqID: 1 for seqID in changedIDs})
+    results = identifyArtefacts(extendedTable, sequences, incremental_ = str(tmp_path / 'state.gz'), **PARAMETERS)
+    fullResults = identifyArtefacts(extendedTable, sequences, **PARAMETERS)
+    assert results['incrementalState']['changedIDs'] == changedIDs
+    assert 0 < results['incrementalState']['reusedCount'] < results['candidateCount']
+    assert results['childParentComboDict'] == fullResults['childParentComboDict']
+    assert results['frequencyTable'].equals(fullResults['frequencyTable'])
+
+
+def test_resorting_discards_all_outcomes(tmp_path, frequencyTable):
+    _, sequences = exampleData()
+    identifyArtefacts(frequencyTable, sequences, incremental_ = str(tmp_path / 'state.gz'), **PARAMETERS)
+    extendedTable = sortFrequencyTable(withSample(frequencyTable, {frequencyTable.index[-1]: 1000000}), 'total read count', None)
+    results = identifyArtefacts(extendedTable, sequences, incremental_ = str(tmp_path / 'state.gz'), **PARAMETERS)
+    assert results['incrementalState']['status'] == 'precedence'
+    assert results['incrementalState']['reusedCount'] == 0
+    assert 'WARNING: sorting changed the order of previously analysed sequences, assessing all combinations...' in results['messages']
+    assert results['childParentComboDict'] == identifyArtefacts(extendedTable, sequences, **PARAMETERS)['childParentComboDict']
@@ -0,0 +1,63 @@
+import gzip
+import pytest
+from conftest import EXAMPLES
+from function.tombRaiderFunctions import _importZstd, inputLines, writeOutputFile
+
+OUTPUTS = ('frequency-output', 'sequence-output')
+
+
+def zstdModule():
+    '''
+    zstd implementation used by tombRaider, the test is skipped when neither is installed
+    '''
+    try:
+        return _importZstd()
+    except ImportError:
+        pytest.skip('zstd compression requires Python 3.14+ or the zstandard package')
+
+
+def decompress(outputFile):
+    '''
+    content of a gzip- or zstd-compressed output file, decompressed independently of the reader of tombRaider
+    '''
+    with open(outputFile, 'rb') as compressedFile:
+        content = compressedFile.read()
+    if str(outputFile).endswith('.gz'):
+        return gzip.decompress(content)
+    zstd = zstdModule()
+    if zstd.__name__ == 'zstandard':
+        return zstd.ZstdDecompressor().stream_reader(content, read_across_frames = True).read()
+    return zstd.decompress(content)
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.zst'])
+@pytest.mark.parametrize('threads', [1, 2])
+def test_compressed_output_matches_plain_output(tombRaider, tmp_path, suffix, threads):
+    if suffix == '.zst':
+        zstdModule()
+    arguments = ['--criteria', 'seqSim;coOccur', '--frequency-input', f'{EXAMPLES}/zotutabweb.txt', '--sequence-input', f'{EXAMPLES}/zotus.fasta', '--similarity', '90', '--occurrence-type', 'abundance', '--occurrence-ratio', 'count;0', '--sort', 'total read count', '--threads', threads]
+    tombRaider(*arguments, *[argument for option in OUTPUTS for argument in (f'--{option}', f'plain.{option}')])
+    tombRaider(*arguments, *[argument for option in OUTPUTS for argument in (f'--{option}', f'compressed.{option}{suffix}')])
+    for option in OUTPUTS:
+        assert decompress(tmp_path / f'compressed.{option}{suffix}') == (tmp_path / f'plain.{option}').read_bytes()
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.zst'])
+@pytest.mark.parametrize('threads', [1, 3])
+def test_blocks_of_compressed_output_read_back(tmp_path, suffix, threads):
+    if suffix == '.zst':
+        zstdModule()
+    pieces = [f'line {position}\t{"ACGT" * (position % 7)}\n'.encode() for position in range(5000)]
+    writeOutputFile(str(tmp_path / f'output{suffix}'), pieces, threads_ = threads, block_size_ = 1000)
+    assert decompress(tmp_path / f'output{suffix}') == b''.join(pieces)
+    assert list(inputLines(str(tmp_path / f'output{suffix}'), chunk_size_ = 777)) == pieces
+
+
+def test_zstd_output_without_zstd_is_an_error(tombRaider):
+    try:
+        _importZstd()
+        pytest.skip('zstd compression is available')
+    except ImportError:
+        pass
+    result = tombRaider('--criteria', 'seqSim', '--frequency-input', f'{EXAMPLES}/zotutabweb.txt', '--sequence-input', f'{EXAMPLES}/zotus.fasta', '--similarity', '90', '--frequency-output', 'output.txt.zst', check = False)
+    assert "ERROR | reading or writing zstd-compressed files requires Python 3.14+ or the 'zstandard' package" in ' '.join(result.stderr.split())
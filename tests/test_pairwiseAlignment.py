@@ -0,0 +1,57 @@
+import random
+import pytest
+from function.tombRaiderFunctions import alignmentIdentity, needleman_wunsch, needleman_wunsch_vectorized, smith_waterman, smith_waterman_vectorized
+
+
+def mutatedPair(seed):
+    '''
+    random parent sequence and a child with substitutions, insertions, and deletions
+    '''
+    rng = random.Random(seed)
+    parent = ''.join(rng.choice('ACGT') for _ in range(rng.randint(1, 60)))
+    mutationRate = rng.choice([0.0, 0.02, 0.1, 0.3])
+    child = []
+    for base in parent:
+        mutation = rng.random()
+        if mutation < mutationRate / 3:
+            child.append(rng.choice('ACGT'))
+        elif mutation < 2 * mutationRate / 3:
+            child.append(base + rng.choice('ACGT'))
+        elif mutation >= mutationRate:
+            child.append(base)
+    return parent, ''.join(child) or rng.choice('ACGT')
+
+
+PAIRS = [mutatedPair(seed) for seed in range(40)]
+
+
+@pytest.mark.parametrize('parent, child', PAIRS)
+def test_global_alignment_matches_legacy(parent, child):
+    alignment = needleman_wunsch_vectorized(parent, child)
+    assert alignment == needleman_wunsch(parent, child)
+    assert alignmentIdentity(*alignment, parent, child) == alignmentIdentity(*needleman_wunsch(parent, child), parent, child)
+
+
+@pytest.mark.parametrize('parent, child', PAIRS)
+def test_local_alignment_matches_legacy(parent, child):
+    alignment = smith_waterman_vectorized(parent, child)
+    legacyAlignment = smith_waterman(parent, child)
+    assert alignment == legacyAlignment
+    assert alignmentIdentity(*alignment[:2], parent, child) == alignmentIdentity(*legacyAlignment[:2], parent, child)
+
+
+@pytest.mark.parametrize('parent, child', PAIRS)
+@pytest.mark.parametrize('threshold', [50, 80, 90, 97])
+def test_banded_alignment_stops_only_below_threshold(parent, child, threshold):
+    legacyIdentity = alignmentIdentity(*needleman_wunsch(parent, child), parent, child)
+    alignment = needleman_wunsch_vectorized(parent, child, similarity_threshold = threshold)
+    if alignment[0] is None:
+        assert legacyIdentity <= alignment[1] <= threshold
+    else:
+        assert alignment == needleman_wunsch(parent, child)
+
+
+def test_banded_alignment_stops_early_for_distant_sequences():
+    alignment = needleman_wunsch_vectorized('ACGT' * 15, 'TTGCA' * 4, similarity_threshold = 90)
+    assert alignment[0] is None
+    assert alignment[1] <= 90
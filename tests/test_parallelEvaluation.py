@@ -0,0 +1,52 @@
+import functools, sqlite3
+import pytest
+from conftest import BLAST_FORMAT, EXAMPLES, exampleData, logBody
+from function import tombRaiderFunctions
+
+CONFIGURATIONS = {
+    'taxonomy' : ['--criteria', 'taxID;seqSim;coOccur', '--taxonomy-input', f'{EXAMPLES}/blastTaxonomy.txt', '--blast-format', BLAST_FORMAT, '--occurrence-type', 'abundance', '--occurrence-ratio', 'count;0', '--similarity', '90', '--taxon-quality'],
+    'alignment' : ['--criteria', 'seqSim;coOccur;pseudogene', '--alignment-input', f'{EXAMPLES}/zotus_aligned.nex', '--orf', '2', '--occurrence-type', 'abundance', '--occurrence-ratio', 'local;0.8', '--similarity', '90'],
+    'pairwise' : ['--criteria', 'seqSim;coOccur', '--occurrence-type', 'presence-absence', '--occurrence-ratio', 'global;0.9', '--similarity', '85', '--pairwise-alignment', 'banded'],
+}
+
+
+@pytest.mark.parametrize('configuration', CONFIGURATIONS)
+def test_threads_match_serial_run(tombRaider, tmp_path, configuration):
+    outputs = {}
+    for threads in (1, 3):
+        prefix = tmp_path / f'threads{threads}'
+        tombRaider(*CONFIGURATIONS[configuration], '--frequency-input', f'{EXAMPLES}/zotutabweb.txt', '--sequence-input', f'{EXAMPLES}/zotus.fasta', '--sort', 'total read count', '--threads', threads, '--frequency-output', f'{prefix}.txt', '--sequence-output', f'{prefix}.fasta', '--log', f'{prefix}.log')
+        outputs[threads] = ((tmp_path / f'threads{threads}.txt').read_bytes(), (tmp_path / f'threads{threads}.fasta').read_bytes(), logBody(f'{prefix}.log'))
+    assert outputs[1] == outputs[3]
+
+
+@pytest.mark.parametrize('criteria', ['seqSim;coOccur', 'taxID;seqSim;coOccur;pseudogene'])
+def test_threads_match_serial_run_over_many_blocks(tombRaider, tmp_path, syntheticDataset, criteria):
+    outputs = {}
+    for threads in (1, 2, 4):
+        prefix = tmp_path / f'threads{threads}'
+        tombRaider('--criteria', criteria, '--frequency-input', syntheticDataset / 'countTable.txt', '--sequence-input', syntheticDataset / 'sequences.fasta', '--alignment-input', syntheticDataset / 'alignment.nex', '--taxonomy-input', syntheticDataset / 'blastTaxonomy.txt', '--blast-format', BLAST_FORMAT, '--orf', '1', '--occurrence-type', 'abundance', '--occurrence-ratio', 'count;1', '--similarity', '97', '--sort', 'total read count', '--threads', threads, '--frequency-output', f'{prefix}.txt', '--sequence-output', f'{prefix}.fasta', '--taxonomy-output', f'{prefix}.tax', '--log', f'{prefix}.log')
+        outputs[threads] = tuple((tmp_path / f'threads{threads}.{extension}').read_bytes() for extension in ('txt', 'fasta', 'tax')) + (logBody(f'{prefix}.log'),)
+    assert outputs[1] == outputs[2] == outputs[4]
+
+
+def test_threads_write_similarity_cache_in_batches(monkeypatch, tmp_path):
+    frequencyTable, sequences = exampleData()
+    cacheFile = str(tmp_path / 'cache.sqlite')
+    cachedIdentities = tombRaiderFunctions.identifyArtefacts(frequencyTable, sequences, criteria_ = 'seqSim', similarity_ = 90, similarity_cache_ = cacheFile)['similarityCache']['misses']
+    flushSizes = []
+    flushSimilarityCache = tombRaiderFunctions.flushSimilarityCache
+    def recordingFlush(similarityCache):
+        flushSizes.append(len(similarityCache['used']))
+        flushSimilarityCache(similarityCache)
+    # small blocks of parents, so that the example files are split over several worker tasks
+    monkeypatch.setattr(tombRaiderFunctions, 'parallelPairEvaluation', functools.partial(tombRaiderFunctions.parallelPairEvaluation, pairs_per_block_ = 20))
+    monkeypatch.setattr(tombRaiderFunctions, 'SIMILARITY_CACHE_BATCH', 10)
+    monkeypatch.setattr(tombRaiderFunctions, 'flushSimilarityCache', recordingFlush)
+    results = tombRaiderFunctions.identifyArtefacts(frequencyTable, sequences, criteria_ = 'seqSim', similarity_ = 90, similarity_cache_ = cacheFile, threads_ = 2)
+    # cache usage returned by the worker processes is written while the analysis runs, rather than only when the cache is closed
+    assert len([size for size in flushSizes if size > 0]) > 1
+    connection = sqlite3.connect(cacheFile)
+    # worker processes also align combinations of children assigned by a more abundant parent in another block
+    assert connection.execute('SELECT COUNT(*) FROM similarity').fetchone()[0] >= cachedIdentities + results['similarityCache']['misses']
+    assert connection.execute('SELECT COUNT(*) FROM similarity WHERE generation = 2').fetchone()[0] > 0
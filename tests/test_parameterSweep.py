@@ -0,0 +1,24 @@
+import itertools
+import pandas as pd
+import pytest
+from conftest import exampleData
+from function.tombRaiderFunctions import identifyArtefacts, sortFrequencyTable
+
+SIMILARITIES = ['85', '90', '97']
+OCCURRENCE_RATIOS = ['count;0', 'count;2', 'global;0.9', 'local;0.8']
+DETECTION_THRESHOLDS = ['1', '3']
+
+
+@pytest.mark.parametrize('occurrenceType', ['presence-absence', 'abundance'])
+@pytest.mark.parametrize('threads', [1, 2])
+def test_sweep_rows_match_single_runs(tmp_path, occurrenceType, threads):
+    frequencyTable, sequences = exampleData()
+    frequencyTable = sortFrequencyTable(frequencyTable, 'total read count', None)
+    parameters = {'criteria_': 'seqSim;coOccur', 'occurrence_type_': occurrenceType}
+    identifyArtefacts(frequencyTable, sequences, similarity_ = 90, occurrence_ratio_ = 'count;0', threads_ = threads, sweep_output_ = str(tmp_path / 'sweep.tsv'), sweep_similarity_ = ','.join(SIMILARITIES), sweep_occurrence_ratio_ = ','.join(OCCURRENCE_RATIOS), sweep_detection_threshold_ = ','.join(DETECTION_THRESHOLDS), **parameters)
+    sweep = pd.read_csv(tmp_path / 'sweep.tsv', sep = '\t', dtype = str)
+    assert list(zip(sweep['similarity'], sweep['occurrence ratio'], sweep['detection threshold'])) == list(itertools.product(SIMILARITIES, OCCURRENCE_RATIOS, DETECTION_THRESHOLDS))
+    for row in sweep.itertuples(index = False):
+        results = identifyArtefacts(frequencyTable, sequences, similarity_ = int(row[0]), occurrence_ratio_ = row[1], detection_threshold_ = int(row[2]), **parameters)
+        assert (int(row[3]), int(row[5]), int(row[6])) == (len(results['childParentComboDict']), len(results['combinedDict']), len(results['frequencyTable'])), row
+    assert sweep['artefacts'].astype(int).nunique() > 1
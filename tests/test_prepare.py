@@ -0,0 +1,38 @@
+import shutil
+from conftest import BLAST_FORMAT, EXAMPLES, logBody
+
+OUTPUTS = ('frequency-output', 'sequence-output', 'taxonomy-output', 'log')
+
+
+def runWithPrepare(tombRaider, run, frequencyInput, *prepare):
+    '''
+    run tombRaider on the example files with taxonomy and alignment input, outputs are named after run, returns the terminal output on one line
+    '''
+    result = tombRaider('--criteria', 'taxID;seqSim;coOccur;pseudogene', '--frequency-input', frequencyInput, '--sequence-input', f'{EXAMPLES}/zotus.fasta', '--taxonomy-input', f'{EXAMPLES}/blastTaxonomy.txt', '--blast-format', BLAST_FORMAT, '--alignment-input', f'{EXAMPLES}/zotus_aligned.nex', '--orf', '2', '--similarity', '90', '--occurrence-type', 'abundance', '--occurrence-ratio', 'count;0', '--sort', 'total read count', *[argument for option in OUTPUTS for argument in (f'--{option}', f'{run}.{option}')], *prepare)
+    return ' '.join(result.stderr.split())
+
+
+def assertSameOutputs(tmp_path, run, expectedRun):
+    for option in OUTPUTS[:-1]:
+        assert (tmp_path / f'{run}.{option}').read_text() == (tmp_path / f'{expectedRun}.{option}').read_text(), option
+    assert logBody(tmp_path / f'{run}.log') == logBody(tmp_path / f'{expectedRun}.log')
+
+
+def test_prepared_inputs_reproduce_outputs(tombRaider, tmp_path):
+    runWithPrepare(tombRaider, 'plain', f'{EXAMPLES}/zotutabweb.txt')
+    assert 'Prepared Files | saved to prepared' in runWithPrepare(tombRaider, 'saved', f'{EXAMPLES}/zotutabweb.txt', '--prepare', 'prepared')
+    assert 'Prepared Files | loaded from prepared' in runWithPrepare(tombRaider, 'loaded', f'{EXAMPLES}/zotutabweb.txt', '--prepare', 'prepared')
+    assertSameOutputs(tmp_path, 'saved', 'plain')
+    assertSameOutputs(tmp_path, 'loaded', 'plain')
+
+
+def test_changed_input_file_is_prepared_again(tombRaider, tmp_path):
+    shutil.copy(f'{EXAMPLES}/zotutabweb.txt', tmp_path / 'table.txt')
+    runWithPrepare(tombRaider, 'first', 'table.txt', '--prepare', 'prepared')
+    with open(tmp_path / 'table.txt') as tableFile:
+        lines = tableFile.readlines()
+    with open(tmp_path / 'table.txt', 'w') as tableFile:
+        tableFile.writelines(lines[:-1])
+    assert 'Prepared Files | saved to prepared' in runWithPrepare(tombRaider, 'changed', 'table.txt', '--prepare', 'prepared')
+    runWithPrepare(tombRaider, 'plain', 'table.txt')
+    assertSameOutputs(tmp_path, 'changed', 'plain')